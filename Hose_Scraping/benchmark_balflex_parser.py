@@ -0,0 +1,175 @@
+"""Benchmark: line classifier of BalflexParser vs the original per-line regex loop
+
+Run from Hose_Scraping/:  python benchmark_balflex_parser.py [catalog.txt] [runs]
+Both versions must return exactly the same products.
+"""
+import re
+import sys
+import time
+from typing import List, Dict, Any
+
+from scripts.balflex_parser import BalflexParser
+
+
+class ReferenceParser(BalflexParser):
+    """The parser before the line classifier, copied verbatim from the baseline
+    (whole-file re.sub, then every regex on every line, findall + index per row)"""
+
+    def parse(self) -> List[Dict[str, Any]]:
+        """Scan entire catalog for product rows"""
+        with open(self.catalog_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        # Handle European decimal format (6,3 -> 6.3)
+        content = re.sub(r'(\d),(\d)', r'\1.\2', content)
+
+        # Parse all product rows
+        self.products = self._parse_all_product_rows(content)
+
+        return self.products
+
+    def _parse_all_product_rows(self, content: str) -> List[Dict[str, Any]]:
+        """Find every product row in the catalog"""
+        products = []
+        lines = content.split('\n')
+
+        current_model = None
+        current_standard = None
+
+        for i, line in enumerate(lines):
+            # Track current product model/series name
+            model_patterns = [
+                r'BALPAC\s+[A-Z0-9\s\-]+',
+                r'FORZA\s+[A-Z0-9\s]+',
+                r'TEXMASTER\s+\d*',
+                r'BALFLON\s+[A-Z0-9\s]+',
+                r'BALMASTER\s+[A-Z0-9\s]+',
+                r'POWERSPIR\s+[A-Z0-9\s]+'
+            ]
+
+            for pattern in model_patterns:
+                model_match = re.search(pattern, line, re.IGNORECASE)
+                if model_match:
+                    potential = model_match.group(0).strip()
+                    if len(potential) > 5:
+                        current_model = potential
+                        break
+
+            # Track standards
+            std_match = re.search(r'(DIN\s+EN\s+\d+|SAE\s+100R\d+[A-Z]*|EN\s+\d+/\d+)', line, re.IGNORECASE)
+            if std_match:
+                current_standard = std_match.group(1).strip()
+
+            # Find product data rows with article number (10.XXXX.XX format)
+            # Pattern: REFERENCE  ARTICLE  DN/INCH  INCH  DASH  INNER_DIA  OUTER_DIA  PRESSURE  ...
+            # Note: DN is optional - some products only have inch sizes
+            row_match = re.match(
+                r'\s*([A-Z0-9\-]+)\s+(10\.\d+\.?\d*)\s+(DN\d+|)\s*([^\s]+)\s+([\-\d]+)\s+([\d\.]+)\s+([\d\.]+)',
+                line
+            )
+
+            if row_match:
+                reference = row_match.group(1)
+                article_number = row_match.group(2)
+                dn = row_match.group(3) if row_match.group(3) else ""  # DN might be empty
+                inch_size = row_match.group(4)
+                sae_dash = row_match.group(5)
+                inner_dia = float(row_match.group(6))
+                outer_dia = float(row_match.group(7))
+
+                # Extract all numbers from the line
+                all_numbers = re.findall(r'[\d\.]+', line)
+
+                # Determine model if not set
+                if not current_model:
+                    current_model = self._extract_model_from_reference(reference)
+
+                # Determine construction type
+                construction = self._determine_construction(reference, current_model)
+
+                product = {
+                    'supplier': 'Balflex',
+                    'model': current_model,
+                    'reference': reference,
+                    'article_number': article_number,
+                    'dn': dn,
+                    'inch_size': inch_size,
+                    'sae_dash': sae_dash,
+                    'inner_diameter_mm': inner_dia,
+                    'outer_diameter_mm': outer_dia,
+                    'standard': current_standard or "",
+                    'construction': construction,
+                    'category': self._determine_category(construction)
+                }
+
+                # Extract pressure and other values
+                # Typical order: ... INNER OUTER PRESSURE_MPa PRESSURE_PSI BURST_MPa BURST_PSI BEND_RAD WEIGHT
+                try:
+                    # Find position of inner diameter in numbers list
+                    inner_str = str(inner_dia)
+                    if inner_str in all_numbers:
+                        idx = all_numbers.index(inner_str)
+
+                        # Working pressure (usually 2 positions after outer dia)
+                        if idx + 2 < len(all_numbers):
+                            product['working_pressure_mpa'] = float(all_numbers[idx + 2])
+
+                        # PSI pressure
+                        if idx + 3 < len(all_numbers):
+                            product['working_pressure_psi'] = int(float(all_numbers[idx + 3]))
+
+                        # Burst pressure MPa
+                        if idx + 4 < len(all_numbers):
+                            product['burst_pressure_mpa'] = float(all_numbers[idx + 4])
+
+                        # Burst pressure PSI
+                        if idx + 5 < len(all_numbers):
+                            product['burst_pressure_psi'] = int(float(all_numbers[idx + 5]))
+
+                        # Min bend radius
+                        if idx + 6 < len(all_numbers):
+                            product['min_bend_radius_mm'] = int(float(all_numbers[idx + 6]))
+
+                        # Weight
+                        if idx + 7 < len(all_numbers):
+                            product['weight_kg_m'] = float(all_numbers[idx + 7])
+                except:
+                    pass  # If extraction fails, product still has basic info
+
+                products.append(product)
+
+        return products
+
+
+def best_of(parser, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        products = parser.parse()
+        timings.append(time.perf_counter() - start)
+    return min(timings), products
+
+
+def main():
+    catalog_file = sys.argv[1] if len(sys.argv) > 1 else 'data/balflex_catalog.txt'
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        line_count = sum(1 for _ in f)
+    print(f"Catalog: {catalog_file} ({line_count} lines), best of {runs} runs")
+
+    reference_time, reference_products = best_of(ReferenceParser(catalog_file), runs)
+    new_time, new_products = best_of(BalflexParser(catalog_file), runs)
+
+    print(f"  per-line regex loop : {reference_time * 1000:7.1f} ms  ({len(reference_products)} products)")
+    print(f"  line classifier     : {new_time * 1000:7.1f} ms  ({len(new_products)} products)")
+    print(f"  speedup             : {reference_time / new_time:.1f}x")
+
+    if new_products != reference_products:
+        print("✗ Outputs differ!")
+        sys.exit(1)
+    print("✓ Identical output")
+
+
+if __name__ == "__main__":
+    main()
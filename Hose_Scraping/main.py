@@ -3,20 +3,34 @@ Main Execution Script
 Runs the complete hydraulic hose comparison pipeline
 """
 
+import os
 import sys
+import argparse
 from pathlib import Path
 
 # Add scripts directory to path
 sys.path.append(str(Path(__file__).parent / 'scripts'))
+# Shared crawl helpers live in the top-level scripts/ folder
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'scripts'))
 
 from scripts.balflex_pdf_parser import BalflexPDFParser
 from scripts.heizmann_scraper import HeizmannScraper
 from scripts.product_matcher import ProductMatcher
 from scripts.excel_generator import ExcelGenerator
+from refresh_scheduler import add_refresh_arguments, scheduler_from_args
 
 
 def main():
-    """Run the complete pipeline"""
+    """Run the complete pipeline
+    
+    Usage: python main.py [--refresh-budget N] [--refresh-state FILE]
+    With --refresh-budget, step 2 fetches only the N stalest Heizmann pages
+    and keeps the other products of data/heizmann_products.json.
+    """
+    data_dir = Path(__file__).parent / 'data'
+    arg_parser = argparse.ArgumentParser(description="Hydraulic hose comparison pipeline")
+    add_refresh_arguments(arg_parser, str(data_dir / 'heizmann_refresh_state.json'))
+    args = arg_parser.parse_args()
     
     print("=" * 70)
     print("HYDRAULIC HOSE PRODUCT COMPARISON TOOL")
@@ -25,7 +39,6 @@ def main():
     print()
     
     # Define file paths
-    data_dir = Path(__file__).parent / 'data'
     output_dir = Path(__file__).parent / 'output'
     
     catalog_file = data_dir / 'BALFLEX-HOSES-CATALOGUE_HOSECAT.E.01.2023.pdf'
@@ -51,7 +64,8 @@ def main():
     
     try:
         parser = BalflexPDFParser(str(catalog_file))
-        balflex_products = parser.parse()
+        # Pages are parsed in parallel; output is identical to a serial run
+        balflex_products = parser.parse(workers=os.cpu_count() or 1)
         parser.save_to_json(str(balflex_json))
         print(f"✓ Successfully parsed {len(balflex_products)} Balflex products from PDF")
     except Exception as e:
@@ -67,10 +81,13 @@ def main():
     print()
     
     try:
-        scraper = HeizmannScraper()
+        scraper = HeizmannScraper(scheduler_from_args(args), args.refresh_budget)
         heizmann_products = scraper.scrape()
         scraper.save_to_json(str(heizmann_json))
-        print(f"✓ Successfully scraped {len(heizmann_products)} Heizmann products")
+        if scraper.scheduler:
+            print(f"✓ Successfully refreshed {len(heizmann_products)} Heizmann products")
+        else:
+            print(f"✓ Successfully scraped {len(heizmann_products)} Heizmann products")
     except Exception as e:
         print(f"❌ Error scraping Heizmann website: {e}")
         print("Tip: Check your internet connection and try again")
@@ -129,7 +146,7 @@ def main():
     print()
     print("Summary:")
     print(f"  • Balflex products: {len(balflex_products)}")
-    print(f"  • Heizmann products: {len(heizmann_products)}")
+    print(f"  • Heizmann products: {len(matcher.heizmann_products)}")
     print(f"  • Matched products: {len(matches)}")
     print()
     print("Next steps:")
@@ -3,71 +3,152 @@ Balflex Catalog Parser - Fixed Version
 Scans entire catalog and extracts ALL product rows
 """
 
+import os
 import re
+import sys
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 from pathlib import Path
 
+# Shared PDF helpers live in the top-level scripts/ folder
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'scripts'))
+from pdf_to_text import iter_page_texts
+
+
+# Line patterns, compiled once (European decimals are already converted)
+DECIMAL_COMMA_PATTERN = re.compile(r'(\d),(\d)')
+
+
+def _compile_case_pair(pattern: str) -> tuple:
+    """(case-sensitive, IGNORECASE) versions of a pattern
+    
+    The case-sensitive one runs on the upper-cased copy of an ASCII line,
+    where it finds the same span as IGNORECASE on the line itself, only
+    faster. Non-ASCII lines use the IGNORECASE one, since it also matches
+    characters like 'ı' or 'İ' that upper() does not map to ASCII.
+    """
+    return re.compile(pattern), re.compile(pattern, re.IGNORECASE)
+
+
+# Tried in this order; the first match longer than 5 chars sets the model
+MODEL_PATTERNS = [_compile_case_pair(pattern) for pattern in [
+    r'BALPAC\s+[A-Z0-9\s\-]+',
+    r'FORZA\s+[A-Z0-9\s]+',
+    r'TEXMASTER\s+\d*',
+    r'BALFLON\s+[A-Z0-9\s]+',
+    r'BALMASTER\s+[A-Z0-9\s]+',
+    r'POWERSPIR\s+[A-Z0-9\s]+',
+]]
+# Every model pattern starts with one of these words
+MODEL_KEYWORDS = ('BALPAC', 'FORZA', 'TEXMASTER', 'BALFLON', 'BALMASTER', 'POWERSPIR')
+
+STANDARD_PATTERN = _compile_case_pair(r'(DIN\s+EN\s+\d+|SAE\s+100R\d+[A-Z]*|EN\s+\d+/\d+)')
+
+# Pattern: REFERENCE  ARTICLE  DN/INCH  INCH  DASH  INNER_DIA  OUTER_DIA  PRESSURE  ...
+# Note: DN is optional - some products only have inch sizes
+ROW_PATTERN = re.compile(
+    r'\s*([A-Z0-9\-]+)\s+(10\.\d+\.?\d*)\s+(DN\d+|)\s*([^\s]+)\s+([\-\d]+)\s+([\d\.]+)\s+([\d\.]+)'
+)
+NUMBER_PATTERN = re.compile(r'[\d\.]+')
+# Row values by offset from the inner diameter token (outer diameter is +1)
+ROW_VALUE_COLUMNS = [
+    (2, 'working_pressure_mpa', float),
+    (3, 'working_pressure_psi', lambda value: int(float(value))),
+    (4, 'burst_pressure_mpa', float),
+    (5, 'burst_pressure_psi', lambda value: int(float(value))),
+    (6, 'min_bend_radius_mm', lambda value: int(float(value))),
+    (7, 'weight_kg_m', float),
+]
+REFERENCE_MODEL_PATTERN = re.compile(r'([A-Z0-9]+)[\-\.]')
+
 
 class BalflexParser:
     """Parse Balflex catalog - finds all product rows with article numbers"""
     
-    def __init__(self, catalog_file: str):
+    def __init__(self, catalog_file: str, workers: int = 1):
+        # Either the layout text dump or the catalogue PDF itself
         self.catalog_file = catalog_file
+        self.workers = workers
         self.products = []
         
     def parse(self) -> List[Dict[str, Any]]:
         """Scan entire catalog for product rows"""
-        with open(self.catalog_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        self.products = list(self.iter_products())
+        
+        return self.products
+    
+    def iter_products(self) -> Iterator[Dict[str, Any]]:
+        """Yield product rows while the catalog is read line by line
         
-        # Handle European decimal format (6,3 -> 6.3)
-        content = re.sub(r'(\d),(\d)', r'\1.\2', content)
+        A .pdf catalog is converted to column-aligned layout text on the fly
+        (pdf_to_text.py: parallel over pages, cached per page by PDF hash),
+        so no hand-made text dump is needed.
+        """
+        if str(self.catalog_file).lower().endswith('.pdf'):
+            raw_lines = (line for text in iter_page_texts(self.catalog_file, self.workers)
+                         for line in text.split('\n'))
+            yield from self._iter_product_rows(self._normalize_lines(raw_lines))
+            return
         
-        # Parse all product rows
-        self.products = self._parse_all_product_rows(content)
+        with open(self.catalog_file, 'r', encoding='utf-8') as f:
+            yield from self._iter_product_rows(self._normalize_lines(line.rstrip('\n') for line in f))
+    
+    @staticmethod
+    def _normalize_lines(lines: Iterable[str]) -> Iterator[str]:
+        # Handle European decimal format (6,3 -> 6.3); the pattern never
+        # spans a line break, so converting line by line is the same
+        for line in lines:
+            yield DECIMAL_COMMA_PATTERN.sub(r'\1.\2', line) if ',' in line else line
+    
+    def stream_to_jsonl(self, output_file: str) -> int:
+        """Write products to a JSON Lines file while the catalog is read"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for product in self.iter_products():
+                f.write(json.dumps(product, ensure_ascii=False) + '\n')
+                count += 1
         
-        return self.products
+        print(f"Streamed {count} Balflex products to {output_file}")
+        return count
     
     def _parse_all_product_rows(self, content: str) -> List[Dict[str, Any]]:
-        """Find every product row in the catalog"""
-        products = []
-        lines = content.split('\n')
-        
+        """Find every product row in already normalized catalog text"""
+        return list(self._iter_product_rows(content.split('\n')))
+    
+    def _iter_product_rows(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield product rows; model and standard carry over from earlier lines"""
         current_model = None
         current_standard = None
         
-        for i, line in enumerate(lines):
-            # Track current product model/series name
-            model_patterns = [
-                r'BALPAC\s+[A-Z0-9\s\-]+',
-                r'FORZA\s+[A-Z0-9\s]+',
-                r'TEXMASTER\s+\d*',
-                r'BALFLON\s+[A-Z0-9\s]+',
-                r'BALMASTER\s+[A-Z0-9\s]+',
-                r'POWERSPIR\s+[A-Z0-9\s]+'
-            ]
+        for line in lines:
+            # Classify the line with substring tests on one upper-cased copy;
+            # the regexes only run where they can match (see _compile_case_pair)
+            if line.isascii():
+                text, case = line.upper(), 0
+                maybe_model = any(keyword in text for keyword in MODEL_KEYWORDS)
+                maybe_standard = 'SAE' in text or 'EN' in text
+            else:
+                text, case = line, 1
+                maybe_model = maybe_standard = True
             
-            for pattern in model_patterns:
-                model_match = re.search(pattern, line, re.IGNORECASE)
-                if model_match:
-                    potential = model_match.group(0).strip()
-                    if len(potential) > 5:
-                        current_model = potential
-                        break
+            # Track current product model/series name; runs of spaces are
+            # collapsed, since PDF layout text keeps column gaps between words
+            if maybe_model:
+                for pattern in MODEL_PATTERNS:
+                    model_match = pattern[case].search(text)
+                    if model_match:
+                        potential = ' '.join(line[model_match.start():model_match.end()].split())
+                        if len(potential) > 5:
+                            current_model = potential
+                            break
             
             # Track standards
-            std_match = re.search(r'(DIN\s+EN\s+\d+|SAE\s+100R\d+[A-Z]*|EN\s+\d+/\d+)', line, re.IGNORECASE)
+            std_match = STANDARD_PATTERN[case].search(text) if maybe_standard else None
             if std_match:
-                current_standard = std_match.group(1).strip()
+                current_standard = ' '.join(line[std_match.start(1):std_match.end(1)].split())
             
             # Find product data rows with article number (10.XXXX.XX format)
-            # Pattern: REFERENCE  ARTICLE  DN/INCH  INCH  DASH  INNER_DIA  OUTER_DIA  PRESSURE  ...
-            # Note: DN is optional - some products only have inch sizes
-            row_match = re.match(
-                r'\s*([A-Z0-9\-]+)\s+(10\.\d+\.?\d*)\s+(DN\d+|)\s*([^\s]+)\s+([\-\d]+)\s+([\d\.]+)\s+([\d\.]+)',
-                line
-            )
+            row_match = ROW_PATTERN.match(line) if '10.' in line else None
             
             if row_match:
                 reference = row_match.group(1)
@@ -78,9 +159,6 @@ class BalflexParser:
                 inner_dia = float(row_match.group(6))
                 outer_dia = float(row_match.group(7))
                 
-                # Extract all numbers from the line
-                all_numbers = re.findall(r'[\d\.]+', line)
-                
                 # Determine model if not set
                 if not current_model:
                     current_model = self._extract_model_from_reference(reference)
@@ -105,46 +183,39 @@ class BalflexParser:
                 
                 # Extract pressure and other values
                 # Typical order: ... INNER OUTER PRESSURE_MPa PRESSURE_PSI BURST_MPa BURST_PSI BEND_RAD WEIGHT
-                try:
-                    # Find position of inner diameter in numbers list
-                    inner_str = str(inner_dia)
-                    if inner_str in all_numbers:
-                        idx = all_numbers.index(inner_str)
-                        
-                        # Working pressure (usually 2 positions after outer dia)
-                        if idx + 2 < len(all_numbers):
-                            product['working_pressure_mpa'] = float(all_numbers[idx + 2])
-                        
-                        # PSI pressure
-                        if idx + 3 < len(all_numbers):
-                            product['working_pressure_psi'] = int(float(all_numbers[idx + 3]))
-                        
-                        # Burst pressure MPa
-                        if idx + 4 < len(all_numbers):
-                            product['burst_pressure_mpa'] = float(all_numbers[idx + 4])
-                        
-                        # Burst pressure PSI
-                        if idx + 5 < len(all_numbers):
-                            product['burst_pressure_psi'] = int(float(all_numbers[idx + 5]))
-                        
-                        # Min bend radius
-                        if idx + 6 < len(all_numbers):
-                            product['min_bend_radius_mm'] = int(float(all_numbers[idx + 6]))
-                        
-                        # Weight
-                        if idx + 7 < len(all_numbers):
-                            product['weight_kg_m'] = float(all_numbers[idx + 7])
-                except:
-                    pass  # If extraction fails, product still has basic info
+                numbers, idx = self._numbers_from_inner_diameter(line, row_match, inner_dia)
+                if idx is not None:
+                    try:
+                        for offset, field, convert in ROW_VALUE_COLUMNS:
+                            if idx + offset < len(numbers):
+                                product[field] = convert(numbers[idx + offset])
+                    except (ValueError, OverflowError):
+                        pass  # If extraction fails, product still has basic info
                 
-                products.append(product)
+                yield product
+    
+    def _numbers_from_inner_diameter(self, line: str, row_match, inner_dia: float) -> tuple:
+        """Numeric tokens of a row line and the position of the inner diameter among them
         
-        return products
+        Usually the row is tokenized once from the inner diameter column on,
+        which is then token 0. The original lookup took the first token equal
+        to str(inner_dia) in the whole line; when the column is written
+        differently ('10' -> '10.0') or that text also occurs earlier in the
+        line, the whole line is tokenized and searched the same way, so the
+        values stay exactly as before.
+        """
+        inner_str = str(inner_dia)
+        start = row_match.start(6)
+        if row_match.group(6) == inner_str and inner_str not in line[:start]:
+            return NUMBER_PATTERN.findall(line, start), 0
+        
+        numbers = NUMBER_PATTERN.findall(line)
+        return numbers, (numbers.index(inner_str) if inner_str in numbers else None)
     
     def _extract_model_from_reference(self, reference: str) -> str:
         """Extract model from reference code"""
         # Examples: 2TE-04 -> 2TE, R16I-04 -> R16I
-        match = re.match(r'([A-Z0-9]+)[\-\.]', reference)
+        match = REFERENCE_MODEL_PATTERN.match(reference)
         return match.group(1) if match else reference
     
     def _determine_construction(self, reference: str, model: str) -> str:
@@ -189,14 +260,19 @@ class BalflexParser:
 
 def main():
     """Test parser"""
-    catalog_file = Path(__file__).parent.parent / 'data' / 'balflex_catalog.txt'
-    output_file = Path(__file__).parent.parent / 'data' / 'balflex_products.json'
+    data_dir = Path(__file__).parent.parent / 'data'
+    output_file = data_dir / 'balflex_products.json'
+    
+    # Prefer the catalogue PDF; the old text dump is only a fallback
+    catalog_file = data_dir / 'BALFLEX-HOSES-CATALOGUE_HOSECAT.E.01.2023.pdf'
+    if not catalog_file.exists():
+        catalog_file = data_dir / 'balflex_catalog.txt'
     
     if not catalog_file.exists():
         print(f"Error: {catalog_file} not found!")
         return
     
-    parser = BalflexParser(str(catalog_file))
+    parser = BalflexParser(str(catalog_file), workers=os.cpu_count() or 1)
     products = parser.parse()
     parser.save_to_json(str(output_file))
     
@@ -6,91 +6,335 @@ Replaces the old TXT-based parser with proper PDF parsing
 import pdfplumber
 import re
 import json
-from typing import List, Dict
+import sys
+import multiprocessing
+from typing import List, Dict, Iterator
 from pathlib import Path
 
+# Shared PDF helpers live in the top-level scripts/ folder
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'scripts'))
+from pdf_pages import (PageClassCache, classify_page, iter_pages, memory_report,
+                       sidecar_path, HOSE_ARTICLE_PATTERN)
+from pdf_cache import ExtractionCache
+from pdf_layout import PageLayout
+from pdf_editions import EditionDiff
+from pdf_index import CatalogueIndex, find_model_line
+
 
 class BalflexPDFParser:
     """Parse Balflex catalog PDF and extract product specifications"""
     
-    def __init__(self, pdf_path: str):
+    # pdfplumber table settings (None = library defaults); part of the cache key
+    TABLE_SETTINGS = None
+    # Bump when the row mapping changes; edition snapshots of older versions are not reused
+    PARSER_VERSION = '2'
+    
+    # Header words per field, matched against each column's merged header label
+    # (its own header cells plus the spanning cell above them)
+    HEADER_FIELDS = [
+        ('reference', ('REFERENCE', 'REF')),
+        ('article', ('#', 'ARTICLE', 'CODE')),
+        ('dn', ('DN',)),
+        ('inch', ('INCH', '"')),
+        ('sae_dash', ('SAE', 'DASH')),
+        ('inner_dia', ('ID', 'INNER', 'INSIDE')),
+        ('outer_dia', ('OD', 'OUTER', 'OUTSIDE')),
+        ('working_pressure', ('WP', 'WORKING')),
+        ('burst_pressure', ('BP', 'BURST')),
+        ('bend_radius', ('BR', 'BEND', 'RADIUS')),
+    ]
+    # A header without these columns is an unknown layout
+    REQUIRED_COLUMNS = ('reference', 'article', 'dn')
+    
+    # Balflex PDF table structure (observed), used for unknown layouts:
+    # Col 0: REFERENCE (4SP-04-F)
+    # Col 1: # (10.1008.04F) - article number
+    # Col 2: DN (DN6)
+    # Col 3: inch (1/4")
+    # Col 4: SAE Dash (-4)
+    # Col 5: Inner diameter mm (6.5)
+    # Col 6: Outer diameter mm (17,4)
+    # Col 7: Working pressure (45,0 6600) - MPa and PSI combined
+    # Col 8: Burst pressure MPa (180,0)
+    # Col 9: Burst pressure PSI (26400)
+    # Col 10: Bend radius (150)
+    # Col 11: Weight (0,70)
+    FIXED_COLUMNS = {
+        'reference': 0,
+        'article': 1,
+        'dn': 2,
+        'inch': 3,
+        'sae_dash': 4,
+        'inner_dia': 5,
+        'outer_dia': 6,
+        'working_pressure': 7,
+        'burst_pressure': 8,
+        'bend_radius': 10,
+    }
+    
+    def __init__(self, pdf_path: str, use_cache: bool = True, release_pages: bool = True):
         self.pdf_path = pdf_path
         self.products = []
+        # Raw tables/text per page are cached beside the PDF, so changes to the
+        # row mapping below re-run in seconds without pdfplumber
+        self.use_cache = use_cache
+        self.extraction_cache = ExtractionCache(pdf_path) if use_cache else None
+        # Drop each page's pdfplumber objects once it is parsed, so memory stays
+        # flat over the whole catalogue instead of growing page by page
+        self.release_pages = release_pages
+        # Column mapping per header signature, and tables that could not be mapped
+        self.column_layouts = {}
+        self.layout_report = {}
     
-    def parse(self) -> List[Dict]:
-        """Main parsing function"""
+    def parse(self, workers: int = 1, classify_pages: bool = True) -> List[Dict]:
+        """Main parsing function (collects iter_products() into self.products)"""
         print("Parsing Balflex PDF catalog...")
         
+        self.products = list(self.iter_products(workers, classify_pages))
+        
+        print(f"\n✓ Extracted {len(self.products)} products from PDF")
+        print(memory_report(workers > 1))
+        return self.products
+    
+    def iter_products(self, workers: int = 1, classify_pages: bool = True) -> Iterator[Dict]:
+        """Yield products in page order as their pages are parsed
+        
+        workers > 1 shards page ranges across processes; each worker opens its
+        own PDF handle and chunks are yielded in page order, so the output is
+        identical to the serial run.
+        
+        classify_pages runs a cheap pre-pass on each page's characters and skips
+        table extraction on pages that cannot hold a product table. The
+        classification is stored beside the PDF (<name>.pages.json) for reuse.
+        """
+        page_cache = PageClassCache(self.pdf_path) if classify_pages else None
+        classes = dict(page_cache.pages) if page_cache else None
+        if self.extraction_cache:
+            self.extraction_cache.hits = self.extraction_cache.misses = 0
+        self.layout_report = {}
+        
+        try:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                total_pages = len(pdf.pages)
+                print(f"Total pages: {total_pages}")
+                
+                if workers <= 1:
+                    for page_num in range(1, total_pages + 1):
+                        yield from self._parse_page_numbers(pdf, [page_num], classes)
+            
+            if workers > 1:
+                yield from self._iter_parallel(total_pages, workers, classes)
+        finally:
+            # Also runs when the consumer stops early
+            if page_cache:
+                page_cache.update(classes)
+                page_cache.save()
+                skipped = sum(1 for features in classes.values() if not self._is_product_page(features))
+                print(f"Skipped {skipped} non-product pages (classes: {page_cache.cache_file.name})")
+            
+            if self.extraction_cache and workers <= 1:
+                print(self.extraction_cache.summary())
+            self.save_layout_report()
+    
+    def stream_to_jsonl(self, output_file: str, **parse_options) -> int:
+        """Write products to a JSON Lines file while the PDF is parsed"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for product in self.iter_products(**parse_options):
+                f.write(json.dumps(product, ensure_ascii=False) + '\n')
+                count += 1
+        
+        print(f"✓ Streamed {count} products to {output_file}")
+        return count
+    
+    def parse_incremental(self, snapshot_file: str, report_file: str = None,
+                          classify_pages: bool = True) -> List[Dict]:
+        """Parse a new catalogue edition, re-extracting only new or changed pages
+        
+        Pages are matched to the previous edition by content-stream fingerprint
+        (see pdf_editions.EditionDiff); unchanged pages reuse its products.
+        The snapshot is then updated to this edition and a per-page change
+        report is written.
+        """
+        print("Parsing Balflex PDF catalog (incremental)...")
+        
+        diff = EditionDiff(snapshot_file, self.PARSER_VERSION)
+        page_cache = PageClassCache(self.pdf_path) if classify_pages else None
+        classes = dict(page_cache.pages) if page_cache else None
+        
+        self.products = []
+        self.layout_report = {}
         with pdfplumber.open(self.pdf_path) as pdf:
             print(f"Total pages: {len(pdf.pages)}")
             
-            # Parse each page
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    self._parse_page(page, page_num)
-                except Exception as e:
-                    # Skip problematic pages
-                    if page_num % 20 == 0:
-                        print(f"  Processed {page_num} pages...")
-                    continue
+            for page_num, page in iter_pages(pdf, release=self.release_pages):
+                products = diff.reuse(page, page_num)
+                if products is None:
+                    products = self._parse_page_numbers(pdf, [page_num], classes)
+                    diff.record(page_num, products)
+                self.products.extend(products)
+        
+        if page_cache:
+            page_cache.update(classes)
+            page_cache.save()
+        diff.save(self.pdf_path, report_file)
+        self.save_layout_report()
         
         print(f"\n✓ Extracted {len(self.products)} products from PDF")
+        print(memory_report())
+        return self.products
+    
+    def parse_pages(self, pages) -> List[Dict]:
+        """Parse only the given 1-based page numbers, e.g. parse_pages(range(120, 131))"""
+        self.layout_report = {}
+        with pdfplumber.open(self.pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+            page_numbers = [n for n in pages if 1 <= n <= total_pages]
+            self.products = self._parse_page_numbers(pdf, page_numbers)
+        
+        print(f"✓ Extracted {len(self.products)} products from {len(page_numbers)} pages")
+        self.save_layout_report()
         return self.products
     
-    def _parse_page(self, page, page_num: int):
+    def parse_sections(self, *terms: str) -> List[Dict]:
+        """Parse only the pages of matching catalogue sections, e.g. parse_sections('4SP', 'R13')
+        
+        Sections come from the catalogue index stored beside the PDF
+        (<name>.index.json, see pdf_index.CatalogueIndex).
+        """
+        page_numbers = CatalogueIndex(self.pdf_path).page_numbers(*terms)
+        print(f"Sections matching {', '.join(terms)}: {len(page_numbers)} pages")
+        return self.parse_pages(page_numbers)
+    
+    def save_layout_report(self, report_file: str = None):
+        """Write tables with unknown header layouts beside the PDF (<name>.layouts.json)"""
+        report_file = Path(report_file) if report_file else sidecar_path(self.pdf_path, 'layouts.json')
+        if not self.layout_report:
+            return
+        
+        entries = sorted(self.layout_report.values(), key=lambda entry: entry['pages'][0])
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        
+        pages = sum(len(entry['pages']) for entry in entries)
+        print(f"⚠ {len(entries)} unknown table layouts on {pages} tables (report: {report_file.name})")
+    
+    def _report_layout(self, header_rows: List[List], page_num: int, action: str, missing: List[str] = None):
+        """Add a table whose header could not be mapped to the layout report"""
+        signature = self._header_signature(header_rows)
+        key = json.dumps(signature)
+        entry = self.layout_report.setdefault(key, {
+            'header': [list(row) for row in signature],
+            'missing_columns': missing or [],
+            'action': action,
+            'pages': [],
+        })
+        entry['pages'].append(page_num)
+    
+    def _merge_layout_report(self, report: Dict):
+        """Merge a layout report made elsewhere (e.g. in a worker process)"""
+        for key, entry in report.items():
+            if key in self.layout_report:
+                self.layout_report[key]['pages'].extend(entry['pages'])
+            else:
+                self.layout_report[key] = entry
+    
+    def _iter_parallel(self, total_pages: int, workers: int, classes: Dict[int, Dict] = None) -> Iterator[Dict]:
+        """Parse contiguous page ranges in worker processes and yield them in page order
+        
+        Workers classify the pages of their own range; new classifications are
+        merged back into `classes`.
+        """
+        # A few chunks per worker keeps processes busy when page costs differ
+        chunk_count = min(total_pages, workers * 4)
+        bounds = [1 + total_pages * i // chunk_count for i in range(chunk_count + 1)]
+        chunks = []
+        for i in range(chunk_count):
+            known = None
+            if classes is not None:
+                known = {n: classes[n] for n in range(bounds[i], bounds[i + 1]) if n in classes}
+            chunks.append((self.pdf_path, bounds[i], bounds[i + 1], known, self.use_cache, self.release_pages))
+        
+        with multiprocessing.Pool(workers) as pool:
+            # imap hands back chunk results in submission order as they finish
+            for chunk_products, chunk_classes, chunk_layouts in pool.imap(_parse_page_chunk, chunks):
+                if classes is not None:
+                    classes.update(chunk_classes)
+                self._merge_layout_report(chunk_layouts)
+                yield from chunk_products
+    
+    @staticmethod
+    def _is_product_page(features: Dict) -> bool:
+        """A product page names a known series and has REFERENCE and DN headers
+        
+        _parse_page needs a model name and a table mentioning REFERENCE and DN,
+        so pages failing this check would never yield products.
+        """
+        return bool(features['series'] and features['has_reference'] and features['has_dn'])
+    
+    def _parse_page_numbers(self, pdf, page_numbers, classes: Dict[int, Dict] = None) -> List[Dict]:
+        """Parse the given 1-based pages of an open PDF
+        
+        If a `classes` dict is given, pages are classified first (missing
+        entries are added to it) and only product pages reach _parse_page.
+        """
+        products = []
+        
+        for page_num, page in iter_pages(pdf, page_numbers, self.release_pages):
+            try:
+                if classes is not None:
+                    if page_num not in classes:
+                        classes[page_num] = classify_page(page)
+                    if not self._is_product_page(classes[page_num]):
+                        continue
+                
+                products.extend(self._parse_page(page, page_num))
+            except Exception as e:
+                # Skip problematic pages
+                if page_num % 20 == 0:
+                    print(f"  Processed {page_num} pages...")
+                continue
+        
+        return products
+    
+    def _parse_page(self, page, page_num: int) -> List[Dict]:
         """Parse a single page for product tables"""
         
-        # Extract tables from page
-        tables = page.extract_tables()
+        # Tables and page text from one pass over the page's characters
+        layout = self._extract_layout(page, page_num)
+        tables = layout['tables']
         
         if not tables:
-            return
+            return []
         
-        # Get page text to find model name
-        try:
-            text = page.extract_text()
-            if not text:
-                return
-        except:
-            return
+        # Page text is used to find the model name
+        text = layout['text']
+        if not text:
+            return []
         
         # Find model name from page
         model_name = self._extract_model_name(text)
         standard = self._extract_standard(text, model_name)
         
         if not model_name:
-            return
+            return []
         
         # Parse each table
+        products = []
         for table in tables:
-            products = self._parse_product_table(table, model_name, standard, page_num)
-            self.products.extend(products)
+            products.extend(self._parse_product_table(table, model_name, standard, page_num))
+        
+        return products
+    
+    def _extract_layout(self, page, page_num: int) -> Dict:
+        """Tables, text and header lines of a page (see pdf_layout.PageLayout)"""
+        if self.extraction_cache:
+            return self.extraction_cache.layout(page, page_num, self.TABLE_SETTINGS)
+        return PageLayout(page, self.TABLE_SETTINGS).to_dict()
     
     def _extract_model_name(self, text: str) -> str:
-        """Extract model name from page text"""
-        
-        # Look for known model patterns
-        models = [
-            'POWERSPIR BESTFLEX',
-            'BALMASTER BESTFLEX',
-            'BALPAC IMPACTUS',
-            'TEXMASTER',
-            'BALFLON',
-            'FORZA',
-            'MULTIFLEX',
-            'MULTIPURPOSE',
-        ]
-        
-        for model in models:
-            if model in text.upper():
-                # Get the full line with model name
-                lines = text.split('\n')
-                for line in lines:
-                    if model in line.upper():
-                        # Clean up the model name
-                        return line.strip().split('\n')[0]
-        
-        return ""
+        """Extract model name from page text (the line naming a known series)"""
+        return find_model_line(text)
     
     def _extract_standard(self, text: str, model_line: str = "") -> str:
         """Extract standard/norm from page text"""
@@ -140,10 +384,6 @@ class BalflexPDFParser:
         if not table or len(table) < 2:
             return products
         
-        # Balflex tables usually have 1-2 header rows, then data
-        # Look for row with "REFERENCE" or "#" in first columns
-        data_start_row = 2  # Usually data starts at row 2
-        
         # Verify this is a product table (has REFERENCE and DN)
         has_reference = False
         has_dn = False
@@ -156,14 +396,24 @@ class BalflexPDFParser:
         if 'DN' in all_text.upper():
             has_dn = True
         
+        # Balflex tables have 1-2 header rows above the first article number
+        header_count = self._count_header_rows(table)
+        header_rows = table[:header_count]
+        
         if not (has_reference and has_dn):
+            if any(cell and HOSE_ARTICLE_PATTERN.search(str(cell)) for row in table for cell in row):
+                # Article numbers but no recognisable header
+                self._report_layout(header_rows, page_num, 'skipped', ['reference', 'dn'])
             return products
         
-        # Get column indices (fixed structure for Balflex)
-        col_indices = self._find_column_indices([])
+        col_indices = self._find_column_indices(header_rows)
+        if col_indices is None:
+            # Unknown layout: keep the observed Balflex structure, but report it
+            col_indices = self.FIXED_COLUMNS
+            self._report_layout(header_rows, page_num, 'fixed columns', self._missing_columns(header_rows))
         
-        # Parse data rows (skip first 2 header rows)
-        for row in table[data_start_row:]:
+        # Parse data rows
+        for row in table[header_count:]:
             if not row or len(row) < 3:
                 continue
             
@@ -178,39 +428,82 @@ class BalflexPDFParser:
         
         return products
     
-    def _find_column_indices(self, headers: List) -> Dict[str, int]:
-        """Find column indices for important fields"""
-        
+    @staticmethod
+    def _count_header_rows(table: List[List], max_rows: int = 2) -> int:
+        """Leading rows without an article number (10.XXXX.XX), at most max_rows"""
+        for count, row in enumerate(table[:max_rows]):
+            if any(cell and HOSE_ARTICLE_PATTERN.search(str(cell)) for cell in row):
+                return count
+        return min(max_rows, len(table))
+    
+    @staticmethod
+    def _header_signature(header_rows: List[List]) -> tuple:
+        """Normalised header cells; tables with the same signature share a column mapping"""
+        return tuple(tuple(' '.join(str(cell).split()).upper() if cell else '' for cell in row)
+                     for row in header_rows)
+    
+    @staticmethod
+    def _column_labels(signature: tuple) -> List[List[str]]:
+        """Header words of each column, including those of merged cells spanning it
+        
+        A merged cell (e.g. "WP" over "MPa" and "PSI") only fills its first
+        column; an empty cell with a sub-header below it belongs to the
+        nearest non-empty cell on its left.
+        """
+        width = max((len(row) for row in signature), default=0)
+        labels = [[] for _ in range(width)]
+        
+        for row_idx, row in enumerate(signature):
+            spanning = ''
+            for col in range(width):
+                cell = row[col] if col < len(row) else ''
+                below = any(col < len(lower) and lower[col] for lower in signature[row_idx + 1:])
+                if cell:
+                    spanning = cell
+                elif not below:
+                    spanning = ''
+                labels[col].extend(re.findall(r'[A-Z]+|#|"', cell or (spanning if below else '')))
+        
+        return labels
+    
+    def _map_columns(self, signature: tuple) -> Dict[str, int]:
+        """Field -> column index for every field found in the header"""
+        labels = self._column_labels(signature)
         indices = {}
         
-        # Balflex PDF table structure (observed):
-        # Col 0: REFERENCE (4SP-04-F)
-        # Col 1: # (10.1008.04F) - article number
-        # Col 2: DN (DN6)
-        # Col 3: inch (1/4")
-        # Col 4: SAE Dash (-4)
-        # Col 5: Inner diameter mm (6.5)
-        # Col 6: Outer diameter mm (17,4)
-        # Col 7: Working pressure (45,0 6600) - MPa and PSI combined
-        # Col 8: Burst pressure MPa (180,0)
-        # Col 9: Burst pressure PSI (26400)
-        # Col 10: Bend radius (150)
-        # Col 11: Weight (0,70)
-        
-        # Use fixed indices based on Balflex format
-        indices['reference'] = 0
-        indices['article'] = 1
-        indices['dn'] = 2
-        indices['inch'] = 3
-        indices['sae_dash'] = 4
-        indices['inner_dia'] = 5
-        indices['outer_dia'] = 6
-        indices['working_pressure'] = 7
-        indices['burst_pressure'] = 8
-        indices['bend_radius'] = 10
+        for field, keywords in self.HEADER_FIELDS:
+            candidates = [
+                col for col, words in enumerate(labels)
+                if col not in indices.values()
+                and any(word == keyword or (len(keyword) > 3 and word.startswith(keyword))
+                        for word in words for keyword in keywords)
+            ]
+            if candidates:
+                # MPa / PSI split: prefer the MPa column
+                indices[field] = next((col for col in candidates if 'MPA' in labels[col]), candidates[0])
         
         return indices
     
+    def _missing_columns(self, header_rows: List[List]) -> List[str]:
+        indices = self._map_columns(self._header_signature(header_rows))
+        return [field for field in self.REQUIRED_COLUMNS if field not in indices]
+    
+    def _find_column_indices(self, headers: List[List]) -> Dict[str, int]:
+        """Column indices for important fields, read from the table's header rows
+        
+        The mapping is computed once per header signature and reused for every
+        table with the same header. Returns None for an unknown layout (a
+        required column was not found).
+        """
+        signature = self._header_signature(headers)
+        if signature not in self.column_layouts:
+            indices = self._map_columns(signature)
+            if any(field not in indices for field in self.REQUIRED_COLUMNS):
+                indices = None
+            self.column_layouts[signature] = indices
+        
+        return self.column_layouts[signature]
+    
     def _extract_product_from_row(self, row: List, col_indices: Dict, model_name: str, standard: str) -> Dict:
         """Extract product data from table row"""
         
@@ -346,6 +639,21 @@ class BalflexPDFParser:
         print(f"Saved {len(self.products)} Balflex products to {output_file}")
 
 
+def _parse_page_chunk(chunk: tuple):
+    """Worker: parse pages start..stop-1 with its own PDF handle
+    
+    `chunk` is (pdf_path, start, stop, known page classes, use_cache, release_pages).
+    Returns (products, page classes of the range, unknown table layouts).
+    """
+    pdf_path, start, stop, classes, use_cache, release_pages = chunk
+    parser = BalflexPDFParser(pdf_path, use_cache, release_pages)
+    with pdfplumber.open(pdf_path) as pdf:
+        products = parser._parse_page_numbers(pdf, range(start, stop), classes)
+    if parser.extraction_cache:
+        parser.extraction_cache.close()
+    return products, classes or {}, parser.layout_report
+
+
 if __name__ == "__main__":
     # Parse PDF
     parser = BalflexPDFParser("data/BALFLEX-HOSES-CATALOGUE_HOSECAT.E.01.2023.pdf")
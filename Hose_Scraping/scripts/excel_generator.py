@@ -17,6 +17,8 @@ class ExcelGenerator:
     def __init__(self, matches_file: str):
         self.matches_file = matches_file
         self.matches = self._load_matches()
+        # Top-k runs write several ranked candidates per Balflex hose
+        self.ranked = any('rank' in match for match in self.matches)
     
     def _load_matches(self):
         """Load matches from JSON file"""
@@ -38,8 +40,9 @@ class ExcelGenerator:
         # Create DataFrame
         df = self._create_dataframe()
         
-        # Sort by match score (descending)
-        df = df.sort_values('Match Score %', ascending=False)
+        # Sort by match score (descending); ranked candidates stay grouped per Balflex hose
+        if not self.ranked:
+            df = df.sort_values('Match Score %', ascending=False)
         
         # Save to Excel
         df.to_excel(output_file, index=False, sheet_name='Product Comparison')
@@ -86,6 +89,9 @@ class ExcelGenerator:
                 'Balflex OD (mm)': match.get('balflex_outer_diameter_mm', ''),
                 'Heizmann OD (mm)': match.get('heizmann_outer_diameter_mm', ''),
             }
+            # Last column, so the position-based formatting below is unchanged
+            if self.ranked:
+                row['Rank'] = match.get('rank', 1)
             data.append(row)
         
         return pd.DataFrame(data)
@@ -171,6 +177,7 @@ class ExcelGenerator:
             'T': 12,  # Heizmann ID
             'U': 12,  # Balflex OD
             'V': 12,  # Heizmann OD
+            'W': 8,   # Rank (top-k runs only)
         }
         
         for col, width in column_widths.items():
@@ -189,11 +196,12 @@ class ExcelGenerator:
         """Add a summary sheet with statistics"""
         ws_summary = wb.create_sheet('Summary', 0)
         
-        # Calculate statistics
-        total_matches = len(self.matches)
+        # Calculate statistics (best candidate of each Balflex hose only)
+        matches = [match for match in self.matches if match.get('rank', 1) == 1]
+        total_matches = len(matches)
         quality_counts = {}
         
-        for match in self.matches:
+        for match in matches:
             quality = match.get('match_quality', 'Unknown')
             quality_counts[quality] = quality_counts.get(quality, 0) + 1
         
@@ -201,7 +209,7 @@ class ExcelGenerator:
         balflex_categories = {}
         heizmann_categories = {}
         
-        for match in self.matches:
+        for match in matches:
             b_cat = match.get('balflex_category', 'Unknown')
             h_cat = match.get('heizmann_category', 'Unknown')
             balflex_categories[b_cat] = balflex_categories.get(b_cat, 0) + 1
@@ -8,16 +8,33 @@ from bs4 import BeautifulSoup
 import json
 import time
 import re
+import sys
+import argparse
 from typing import List, Dict
 from pathlib import Path
 
+# Shared crawl helpers live in the top-level scripts/ folder
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'scripts'))
+from crawl_resilience import ResilientCrawl, raise_swallowed
+from refresh_scheduler import add_refresh_arguments, merge_with_output, scheduler_from_args
+
 
 class HeizmannScraper:
     """Scrape Heizmann - extracts real product data from variant tables"""
     
-    def __init__(self):
+    def __init__(self, scheduler=None, budget: int = None):
         self.base_url = "https://www.heizmann.ch"
         self.products = []
+        # Optional RefreshScheduler (scripts/refresh_scheduler.py): only the
+        # stalest `budget` product pages are fetched when it is set
+        self.scheduler = scheduler
+        self.budget = budget
+        self.refreshed_urls = set()
+        # Error swallowed by the last _scrape_product_page call (None = success)
+        self.last_error = None
+        # Pause the host after a burst of failures, retry failed pages at the end
+        self.resilience = ResilientCrawl()
+        self._fetch_page = raise_swallowed(self, self._scrape_product_page)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -32,17 +49,45 @@ class HeizmannScraper:
         hose_products = self._get_hose_product_links(main_url)
         print(f"Found {len(hose_products)} hose product pages\n")
         
+        if self.scheduler:
+            hose_products = self.scheduler.plan(hose_products, budget=self.budget)
+            print(f"Refresh plan: {len(hose_products)} pages (stalest first)\n")
+        
         # Visit each product page and scrape variant tables
         for name, url in hose_products:
             print(f"Scraping: {name}")
             time.sleep(0.5)  # Be polite to the server
             
-            variants = self._scrape_product_page(name, url)
-            self.products.extend(variants)
+            ok, variants = self.resilience.fetch(f"{self.base_url}{url}", self._fetch_page, name, url)
+            if not ok:
+                print(f"  -> Failed, deferred for retry")
+                continue
+            
+            self._store_page(url, variants)
             print(f"  -> Extracted {len(variants)} variants")
         
+        # Reprocess failed pages with backoff
+        def on_result(args, variants):
+            self._store_page(args[1], variants)
+            print(f"Recovered: {args[0]} -> {len(variants)} variants")
+        
+        self.resilience.retry_deferred(self._fetch_page, on_result)
+        print()
+        for line in self.resilience.summary():
+            print(line)
+        
+        if self.scheduler:
+            self.scheduler.save()
+        
         return self.products
     
+    def _store_page(self, url: str, variants: List[Dict]):
+        """Keep variants of a successfully scraped page"""
+        self.products.extend(variants)
+        if self.scheduler:
+            self.scheduler.record(url, variants)
+            self.refreshed_urls.add(f"{self.base_url}{url}")
+    
     def _get_hose_product_links(self, category_url: str) -> List[tuple]:
         """Get product page links from category"""
         products = []
@@ -147,6 +192,7 @@ class HeizmannScraper:
         
         except Exception as e:
             print(f"  Error scraping {model_name}: {e}")
+            self.last_error = e
         
         return variants
     
@@ -453,18 +499,34 @@ class HeizmannScraper:
             return None
     
     def save_to_json(self, output_file: str):
-        """Save to JSON"""
+        """Save to JSON
+        
+        After a refresh run only the refreshed pages' products are replaced;
+        the rest of the existing file is kept.
+        """
+        products = self.products
+        if self.scheduler:
+            products = merge_with_output(output_file, self.products, self.refreshed_urls)
+        
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
+            json.dump(products, f, indent=2, ensure_ascii=False)
         
-        print(f"\nSaved {len(self.products)} Heizmann products")
+        print(f"\nSaved {len(products)} Heizmann products")
 
 
 def main():
-    """Test"""
-    output_file = Path(__file__).parent.parent / 'data' / 'heizmann_products.json'
+    """Test
+    
+    Usage: python heizmann_scraper.py [--refresh-budget N] [--refresh-state FILE]
+    """
+    data_dir = Path(__file__).parent.parent / 'data'
+    output_file = data_dir / 'heizmann_products.json'
+    
+    arg_parser = argparse.ArgumentParser(description="Scrape Heizmann hoses")
+    add_refresh_arguments(arg_parser, str(data_dir / 'heizmann_refresh_state.json'))
+    args = arg_parser.parse_args()
     
-    scraper = HeizmannScraper()
+    scraper = HeizmannScraper(scheduler_from_args(args), args.refresh_budget)
     products = scraper.scrape()
     scraper.save_to_json(str(output_file))
     
@@ -4,15 +4,181 @@ Compares and matches hydraulic hose products from Balflex and Heizmann
 based on technical specifications
 """
 
-import json
 import re
-from typing import List, Dict, Any, Tuple
+import sys
+import json
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 from pathlib import Path
 
+import numpy as np
+
+# Shared helpers live in the top-level scripts/ folder
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'scripts'))
+from top_k import TopK
+from assignment import CANDIDATES_PER_PRODUCT, assign_ranked
+from parallel_match import map_shards
+from match_cache import MatchCache
+
+
+# Standard parsing, done once per product in _normalize
+EN_NUMBER_PATTERN = re.compile(r'EN\s*(\d{3})')
+SAE_NUMBER_PATTERN = re.compile(r'SAE\s*\d+R(\d+)')
+STANDARD_CODE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'DIN\s*EN\s*\d+',
+    r'SAE\s*\d+R\d+',
+    r'EN\s*\d+',
+    r'ISO\s*\d+',
+]]
+
+# Component codes of _score_features: one small field per score component,
+# packed into an int so the pair loop builds no strings (decoded by _explain)
+REJECT_SHIFT, DN_SHIFT, PRESSURE_SHIFT, STANDARD_SHIFT, CONSTRUCTION_SHIFT, INNER_SHIFT = 0, 2, 4, 6, 9, 11
+REJECT_REASONS = {
+    1: "Construction mismatch: textile vs wire - INCOMPATIBLE",
+    2: "Construction mismatch: wire vs textile - INCOMPATIBLE",
+    3: "Construction mismatch: spiral vs non-spiral - INCOMPATIBLE",
+}
+STANDARD_EN_MATCH, STANDARD_EN_COMPATIBLE, STANDARD_SAE_MATCH, STANDARD_CODE_MATCH, STANDARD_CODE_SIMILAR = range(1, 6)
+
+
+class HoseScoreMatrix:
+    """Columnar feature arrays and N×M match-point matrices for ProductMatcher
+    
+    Points are the integer sums of _score_features (0-100, 0 for incompatible
+    constructions). Standard, construction and construction-family rules only
+    depend on a product's own strings, so they are evaluated once per pair of
+    distinct values into lookup tables; DN, pressure and inner diameter are
+    computed with array arithmetic. Rows are processed in tiles of at most
+    TILE_SIZE cells to bound memory.
+    """
+    
+    TILE_SIZE = 1 << 22
+    
+    def __init__(self, matcher: 'ProductMatcher', balflex_features: List[Dict], heizmann_features: List[Dict]):
+        self.rows = len(balflex_features)
+        self.cols = len(heizmann_features)
+        
+        # Categorical features -> ids into small lookup tables
+        self.standard_b, self.standard_h, self.standard_points = self._lookup_table(
+            balflex_features, heizmann_features, 'standard', matcher._standard_points)
+        self.construction_b, self.construction_h, self.construction_points = self._lookup_table(
+            balflex_features, heizmann_features, 'construction', matcher._construction_points)
+        self.family_b, self.family_h, self.compatible = self._lookup_table(
+            balflex_features, heizmann_features, 'family',
+            lambda b, h: (int(matcher._families_compatible(b['family'], h['family'])), None))
+        
+        # DN: equal DN strings (ids, -1 = missing) or DN numbers (NaN = missing)
+        dn_ids = {}
+        self.dn_b, self.dn_h = (
+            np.array([dn_ids.setdefault(f['dn'], len(dn_ids)) if f['dn'] else -1 for f in features], dtype=np.int32)
+            for features in (balflex_features, heizmann_features)
+        )
+        self.dn_number_b, self.dn_number_h = (
+            self._numbers(features, 'dn_number') for features in (balflex_features, heizmann_features))
+        self.pressure_b, self.pressure_h = (
+            self._numbers(features, 'pressure_mpa') for features in (balflex_features, heizmann_features))
+        self.inner_b, self.inner_h = (
+            self._numbers(features, 'inner_diameter_mm') for features in (balflex_features, heizmann_features))
+    
+    @staticmethod
+    def _numbers(features: List[Dict], key: str) -> np.ndarray:
+        return np.array([np.nan if f[key] is None else f[key] for f in features], dtype=np.float64)
+    
+    @staticmethod
+    def _value_ids(features: List[Dict], key: str, examples: List[Dict]) -> np.ndarray:
+        """Id of each record's `key` value; one example record per new value is appended to `examples`"""
+        positions = {}
+        ids = []
+        for f in features:
+            if f[key] not in positions:
+                positions[f[key]] = len(examples)
+                examples.append(f)
+            ids.append(positions[f[key]])
+        return np.array(ids, dtype=np.int32)
+    
+    def _lookup_table(self, balflex_features: List[Dict], heizmann_features: List[Dict], key: str, points) -> Tuple:
+        """Value ids of both sides and a points table over the distinct values"""
+        examples_b, examples_h = [], []
+        ids_b = self._value_ids(balflex_features, key, examples_b)
+        ids_h = self._value_ids(heizmann_features, key, examples_h)
+        table = np.zeros((len(examples_b), len(examples_h)), dtype=np.int16)
+        for i, b in enumerate(examples_b):
+            for j, h in enumerate(examples_h):
+                table[i, j] = points(b, h)[0]
+        return ids_b, ids_h, table
+    
+    @staticmethod
+    def _tolerance_points(b: np.ndarray, h: np.ndarray, steps: List[Tuple[float, int]]) -> np.ndarray:
+        """Points by percentage difference, abs(b - h) / max(b, h) * 100 as in _score_features"""
+        with np.errstate(invalid='ignore'):
+            diff_percent = np.abs(b[:, None] - h[None, :]) / np.maximum(b[:, None], h[None, :]) * 100
+        points = np.zeros(diff_percent.shape, dtype=np.int16)
+        # Widest tolerance first, so the tighter ones overwrite it
+        for limit, value in reversed(steps):
+            points[diff_percent <= limit] = value
+        return points
+    
+    def tile_points(self, rows: slice) -> np.ndarray:
+        """Match points of Balflex rows `rows` against every Heizmann hose"""
+        dn_b = self.dn_b[rows][:, None]
+        dn_equal = (dn_b == self.dn_h[None, :]) & (dn_b >= 0)
+        dn_close = np.abs(self.dn_number_b[rows][:, None] - self.dn_number_h[None, :]) <= 2
+        points = np.where(dn_equal, 30, np.where(dn_close, 15, 0)).astype(np.int16)
+        
+        points += self._tolerance_points(self.pressure_b[rows], self.pressure_h, [(5, 25), (15, 15), (30, 8)])
+        points += self.standard_points[np.ix_(self.standard_b[rows], self.standard_h)]
+        points += self.construction_points[np.ix_(self.construction_b[rows], self.construction_h)]
+        points += self._tolerance_points(self.inner_b[rows], self.inner_h, [(5, 10), (15, 5)])
+        
+        # Incompatible constructions score 0
+        points *= self.compatible[np.ix_(self.family_b[rows], self.family_h)]
+        return points
+    
+    def top_indices(self, k: int = 1) -> Iterator[List[int]]:
+        """Heizmann indices with the most points per Balflex row, best first
+        
+        At most k per row, only those with points > 0; on equal points the
+        lower index comes first, like the pair loop's `score > best_score`.
+        """
+        if self.cols == 0:
+            yield from ([] for _ in range(self.rows))
+            return
+        
+        tile_rows = max(1, self.TILE_SIZE // self.cols)
+        for start in range(0, self.rows, tile_rows):
+            points = self.tile_points(slice(start, start + tile_rows))
+            
+            if k == 1:
+                # argmax returns the first maximum
+                best = points.argmax(axis=1)
+                for row, idx in enumerate(best):
+                    yield [int(idx)] if points[row, idx] > 0 else []
+                continue
+            
+            for row_points in points:
+                if k < self.cols:
+                    # Everything tied with the k-th best, then a stable sort by points
+                    kth = np.partition(row_points, self.cols - k)[self.cols - k]
+                    candidates = np.flatnonzero(row_points >= kth)
+                else:
+                    candidates = np.arange(self.cols)
+                ranked = candidates[np.argsort(-row_points[candidates], kind='stable')][:k]
+                yield [int(idx) for idx in ranked if row_points[idx] > 0]
+
 
 class ProductMatcher:
     """Match products from two suppliers based on specifications"""
     
+    # Candidate blocking: Heizmann hoses within this many DN steps are scored first
+    DN_NEIGHBOURHOOD = 2
+    # Best possible score without DN points (pressure 25 + standard 20 +
+    # construction 15 + inner diameter 10); hoses outside the DN candidates
+    # cannot score more, so a better candidate is the exhaustive answer
+    MAX_SCORE_WITHOUT_DN = 70
+    # Bump when scoring changes; stored match caches of other versions are not reused
+    SCORER_VERSION = '2'
+    
     def __init__(self, balflex_file: str, heizmann_file: str):
         self.balflex_products = self._load_json(balflex_file)
         self.heizmann_products = self._load_json(heizmann_file)
@@ -27,183 +193,339 @@ class ProductMatcher:
             print(f"Warning: {file_path} not found, returning empty list")
             return []
     
-    def match_products(self) -> List[Dict[str, Any]]:
-        """Find matching products between suppliers"""
+    def match_products(self, blocking: bool = True, engine: str = 'numpy', top_k: int = 1,
+                       one_to_one: bool = False, workers: int = 1,
+                       cache_file: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find matching products between suppliers
+        
+        engine='numpy' scores all pairs as tiles of N×M point matrices (see
+        HoseScoreMatrix). engine='python' scores pair by pair; with blocking,
+        each Balflex hose is then scored only against Heizmann hoses of a
+        compatible construction family in nearby DN buckets (see
+        _find_ranked_matches). All of them give the same matches.
+        
+        top_k > 1 keeps the k best Heizmann hoses per Balflex hose (above the
+        threshold) as consecutive rows with a 'rank' field, best first.
+        
+        one_to_one=True pairs every Heizmann hose with at most one Balflex
+        hose: the CANDIDATES_PER_PRODUCT best candidates of each Balflex hose
+        form a score graph, solved for the highest total score (see
+        scripts/assignment.py). A hose may then get a lower-ranked partner, or none.
+        
+        workers > 1 scores shards of the Balflex hoses in worker processes
+        that share the Heizmann side (see scripts/parallel_match.py); the
+        output is identical to a serial run.
+        
+        cache_file keeps each Balflex hose's candidates between runs; only
+        hoses affected by product changes are scored again (see
+        scripts/match_cache.py for the invalidation rules).
+        """
+        if one_to_one and top_k > 1:
+            raise ValueError("top_k and one_to_one cannot be combined")
         print("Starting product matching...")
         
-        for balflex in self.balflex_products:
-            best_match = None
-            best_score = 0
-            
-            for heizmann in self.heizmann_products:
-                score, reasons = self._calculate_match_score(balflex, heizmann)
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = heizmann
-                    best_reasons = reasons
-            
-            # Only include matches with score > 30% (reasonable threshold)
-            if best_match and best_score >= 30:
-                match = self._create_match_entry(balflex, best_match, best_score, best_reasons)
+        # Every product is parsed into a feature record once, not once per pair
+        balflex_features = [self._normalize(balflex) for balflex in self.balflex_products]
+        self.heizmann_features = [self._normalize(heizmann) for heizmann in self.heizmann_products]
+        self.comparisons = 0
+        
+        k = CANDIDATES_PER_PRODUCT if one_to_one else top_k
+        # Built once here, before any worker process starts
+        index = self._build_blocking_index() if engine == 'python' and blocking else None
+        
+        def rank_all(positions):
+            features = [balflex_features[pos] for pos in positions]
+            return self._rank_all(features, engine, index, k, workers)
+        
+        if cache_file:
+            cache = MatchCache(cache_file, f"ProductMatcher:{self.SCORER_VERSION}", k)
+            ranked_matches = cache.rank(
+                self.balflex_products, self.heizmann_products, rank_all,
+                lambda pos, indices: self._scan(balflex_features[pos], indices, {}, k).ranked()
+            )
+            cache.save()
+            print(cache.summary())
+        else:
+            ranked_matches = rank_all(range(len(balflex_features)))
+        
+        # Only include matches with score > 30% (reasonable threshold)
+        ranked_matches = [[entry for entry in ranked if entry[0] >= 30] for ranked in ranked_matches]
+        if one_to_one:
+            ranked_matches, assignment = assign_ranked(ranked_matches)
+            print(assignment.summary())
+        
+        for pos, (balflex, ranked) in enumerate(zip(self.balflex_products, ranked_matches)):
+            for rank, (score, idx, code) in enumerate(ranked, start=1):
+                # Reasons are written out only for the pairs in the output
+                reasons = self._explain(balflex_features[pos], self.heizmann_features[idx], code)
+                match = self._create_match_entry(balflex, self.heizmann_products[idx], score, reasons)
+                if top_k > 1:
+                    match['rank'] = rank
                 self.matches.append(match)
         
+        total_pairs = len(self.balflex_products) * len(self.heizmann_products)
+        print(f"Scored {self.comparisons} of {total_pairs} product pairs")
         print(f"Found {len(self.matches)} product matches")
         return self.matches
     
+    def _rank_all(self, balflex_features: List[Dict], engine: str, index: Optional[Dict], k: int,
+                  workers: int) -> List[List[Tuple]]:
+        """Ranked candidates of the given Balflex hoses against all Heizmann hoses"""
+        ranked_matches = []
+        shared = (self, balflex_features, engine, index, k)
+        for shard_ranked, comparisons in map_shards(_rank_hose_shard, shared, len(balflex_features), workers):
+            ranked_matches.extend(shard_ranked)
+            self.comparisons += comparisons
+        return ranked_matches
+    
+    def _ranked_matches_python(self, balflex_features: List[Dict], index: Optional[Dict], k: int) -> Iterator[List[Tuple]]:
+        """[(score, heizmann index, component code)] best first per Balflex hose, scored pair by pair
+        
+        With a blocking index only the candidate buckets are scored.
+        """
+        for features in balflex_features:
+            if index is not None:
+                top = self._find_ranked_matches(features, index, k)
+            else:
+                top = self._scan(features, range(len(self.heizmann_products)), {}, k)
+            yield top.ranked()
+    
+    def _ranked_matches_numpy(self, balflex_features: List[Dict], k: int) -> Iterator[List[Tuple]]:
+        """[(score, heizmann index, component code)] best first per Balflex hose from the vectorized point matrix
+        
+        Only the selected hoses of each row are scored again in Python, for
+        their exact score and component code.
+        """
+        matrix = HoseScoreMatrix(self, balflex_features, self.heizmann_features)
+        self.comparisons += len(balflex_features) * len(self.heizmann_features)
+        
+        for features, indices in zip(balflex_features, matrix.top_indices(k)):
+            ranked = []
+            for idx in indices:
+                score, code = self._score_features(features, self.heizmann_features[idx])
+                ranked.append((score, idx, code))
+            yield ranked
+    
+    def _scan(self, features: Dict, indices, scores: Dict, k: int = 1) -> TopK:
+        """k best Heizmann hoses among `indices` (ascending) for a Balflex feature record
+        
+        Only scores > 0 are kept and the first hose wins ties, so with k=1
+        this is the `score > best_score` loop. `scores` holds already computed
+        (score, component code) by index and is filled in.
+        """
+        top = TopK(k)
+        
+        for idx in indices:
+            if idx not in scores:
+                scores[idx] = self._score_features(features, self.heizmann_features[idx])
+                self.comparisons += 1
+            score, code = scores[idx]
+            
+            if score > 0:
+                top.push(score, idx, code)
+        
+        return top
+    
+    @staticmethod
+    def _construction_family(product: Dict) -> Tuple[bool, bool, bool]:
+        """(textile, wire, spiral) flags the construction pre-check looks at; None if unknown"""
+        construction = product.get('construction', '').lower()
+        if not construction:
+            return None
+        return ('textile' in construction, 'wire' in construction, 'spiral' in construction)
+    
+    @staticmethod
+    def _families_compatible(balflex_family, heizmann_family) -> bool:
+        """Same rules as the pre-check in _calculate_match_score"""
+        if balflex_family is None or heizmann_family is None:
+            return True
+        b_textile, b_wire, b_spiral = balflex_family
+        h_textile, h_wire, h_spiral = heizmann_family
+        if (b_textile and h_wire) or (b_wire and h_textile):
+            return False
+        return b_spiral == h_spiral
+    
+    @staticmethod
+    def _dn_number(product: Dict) -> Optional[int]:
+        """DN as a number for bucketing; None when missing or not a plain DN number"""
+        if not product.get('dn'):
+            return None
+        try:
+            return int(product['dn'].replace('DN', ''))
+        except ValueError:
+            return None
+    
+    def _build_blocking_index(self) -> Dict:
+        """Heizmann hose indices by construction family, then by DN number
+        
+        Hoses without a usable DN are kept apart and are always candidates.
+        """
+        index = defaultdict(lambda: {'by_dn': defaultdict(list), 'no_dn': [], 'all': []})
+        
+        for idx, heizmann in enumerate(self.heizmann_features):
+            bucket = index[heizmann['family']]
+            dn = heizmann['dn_number']
+            if dn is None:
+                bucket['no_dn'].append(idx)
+            else:
+                bucket['by_dn'][dn].append(idx)
+            bucket['all'].append(idx)
+        
+        return dict(index)
+    
+    def _find_ranked_matches(self, features: Dict, index: Dict, k: int = 1) -> TopK:
+        """k best matches from the candidate buckets, widened to the full scan only when needed
+        
+        Incompatible construction families always score 0, so they are never
+        scored. Within compatible families, a hose more than DN_NEIGHBOURHOOD
+        steps away gets no DN points and scores at most MAX_SCORE_WITHOUT_DN;
+        if the k-th best candidate scores more than that, no other hose can
+        beat or tie it. Otherwise every compatible hose is scanned.
+        """
+        family = features['family']
+        buckets = [bucket for heizmann_family, bucket in index.items()
+                   if self._families_compatible(family, heizmann_family)]
+        compatible = sorted(idx for bucket in buckets for idx in bucket['all'])
+        
+        dn = features['dn_number']
+        if dn is None:
+            # No DN points for anyone: every compatible hose is a candidate
+            return self._scan(features, compatible, {}, k)
+        
+        candidates = []
+        for bucket in buckets:
+            candidates.extend(bucket['no_dn'])
+            for near_dn in range(dn - self.DN_NEIGHBOURHOOD, dn + self.DN_NEIGHBOURHOOD + 1):
+                candidates.extend(bucket['by_dn'].get(near_dn, []))
+        
+        scores = {}
+        top = self._scan(features, sorted(candidates), scores, k)
+        if top.full() and top.min_score() > self.MAX_SCORE_WITHOUT_DN:
+            return top
+        
+        # Scores already computed for the candidates are reused
+        return self._scan(features, compatible, scores, k)
+    
+    def _normalize(self, product: Dict) -> Dict:
+        """Feature record used by the scorer, built once per product
+        
+        Keeps the raw values the match reasons print (DN string, construction)
+        next to the parsed ones, so scoring a pair does no string parsing.
+        """
+        # Pressure in MPa (Balflex uses MPa, Heizmann uses bar; 1 MPa = 10 bar)
+        pressure = product.get('working_pressure_mpa') or product.get('working_pressure_bar')
+        if pressure and 'working_pressure_bar' in product:
+            pressure = pressure / 10.0
+        
+        standard = product.get('standard', '').upper()
+        en_match = EN_NUMBER_PATTERN.search(standard)
+        sae_match = SAE_NUMBER_PATTERN.search(standard)
+        
+        construction = product.get('construction', '').lower()
+        
+        return {
+            'dn': product.get('dn') or '',
+            'dn_number': self._dn_number(product),
+            'pressure_mpa': pressure or None,
+            'standard': standard,
+            'en_number': en_match.group(1) if en_match else None,
+            'sae_number': sae_match.group(1) if sae_match else None,
+            'standard_code': self._extract_standard_code(standard) if standard else '',
+            'construction': construction,
+            'family': self._construction_family(product),
+            'one_wire': '1 wire' in construction,
+            'two_wire': '2 wire' in construction,
+            'inner_diameter_mm': product.get('inner_diameter_mm') or None,
+        }
+    
     def _calculate_match_score(self, balflex: Dict, heizmann: Dict) -> Tuple[float, List[str]]:
         """
         Calculate match score (0-100) based on multiple criteria
         Returns: (score, list of matching reasons)
         """
+        balflex_features, heizmann_features = self._normalize(balflex), self._normalize(heizmann)
+        score, code = self._score_features(balflex_features, heizmann_features)
+        return score, self._explain(balflex_features, heizmann_features, code)
+    
+    def _score_features(self, balflex: Dict, heizmann: Dict) -> Tuple[float, int]:
+        """_calculate_match_score on two feature records (see _normalize)
+        
+        Returns (score, component code): which rule of each component fired,
+        packed into an int. Reasons are only written out for the pairs that
+        make it into the output (see _explain).
+        """
         score = 0
         max_score = 0
-        reasons = []
+        code = 0
         
         # CRITICAL PRE-CHECK: Construction type compatibility
         # Textile hoses CANNOT match with steel wire hoses!
-        balflex_const = balflex.get('construction', '').lower()
-        heizmann_const = heizmann.get('construction', '').lower()
+        balflex_family = balflex['family']
+        heizmann_family = heizmann['family']
         
         # Reject incompatible construction types
-        if balflex_const and heizmann_const:
+        if balflex_family and heizmann_family:
             # Textile vs Wire = INCOMPATIBLE
-            if ('textile' in balflex_const and 'wire' in heizmann_const):
-                return 0, ["Construction mismatch: textile vs wire - INCOMPATIBLE"]
+            if balflex_family[0] and heizmann_family[1]:
+                return 0, 1 << REJECT_SHIFT
             
-            if ('wire' in balflex_const and 'textile' in heizmann_const):
-                return 0, ["Construction mismatch: wire vs textile - INCOMPATIBLE"]
+            if balflex_family[1] and heizmann_family[0]:
+                return 0, 2 << REJECT_SHIFT
             
             # Spiral vs non-spiral should be very low match
-            if ('spiral' in balflex_const) != ('spiral' in heizmann_const):
-                return 0, ["Construction mismatch: spiral vs non-spiral - INCOMPATIBLE"]
+            if balflex_family[2] != heizmann_family[2]:
+                return 0, 3 << REJECT_SHIFT
         
         # 1. DN (Nominal Diameter) - Most important (30 points)
         max_score += 30
-        if balflex.get('dn') and heizmann.get('dn'):
+        if balflex['dn'] and heizmann['dn']:
             if balflex['dn'] == heizmann['dn']:
                 score += 30
-                reasons.append(f"DN match: {balflex['dn']}")
+                code |= 1 << DN_SHIFT
             # Partial match if DN numbers are close
-            else:
-                balflex_dn = int(balflex['dn'].replace('DN', ''))
-                heizmann_dn = int(heizmann['dn'].replace('DN', ''))
-                if abs(balflex_dn - heizmann_dn) <= 2:
+            elif balflex['dn_number'] is not None and heizmann['dn_number'] is not None:
+                if abs(balflex['dn_number'] - heizmann['dn_number']) <= 2:
                     score += 15
-                    reasons.append(f"DN close: {balflex['dn']} ≈ {heizmann['dn']}")
+                    code |= 2 << DN_SHIFT
         
         # 2. Working Pressure (25 points)
         max_score += 25
-        balflex_pressure = balflex.get('working_pressure_mpa') or balflex.get('working_pressure_bar')
-        heizmann_pressure = heizmann.get('working_pressure_mpa') or heizmann.get('working_pressure_bar')
-        
-        if balflex_pressure and heizmann_pressure:
-            # Convert both to MPa for comparison
-            # Balflex uses MPa, Heizmann uses bar
-            # 1 MPa = 10 bar
-            if 'working_pressure_bar' in balflex:
-                balflex_pressure_mpa = balflex_pressure / 10.0
-            else:
-                balflex_pressure_mpa = balflex_pressure
-            
-            if 'working_pressure_bar' in heizmann:
-                heizmann_pressure_mpa = heizmann_pressure / 10.0
-            else:
-                heizmann_pressure_mpa = heizmann_pressure
-            
+        balflex_pressure_mpa = balflex['pressure_mpa']
+        heizmann_pressure_mpa = heizmann['pressure_mpa']
+        
+        if balflex_pressure_mpa and heizmann_pressure_mpa:
             pressure_diff_percent = abs(balflex_pressure_mpa - heizmann_pressure_mpa) / max(balflex_pressure_mpa, heizmann_pressure_mpa) * 100
             
             if pressure_diff_percent <= 5:
                 score += 25
-                reasons.append(f"Pressure match: {balflex_pressure_mpa:.1f} MPa ≈ {heizmann_pressure_mpa:.1f} MPa")
+                code |= 1 << PRESSURE_SHIFT
             elif pressure_diff_percent <= 15:
                 score += 15
-                reasons.append(f"Pressure similar: {balflex_pressure_mpa:.1f} MPa ≈ {heizmann_pressure_mpa:.1f} MPa")
+                code |= 2 << PRESSURE_SHIFT
             elif pressure_diff_percent <= 30:
                 score += 8
         
         # 3. Standard/Norm (20 points) - FIXED: Compare EN numbers precisely
         max_score += 20
-        balflex_std = balflex.get('standard', '').upper()
-        heizmann_std = heizmann.get('standard', '').upper()
-        
-        if balflex_std and heizmann_std:
-            # Extract EN standard numbers (853, 854, 856, 857)
-            # EN 853 = Steel wire braid (1SN, 2SN)
-            # EN 854 = Textile braid (1TE, 2TE, 3TE)
-            # EN 856 = Spiral wire
-            # EN 857 = Compact steel wire (1SC, 2SC)
-            balflex_en_num = re.search(r'EN\s*(\d{3})', balflex_std)
-            heizmann_en_num = re.search(r'EN\s*(\d{3})', heizmann_std)
-            
-            # Extract SAE numbers (R1, R2, R3, etc.)
-            balflex_sae = re.search(r'SAE\s*\d+R(\d+)', balflex_std)
-            heizmann_sae = re.search(r'SAE\s*\d+R(\d+)', heizmann_std)
-            
-            matched = False
-            
-            # Compare EN numbers precisely
-            if balflex_en_num and heizmann_en_num:
-                balflex_num = balflex_en_num.group(1)  # "857"
-                heizmann_num = heizmann_en_num.group(1)  # "854"
-                
-                if balflex_num == heizmann_num:
-                    score += 20
-                    reasons.append(f"Standard match: EN {balflex_num}")
-                    matched = True
-                # EN 853 and EN 857 are both steel wire (some compatibility)
-                elif (balflex_num in ['853', '857'] and heizmann_num in ['853', '857']):
-                    score += 10
-                    reasons.append(f"Standard compatible: EN {balflex_num} / EN {heizmann_num}")
-                    matched = True
-            
-            # Compare SAE numbers precisely
-            elif balflex_sae and heizmann_sae:
-                balflex_sae_num = balflex_sae.group(1)
-                heizmann_sae_num = heizmann_sae.group(1)
-                
-                if balflex_sae_num == heizmann_sae_num:
-                    score += 20
-                    reasons.append(f"Standard match: SAE 100R{balflex_sae_num}")
-                    matched = True
-            
-            # Fallback: old method for other standards
-            if not matched:
-                balflex_std_clean = self._extract_standard_code(balflex_std)
-                heizmann_std_clean = self._extract_standard_code(heizmann_std)
-                
-                if balflex_std_clean == heizmann_std_clean:
-                    score += 20
-                    reasons.append(f"Standard match: {balflex_std_clean}")
-                elif balflex_std_clean in heizmann_std_clean or heizmann_std_clean in balflex_std_clean:
-                    score += 10
-                    reasons.append(f"Standard similar: {balflex_std_clean} / {heizmann_std_clean}")
+        points, component = self._standard_points(balflex, heizmann)
+        score += points
+        code |= component << STANDARD_SHIFT
         
         # 4. Construction type (15 points)
         max_score += 15
-        balflex_const = balflex.get('construction', '').lower()
-        heizmann_const = heizmann.get('construction', '').lower()
-        
-        if balflex_const and heizmann_const:
-            # Check wire braid count
-            if balflex_const == heizmann_const:
-                score += 15
-                reasons.append(f"Construction match: {balflex_const}")
-            elif ('1 wire' in balflex_const and '1 wire' in heizmann_const) or \
-                 ('2 wire' in balflex_const and '2 wire' in heizmann_const) or \
-                 ('spiral' in balflex_const and 'spiral' in heizmann_const):
-                score += 12
-                reasons.append(f"Construction similar")
+        points, component = self._construction_points(balflex, heizmann)
+        score += points
+        code |= component << CONSTRUCTION_SHIFT
         
         # 5. Inner Diameter (10 points)
         max_score += 10
-        if balflex.get('inner_diameter_mm') and heizmann.get('inner_diameter_mm'):
+        if balflex['inner_diameter_mm'] and heizmann['inner_diameter_mm']:
             dia_diff_percent = abs(balflex['inner_diameter_mm'] - heizmann['inner_diameter_mm']) / \
                               max(balflex['inner_diameter_mm'], heizmann['inner_diameter_mm']) * 100
             
             if dia_diff_percent <= 5:
                 score += 10
-                reasons.append(f"Inner diameter match")
+                code |= 1 << INNER_SHIFT
             elif dia_diff_percent <= 15:
                 score += 5
         
@@ -213,21 +535,109 @@ class ProductMatcher:
         else:
             normalized_score = 0
         
-        return normalized_score, reasons
+        return normalized_score, code
+    
+    def _explain(self, balflex: Dict, heizmann: Dict, code: int) -> List[str]:
+        """Match reasons of two feature records from their _score_features component code"""
+        reject = (code >> REJECT_SHIFT) & 3
+        if reject:
+            return [REJECT_REASONS[reject]]
+        
+        reasons = []
+        dn = (code >> DN_SHIFT) & 3
+        if dn == 1:
+            reasons.append(f"DN match: {balflex['dn']}")
+        elif dn == 2:
+            reasons.append(f"DN close: {balflex['dn']} ≈ {heizmann['dn']}")
+        
+        pressure = (code >> PRESSURE_SHIFT) & 3
+        if pressure:
+            label = "Pressure match" if pressure == 1 else "Pressure similar"
+            reasons.append(f"{label}: {balflex['pressure_mpa']:.1f} MPa ≈ {heizmann['pressure_mpa']:.1f} MPa")
+        
+        standard = (code >> STANDARD_SHIFT) & 7
+        if standard == STANDARD_EN_MATCH:
+            reasons.append(f"Standard match: EN {balflex['en_number']}")
+        elif standard == STANDARD_EN_COMPATIBLE:
+            reasons.append(f"Standard compatible: EN {balflex['en_number']} / EN {heizmann['en_number']}")
+        elif standard == STANDARD_SAE_MATCH:
+            reasons.append(f"Standard match: SAE 100R{balflex['sae_number']}")
+        elif standard == STANDARD_CODE_MATCH:
+            reasons.append(f"Standard match: {balflex['standard_code']}")
+        elif standard == STANDARD_CODE_SIMILAR:
+            reasons.append(f"Standard similar: {balflex['standard_code']} / {heizmann['standard_code']}")
+        
+        construction = (code >> CONSTRUCTION_SHIFT) & 3
+        if construction == 1:
+            reasons.append(f"Construction match: {balflex['construction']}")
+        elif construction == 2:
+            reasons.append("Construction similar")
+        
+        if (code >> INNER_SHIFT) & 3 == 1:
+            reasons.append("Inner diameter match")
+        
+        return reasons
+    
+    @staticmethod
+    def _standard_points(balflex: Dict, heizmann: Dict) -> Tuple[int, int]:
+        """Standard/norm points (0-20) and component code (STANDARD_*) of two feature records"""
+        if not (balflex['standard'] and heizmann['standard']):
+            return 0, 0
+        
+        # EN standard numbers (853, 854, 856, 857)
+        # EN 853 = Steel wire braid (1SN, 2SN)
+        # EN 854 = Textile braid (1TE, 2TE, 3TE)
+        # EN 856 = Spiral wire
+        # EN 857 = Compact steel wire (1SC, 2SC)
+        balflex_num = balflex['en_number']
+        heizmann_num = heizmann['en_number']
+        
+        # Compare EN numbers precisely
+        if balflex_num and heizmann_num:
+            if balflex_num == heizmann_num:
+                return 20, STANDARD_EN_MATCH
+            # EN 853 and EN 857 are both steel wire (some compatibility)
+            elif (balflex_num in ['853', '857'] and heizmann_num in ['853', '857']):
+                return 10, STANDARD_EN_COMPATIBLE
+        
+        # Compare SAE numbers (R1, R2, R3, etc.) precisely
+        elif balflex['sae_number'] and heizmann['sae_number']:
+            if balflex['sae_number'] == heizmann['sae_number']:
+                return 20, STANDARD_SAE_MATCH
+        
+        # Fallback: old method for other standards
+        balflex_std_clean = balflex['standard_code']
+        heizmann_std_clean = heizmann['standard_code']
+        
+        if balflex_std_clean == heizmann_std_clean:
+            return 20, STANDARD_CODE_MATCH
+        elif balflex_std_clean in heizmann_std_clean or heizmann_std_clean in balflex_std_clean:
+            return 10, STANDARD_CODE_SIMILAR
+        return 0, 0
+    
+    @staticmethod
+    def _construction_points(balflex: Dict, heizmann: Dict) -> Tuple[int, int]:
+        """Construction points (0-15) and component code (1 match, 2 similar) of two feature records"""
+        balflex_const = balflex['construction']
+        heizmann_const = heizmann['construction']
+        
+        if not (balflex_const and heizmann_const):
+            return 0, 0
+        
+        # Check wire braid count
+        if balflex_const == heizmann_const:
+            return 15, 1
+        elif (balflex['one_wire'] and heizmann['one_wire']) or \
+             (balflex['two_wire'] and heizmann['two_wire']) or \
+             (balflex['family'][2] and heizmann['family'][2]):
+            return 12, 2
+        return 0, 0
     
     def _extract_standard_code(self, standard: str) -> str:
         """Extract clean standard code (e.g., 'DIN EN 857' from 'DIN EN 857 2SC')"""
-        import re
         # Extract DIN EN XXX or SAE XXXRXX patterns
-        patterns = [
-            r'DIN\s*EN\s*\d+',
-            r'SAE\s*\d+R\d+',
-            r'EN\s*\d+',
-            r'ISO\s*\d+',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, standard, re.IGNORECASE)
+        for pattern in STANDARD_CODE_PATTERNS:
+            match = pattern.search(standard)
             if match:
                 return match.group(0).replace(' ', '')
         
@@ -286,8 +696,30 @@ class ProductMatcher:
         print(f"Saved {len(self.matches)} matches to {output_file}")
 
 
+def _rank_hose_shard(shared: tuple, start: int, stop: int) -> Tuple[List, int]:
+    """Worker: ranked candidates of Balflex hoses start..stop-1 and the pairs scored for them"""
+    matcher, balflex_features, engine, index, k = shared
+    features = balflex_features[start:stop]
+    # The count is handed back and the counter restored, as a serial run
+    # calls this in the parent process itself
+    before = matcher.comparisons
+    if engine == 'numpy':
+        ranked = list(matcher._ranked_matches_numpy(features, k))
+    else:
+        ranked = list(matcher._ranked_matches_python(features, index, k))
+    comparisons, matcher.comparisons = matcher.comparisons - before, before
+    return ranked, comparisons
+
+
 def main():
-    """Test the matcher"""
+    """Test the matcher
+    
+    Usage: python product_matcher.py [top_k] [--one-to-one]
+    """
+    arguments = sys.argv[1:]
+    one_to_one = '--one-to-one' in arguments
+    numbers = [arg for arg in arguments if arg.isdigit()]
+    top_k = int(numbers[0]) if numbers else 1
     data_dir = Path(__file__).parent.parent / 'data'
     balflex_file = data_dir / 'balflex_products.json'
     heizmann_file = data_dir / 'heizmann_products.json'
@@ -304,7 +736,8 @@ def main():
         return
     
     matcher = ProductMatcher(str(balflex_file), str(heizmann_file))
-    matches = matcher.match_products()
+    matches = matcher.match_products(top_k=top_k, one_to_one=one_to_one,
+                                     cache_file=str(data_dir / 'product_matches.cache.json'))
     matcher.save_to_json(str(output_file))
     
     # Show summary
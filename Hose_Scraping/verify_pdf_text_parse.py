@@ -0,0 +1,51 @@
+"""Check: BalflexParser gives the same model/standard per row from the PDF and from the text dump
+
+Run from Hose_Scraping/:  python verify_pdf_text_parse.py [catalog.pdf] [catalog.txt]
+Rows are paired by article number; every paired row must carry the same
+model and standard whichever source it was parsed from.
+"""
+import sys
+from pathlib import Path
+
+from scripts.balflex_parser import BalflexParser
+
+
+FIELDS = ('model', 'standard', 'construction', 'category')
+
+
+def main():
+    pdf_file = sys.argv[1] if len(sys.argv) > 1 else 'data/BALFLEX-HOSES-CATALOGUE_HOSECAT.E.01.2023.pdf'
+    text_file = sys.argv[2] if len(sys.argv) > 2 else 'data/balflex_catalog.txt'
+
+    for catalog_file in (pdf_file, text_file):
+        if not Path(catalog_file).exists():
+            print(f"Error: {catalog_file} not found!")
+            sys.exit(1)
+
+    text_rows = {}
+    for product in BalflexParser(text_file).iter_products():
+        text_rows.setdefault(product['article_number'], product)
+
+    pdf_rows = {}
+    for product in BalflexParser(pdf_file).iter_products():
+        pdf_rows.setdefault(product['article_number'], product)
+
+    paired = [number for number in text_rows if number in pdf_rows]
+    print(f"Rows: {len(text_rows)} from {text_file}, {len(pdf_rows)} from {pdf_file}, {len(paired)} paired")
+
+    mismatches = [
+        (number, field, text_rows[number][field], pdf_rows[number][field])
+        for number in paired for field in FIELDS
+        if text_rows[number][field] != pdf_rows[number][field]
+    ]
+    for number, field, text_value, pdf_value in mismatches[:10]:
+        print(f"  ✗ {number} {field}: {text_value!r} (text) vs {pdf_value!r} (PDF)")
+
+    if not paired or mismatches:
+        print(f"✗ {len(mismatches)} differing values")
+        sys.exit(1)
+    print("✓ Same model/standard for every paired row")
+
+
+if __name__ == "__main__":
+    main()
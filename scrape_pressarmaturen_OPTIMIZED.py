@@ -4,6 +4,18 @@ from selenium.webdriver.common.by import By
 from bs4 import BeautifulSoup
 import time
 import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / 'scripts'))
+from refresh_scheduler import RefreshScheduler, merge_with_output
+from crawl_resilience import ResilientCrawl
+
+# Refresh modu: sayfa bütçesi verilirse sadece en eski/en sık değişen ürün sayfaları çekilir
+# (None = tam tarama)
+REFRESH_BUDGET = None
+REFRESH_STATE = 'data/pressarmaturen_refresh_state.json'
+OUTPUT_FILE = 'data/pressarmaturen_serie_x_FULL_SELENIUM.json'
 
 # Selenium driver - global (bir kere aç, hep kullan)
 chrome_options = Options()
@@ -13,6 +25,8 @@ chrome_options.add_argument('--no-sandbox')
 chrome_options.add_argument('--window-size=1920,1080')
 
 driver = webdriver.Chrome(options=chrome_options)
+# Takılan sayfa tüm taramayı durdurmasın (varsayılan 300 sn)
+driver.set_page_load_timeout(15)
 
 def scrape_category_links(category_url):
     """Selenium ile 'Mehr anzeigen' butonuna tıklayarak tüm ürün linklerini çek"""
@@ -52,8 +66,11 @@ def scrape_category_links(category_url):
     return list(product_links)
 
 
-def scrape_product_details(product_url):
-    """Selenium ile ürün detaylarını çek - ÖZELLİKLER + VARYANTLAR"""
+def scrape_product_details(product_url, raise_errors=False):
+    """Selenium ile ürün detaylarını çek - ÖZELLİKLER + VARYANTLAR
+
+    raise_errors=True: hata yutulmaz, circuit breaker / retry kuyruğu görebilsin diye tekrar fırlatılır
+    """
     
     try:
         driver.get(product_url)
@@ -166,6 +183,8 @@ def scrape_product_details(product_url):
         return products
         
     except Exception as e:
+        if raise_errors:
+            raise
         print(f" ✗ HATA: {str(e)[:30]}")
         return []
 
@@ -195,43 +214,95 @@ print("="*80)
 print()
 
 all_products = []
+scheduler = RefreshScheduler(REFRESH_STATE) if REFRESH_BUDGET is not None else None
+
+# Art arda hatalarda host'u beklet, hatalı sayfaları sonda backoff ile tekrar dene
+resilience = ResilientCrawl()
 
 try:
-    for cat_name, cat_url in subcategories:
-        print(f"\n{'='*80}")
-        print(f"KATEGORİ: {cat_name}")
-        print(f"{'='*80}")
-        
-        # 1. Ürün linklerini çek
-        print("1. Ürün linkleri çekiliyor...")
-        product_urls = scrape_category_links(cat_url)
-        print(f"   ✓ {len(product_urls)} ürün bulundu")
-        
-        # 2. Her ürünün detaylarını çek
-        print("2. Ürün detayları çekiliyor...")
-        for i, url in enumerate(product_urls, 1):
-            product_name = url.split('/')[-1]
-            print(f"   [{i}/{len(product_urls)}] {product_name}", end='', flush=True)
+    if scheduler:
+        # 1. Tüm kategorilerden linkleri topla, 2. bütçe dahilinde en eski sayfaları çek
+        candidates = []
+        for cat_name, cat_url in subcategories:
+            product_urls = scrape_category_links(cat_url)
+            candidates.extend(product_urls)
+            print(f"{cat_name}: {len(product_urls)} ürün")
+        
+        plan = scheduler.plan(candidates, budget=REFRESH_BUDGET)
+        print(f"\nRefresh planı: {len(plan)} / {len(candidates)} sayfa")
+        refreshed = []
+        
+        for i, url in enumerate(plan, 1):
+            print(f"   [{i}/{len(plan)}] {url.split('/')[-1]}", end='', flush=True)
+            ok, products = resilience.fetch(url, scrape_product_details, url, True)
+            if not ok:
+                print(" ✗ HATA - sonra tekrar denenecek")
+                continue
+            scheduler.record(url, products)
+            refreshed.append(url)
+            print(f" ✓ {len(products)} variant" if products else " ✗ Tablo yok")
+            all_products.extend(products)
+            time.sleep(0.3)
+        
+        def on_retry_result(args, products):
+            scheduler.record(args[0], products)
+            refreshed.append(args[0])
+            all_products.extend(products)
+            print(f"   ✓ Kurtarıldı: {args[0].split('/')[-1]} ({len(products)} variant)")
+        
+        resilience.retry_deferred(scrape_product_details, on_retry_result)
+        scheduler.save()
+        
+        # Planda olmayan sayfaların ürünlerini önceki dosyadan koru
+        all_products = merge_with_output(OUTPUT_FILE, all_products, refreshed, url_key='url')
+    
+    else:
+        for cat_name, cat_url in subcategories:
+            print(f"\n{'='*80}")
+            print(f"KATEGORİ: {cat_name}")
+            print(f"{'='*80}")
+        
+            # 1. Ürün linklerini çek
+            print("1. Ürün linkleri çekiliyor...")
+            product_urls = scrape_category_links(cat_url)
+            print(f"   ✓ {len(product_urls)} ürün bulundu")
+        
+            # 2. Her ürünün detaylarını çek
+            print("2. Ürün detayları çekiliyor...")
+            for i, url in enumerate(product_urls, 1):
+                product_name = url.split('/')[-1]
+                print(f"   [{i}/{len(product_urls)}] {product_name}", end='', flush=True)
             
-            products = scrape_product_details(url)
+                ok, products = resilience.fetch(url, scrape_product_details, url, True)
             
-            if products:
-                print(f" ✓ {len(products)} variant")
-                all_products.extend(products)
-            else:
-                print(f" ✗ Tablo yok")
+                if not ok:
+                    print(f" ✗ HATA - sonra tekrar denenecek")
+                elif products:
+                    print(f" ✓ {len(products)} variant")
+                    all_products.extend(products)
+                else:
+                    print(f" ✗ Tablo yok")
             
-            time.sleep(0.3)  # Rate limiting
+                time.sleep(0.3)  # Rate limiting
+
+        # Hatalı sayfaları backoff ile tekrar dene
+        def on_retry_result(args, products):
+            all_products.extend(products)
+            print(f"   ✓ Kurtarıldı: {args[0].split('/')[-1]} ({len(products)} variant)")
+        
+        resilience.retry_deferred(scrape_product_details, on_retry_result)
 
     print(f"\n\n{'='*80}")
     print(f"TOPLAM: {len(all_products)} ürün variant")
+    for line in resilience.summary():
+        print(line)
     print(f"{'='*80}")
 
     # Kaydet
-    with open('data/pressarmaturen_serie_x_FULL_SELENIUM.json', 'w', encoding='utf-8') as f:
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_products, f, ensure_ascii=False, indent=2)
 
-    print(f"\n✓ Kaydedildi: data/pressarmaturen_serie_x_FULL_SELENIUM.json")
+    print(f"\n✓ Kaydedildi: {OUTPUT_FILE}")
 
     # Sample
     if all_products:
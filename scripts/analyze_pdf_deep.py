@@ -1,5 +1,6 @@
 import pdfplumber
 import re
+from pdf_layout import PageLayout
 
 pdf_path = r'data/BALFLEX-HYDRAULIC-FITTINGS_HYFITCAT.012023 (1).pdf'
 
@@ -11,13 +12,15 @@ with pdfplumber.open(pdf_path) as pdf:
     
     for page_num in range(len(pdf.pages)):
         page = pdf.pages[page_num]
-        text = page.extract_text() or ""
+        # Text and tables from one pass over the page's characters
+        layout = PageLayout(page)
+        text = layout.text or ""
         
         # Look for article numbers
         article_matches = re.findall(r'20\.\d{3}\.\d{2}[A-Z]?', text)
         
         # Look for tables
-        tables = page.extract_tables()
+        tables = layout.tables
         
         if article_matches or tables:
             product_pages.append({
@@ -46,8 +49,9 @@ with pdfplumber.open(pdf_path) as pdf:
     for page_idx in [19, 20, 50, 80]:  # Pages 20, 21, 51, 81
         if page_idx < len(pdf.pages):
             page = pdf.pages[page_idx]
-            text = page.extract_text() or ""
-            tables = page.extract_tables()
+            layout = PageLayout(page)
+            text = layout.text or ""
+            tables = layout.tables
             
             print(f"\n--- Page {page_idx + 1} ---")
             
@@ -0,0 +1,196 @@
+"""
+One-to-one Assignment - globally consistent pairs from sparse candidate scores
+Each matcher's candidate generator gives a few scored partners per product; the
+candidates form a bipartite score graph, and a maximum-weight matching on it
+uses every partner at most once instead of letting many products pick the same one
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+
+
+# Candidates per product that make up the score graph
+CANDIDATES_PER_PRODUCT = 10
+# Components up to this many left x right cells are solved exactly (Hungarian),
+# larger ones greedily
+EXACT_CELLS = 250_000
+
+Edge = Tuple[Hashable, Hashable, float]
+
+
+def connected_components(edges: List[Edge]) -> List[List[Edge]]:
+    """Edges grouped by connected component (union-find), in first-seen order"""
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for left, right, _ in edges:
+        for node in (('L', left), ('R', right)):
+            parent.setdefault(node, node)
+        root_left, root_right = find(('L', left)), find(('R', right))
+        if root_left != root_right:
+            parent[root_right] = root_left
+
+    components = defaultdict(list)
+    for edge in edges:
+        components[find(('L', edge[0]))].append(edge)
+    return list(components.values())
+
+
+def hungarian(weights: np.ndarray) -> List[Tuple[int, int]]:
+    """(row, col) pairs of a maximum-weight matching of a dense weight matrix
+
+    Shortest augmenting path Hungarian algorithm, O(n² m) with the inner loop
+    over columns in numpy. Cells <= 0 count as "no edge": such pairs are left
+    out of the result, so rows may stay unmatched.
+    """
+    transposed = weights.shape[0] > weights.shape[1]
+    if transposed:
+        weights = weights.T
+    n, m = weights.shape
+    # Minimise cost = -weight; missing edges cost 0 like leaving the row unmatched
+    cost = -np.maximum(weights, 0).astype(float)
+
+    # 1-based potentials; column 0 is the virtual start column
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+
+    for row in range(1, n + 1):
+        row_of[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[col] = True
+            current_row = row_of[col]
+            free = ~used[1:]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_col = int(candidates.argmin()) + 1
+            delta = candidates[next_col - 1]
+
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][free] -= delta
+
+            col = next_col
+            if row_of[col] == 0:
+                break
+
+        # Flip the augmenting path
+        while col:
+            previous = way[col]
+            row_of[col] = row_of[previous]
+            col = previous
+
+    pairs = []
+    for col in range(1, m + 1):
+        row = row_of[col]
+        if row and weights[row - 1, col - 1] > 0:
+            pairs.append((col - 1, row - 1) if transposed else (row - 1, col - 1))
+    return sorted(pairs)
+
+
+def greedy_matching(edges: List[Edge]) -> List[Edge]:
+    """Highest scores first, skipping taken nodes
+
+    At least half the weight of the optimum: every optimal edge left out
+    touches a chosen edge of at least its own score.
+    """
+    taken_left, taken_right = set(), set()
+    chosen = []
+    # Stable sort: equal scores keep the edge order
+    for edge in sorted(edges, key=lambda edge: -edge[2]):
+        left, right, _ = edge
+        if left not in taken_left and right not in taken_right:
+            taken_left.add(left)
+            taken_right.add(right)
+            chosen.append(edge)
+    return chosen
+
+
+class Assignment:
+    """Maximum-weight one-to-one matching of a sparse bipartite score graph
+
+    edges: (left, right, score), score > 0; a repeated (left, right) keeps the
+    highest score. Every connected component is solved on its own: exactly
+    when it has at most `exact_cells` left x right cells, greedily otherwise.
+    """
+
+    def __init__(self, edges: Iterable[Edge], exact_cells: int = EXACT_CELLS):
+        best = {}
+        for left, right, score in edges:
+            if score > 0 and score > best.get((left, right), 0):
+                best[(left, right)] = score
+        edges = [(left, right, score) for (left, right), score in best.items()]
+
+        self.exact_components = 0
+        self.greedy_components = 0
+        self.pairs = []
+        for component in connected_components(edges):
+            self.pairs.extend(self._solve(component, exact_cells))
+        self.right_of = {left: right for left, right, _ in self.pairs}
+
+    def _solve(self, edges: List[Edge], exact_cells: int) -> List[Edge]:
+        lefts = list(dict.fromkeys(left for left, _, _ in edges))
+        rights = list(dict.fromkeys(right for _, right, _ in edges))
+
+        if len(lefts) * len(rights) > exact_cells:
+            self.greedy_components += 1
+            return greedy_matching(edges)
+
+        self.exact_components += 1
+        if len(lefts) == 1 or len(rights) == 1:
+            # A star: the greedy pick is the optimum
+            return greedy_matching(edges)
+
+        left_pos = {left: i for i, left in enumerate(lefts)}
+        right_pos = {right: j for j, right in enumerate(rights)}
+        weights = np.zeros((len(lefts), len(rights)))
+        for left, right, score in edges:
+            weights[left_pos[left], right_pos[right]] = score
+
+        score_of = {(left, right): score for left, right, score in edges}
+        return [(lefts[i], rights[j], score_of[(lefts[i], rights[j])]) for i, j in hungarian(weights)]
+
+    def total_score(self) -> float:
+        return sum(score for _, _, score in self.pairs)
+
+    def summary(self) -> str:
+        return (f"one-to-one: {len(self.pairs)} pairs, total score {self.total_score():.1f} "
+                f"({self.exact_components} exact / {self.greedy_components} greedy components)")
+
+
+def assign_ranked(ranked_lists: List[List[Tuple[float, int, Any]]],
+                  exact_cells: int = EXACT_CELLS) -> Tuple[List[List[Tuple[float, int, Any]]], Assignment]:
+    """Keep only the assigned candidate of every product
+
+    ranked_lists[i] are product i's candidates as TopK.ranked() gives them,
+    (score, partner index, item). Returns the same lists cut down to the one
+    candidate (or none) the assignment gives product i, and the Assignment.
+    """
+    assignment = Assignment(
+        ((left, right, score) for left, ranked in enumerate(ranked_lists) for score, right, _ in ranked),
+        exact_cells,
+    )
+    assigned = []
+    for left, ranked in enumerate(ranked_lists):
+        right = assignment.right_of.get(left)
+        assigned.append([entry for entry in ranked if entry[1] == right][:1] if right is not None else [])
+    return assigned, assignment
@@ -1,63 +1,185 @@
 """
 Balflex Fittings PDF Parser
-Extracts hydraulic fittings from Balflex catalog
+Extracts hydraulic fittings from Balflex catalog, with product type, gender,
+standard and seat type (the balflex_fittings_ENHANCED.json schema)
 """
 
 import pdfplumber
 import re
 import json
-from typing import List, Dict
+from typing import List, Dict, Iterator
+from pdf_pages import PageClassCache, iter_pages, memory_report
+from pdf_cache import ExtractionCache
+from pdf_layout import PageLayout
+from pdf_editions import EditionDiff
+from fitting_attributes import find_product_type, enrich_fitting
 
 class BalflexFittingsParser:
-    def __init__(self, pdf_path: str):
+    # pdfplumber table settings (None = library defaults); part of the cache key
+    TABLE_SETTINGS = None
+    # Bump when the row mapping changes; edition snapshots of older versions are not reused
+    PARSER_VERSION = '2'
+    
+    def __init__(self, pdf_path: str, use_cache: bool = True, release_pages: bool = True):
         self.pdf_path = pdf_path
         self.products = []
+        # Raw tables/text per page are cached beside the PDF (<name>.cache.sqlite)
+        self.extraction_cache = ExtractionCache(pdf_path) if use_cache else None
+        # Drop each page's pdfplumber objects once it is parsed (flat memory)
+        self.release_pages = release_pages
     
-    def parse(self) -> List[Dict]:
-        """Parse Balflex fittings PDF"""
+    def parse(self, classify_pages: bool = True) -> List[Dict]:
+        """Parse Balflex fittings PDF (collects iter_products() into self.products)"""
         print("Parsing Balflex Fittings PDF...")
         print("=" * 70)
         
+        self.products.extend(self.iter_products(classify_pages))
+        
+        print(f"\n✓ Extracted {len(self.products)} fittings from PDF")
+        print(memory_report())
+        return self.products
+    
+    def iter_products(self, classify_pages: bool = True) -> Iterator[Dict]:
+        """Yield fittings page by page as they are parsed
+        
+        classify_pages skips pages whose characters hold neither an article
+        number nor REFERENCE, without extracting text or tables. The
+        classification is stored beside the PDF (<name>.pages.json).
+        """
+        page_cache = PageClassCache(self.pdf_path) if classify_pages else None
+        skipped = 0
+        
+        try:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                print(f"Total pages: {len(pdf.pages)}\n")
+                
+                for page_num, page in iter_pages(pdf, release=self.release_pages):
+                    try:
+                        if page_cache and not self._is_product_page(page_cache.get(page, page_num)):
+                            skipped += 1
+                            continue
+                        
+                        products = self._parse_page(page, page_num)
+                        
+                        if page_num % 20 == 0:
+                            print(f"  Processed {page_num}/{len(pdf.pages)} pages...")
+                    
+                    except Exception as e:
+                        continue
+                    
+                    yield from products
+        finally:
+            # Also runs when the consumer stops early
+            if page_cache:
+                page_cache.save()
+                print(f"Skipped {skipped} pages without fitting tables")
+            if self.extraction_cache:
+                print(self.extraction_cache.summary())
+    
+    def stream_to_jsonl(self, output_file: str, **parse_options) -> int:
+        """Write fittings to a JSON Lines file while the PDF is parsed"""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for product in self.iter_products(**parse_options):
+                f.write(json.dumps(product, ensure_ascii=False) + '\n')
+                count += 1
+        
+        print(f"✓ Streamed {count} fittings to {output_file}")
+        return count
+    
+    def parse_incremental(self, snapshot_file: str, report_file: str = None) -> List[Dict]:
+        """Parse a new catalogue edition, re-extracting only new or changed pages
+        
+        Unchanged pages (same content-stream fingerprint as in the previous
+        edition's snapshot) reuse its products; the snapshot is then updated
+        and a per-page change report is written.
+        """
+        print("Parsing Balflex Fittings PDF (incremental)...")
+        print("=" * 70)
+        
+        diff = EditionDiff(snapshot_file, self.PARSER_VERSION)
+        page_cache = PageClassCache(self.pdf_path)
+        
+        self.products = []
         with pdfplumber.open(self.pdf_path) as pdf:
             print(f"Total pages: {len(pdf.pages)}\n")
             
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    self._parse_page(page, page_num)
-                    
-                    if page_num % 20 == 0:
-                        print(f"  Processed {page_num}/{len(pdf.pages)} pages...")
-                
-                except Exception as e:
-                    continue
+            for page_num, page in iter_pages(pdf, release=self.release_pages):
+                products = diff.reuse(page, page_num)
+                if products is None:
+                    products = []
+                    try:
+                        if self._is_product_page(page_cache.get(page, page_num)):
+                            products = self._parse_page(page, page_num)
+                    except Exception as e:
+                        pass
+                    diff.record(page_num, products)
+                self.products.extend(products)
+        
+        page_cache.save()
+        diff.save(self.pdf_path, report_file)
         
         print(f"\n✓ Extracted {len(self.products)} fittings from PDF")
+        print(memory_report())
         return self.products
     
-    def _parse_page(self, page, page_num: int):
+    @staticmethod
+    def _is_product_page(features: Dict) -> bool:
+        """Same test as _parse_page, on the page's raw characters
+        
+        The char stream has no spaces, so this accepts every page the text
+        check would accept (and a few more).
+        """
+        return features['fitting_articles'] > 0 or features['has_reference']
+    
+    def _parse_page(self, page, page_num: int) -> List[Dict]:
         """Parse a single page for fitting products"""
         
-        text = page.extract_text()
+        # Text and tables from one pass over the page's characters
+        layout = self._extract_layout(page, page_num)
+        text = layout['text']
         if not text:
-            return
+            return []
         
         # Look for Balflex article numbers (20.XXX.XX, 23.XXXX.XXXX, etc.)
         if not re.search(r'\d{2}\.\d{3,4}\.\d{2,4}', text) and 'REFERENCE' not in text:
-            return
+            return []
         
         # Extract product type/category from page header
         category = self._extract_category(text)
         
         # Get tables
-        tables = page.extract_tables()
+        tables = layout['tables']
         
+        # Product type lines ("Female JIS 60° Cone Seat") sit above each table
+        lines = text.split('\n')
+        
+        products = []
         for table in tables:
             if not table or len(table) < 2:
                 continue
             
             # Parse table
-            products = self._parse_table(table, category, page_num)
-            self.products.extend(products)
+            table_products = self._parse_table(table, category, page_num)
+            if not table_products:
+                continue
+            
+            # Gender, standard and seat type while the page text is at hand
+            product_type = find_product_type(lines, self._find_line(lines, table_products[0]['reference']))
+            products.extend(enrich_fitting(product, product_type) for product in table_products)
+        
+        return products
+    
+    @staticmethod
+    def _find_line(lines: List[str], needle: str) -> int:
+        """Index of the first line containing needle (a table's first reference), or None"""
+        return next((i for i, line in enumerate(lines) if needle in line), None)
+    
+    def _extract_layout(self, page, page_num: int) -> Dict:
+        """Tables, text and header lines of a page (see pdf_layout.PageLayout)"""
+        if self.extraction_cache:
+            return self.extraction_cache.layout(page, page_num, self.TABLE_SETTINGS)
+        return PageLayout(page, self.TABLE_SETTINGS).to_dict()
     
     def _extract_category(self, text: str) -> str:
         """Extract fitting category from page text"""
@@ -196,7 +318,7 @@ class BalflexFittingsParser:
 if __name__ == "__main__":
     parser = BalflexFittingsParser('data/BALFLEX-HYDRAULIC-FITTINGS_HYFITCAT.012023 (1).pdf')
     products = parser.parse()
-    parser.save_to_json('data/balflex_fittings.json')
+    parser.save_to_json('data/balflex_fittings_ENHANCED.json')
     
     print(f"\n{'=' * 70}")
     print(f"Summary: {len(products)} fittings extracted")
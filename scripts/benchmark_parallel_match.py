@@ -0,0 +1,79 @@
+"""Benchmark: FittingsMatcher serial vs sharded across worker processes
+
+Run from the repo root:  python scripts/benchmark_parallel_match.py [balflex] [heizmann] [workers...]
+Sizes are counts of synthetic fittings (default 10000 x 10000); every run
+must return exactly the same matches as the serial one.
+"""
+import io
+import os
+import sys
+import time
+import random
+import contextlib
+
+from match_fittings import FittingsMatcher
+
+
+THREADS = ['BSP', 'JIC', 'ORFS', 'NPT', 'METRIC', 'JIS', '']
+CONNECTIONS = ['Male', 'Female', 'Female Swivel', 'Flange', '']
+CATEGORIES = ['Hose Fittings', 'Adapters', 'Ferrule', 'Flanges']
+DASH_SIZES = ['- 4', '- 6', '- 8', '- 10', '- 12', '- 16', '- 20']
+INCH_SIZES = ['1/4"', '3/8"', '1/2"', '5/8"', '3/4"', '1"', '1.1/4"']
+HOSE_MM = ['6.3', '9.5', '12.7', '15.9', '19.0', '25.4', '31.8']
+
+
+def synthetic_fittings(count: int, supplier: str, seed: int):
+    rnd = random.Random(seed)
+    fittings = []
+    for i in range(count):
+        size = rnd.randrange(len(DASH_SIZES))
+        fitting = {
+            'category': rnd.choice(CATEGORIES),
+            'thread_type': rnd.choice(THREADS),
+            'connection_type': rnd.choice(CONNECTIONS),
+        }
+        if supplier == 'balflex':
+            fitting.update({'reference': f'20.{i:06d}', 'dash_size': DASH_SIZES[size],
+                            'hose_size_mm': HOSE_MM[size], 'hose_size_inch': INCH_SIZES[size]})
+        else:
+            fitting.update({'article_number': f'H{i:06d}', 'model': 'X', 'size': INCH_SIZES[size],
+                            'DN': f'DN{int(float(HOSE_MM[size]))}', 'material': 'Stahl'})
+        fittings.append(fitting)
+    return fittings
+
+
+def timed_match(balflex, heizmann, workers):
+    matcher = FittingsMatcher.__new__(FittingsMatcher)
+    matcher.balflex_fittings, matcher.heizmann_fittings, matcher.matches = balflex, heizmann, []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        matches = matcher.match(workers=workers)
+    return time.perf_counter() - start, matches
+
+
+def main():
+    balflex_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    heizmann_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    worker_counts = [int(arg) for arg in sys.argv[3:]] or sorted({2, 4, os.cpu_count() or 1} - {1})
+
+    balflex = synthetic_fittings(balflex_count, 'balflex', 1)
+    heizmann = synthetic_fittings(heizmann_count, 'heizmann', 2)
+    print(f"Fittings: {balflex_count} x {heizmann_count}, {os.cpu_count()} CPUs")
+
+    serial_time, serial_matches = timed_match(balflex, heizmann, 1)
+    print(f"  1 worker  : {serial_time:7.2f} s  ({len(serial_matches)} matches)")
+
+    identical = True
+    for workers in worker_counts:
+        parallel_time, matches = timed_match(balflex, heizmann, workers)
+        print(f"  {workers} workers : {parallel_time:7.2f} s  (speedup {serial_time / parallel_time:.1f}x)")
+        identical &= matches == serial_matches
+
+    if not identical:
+        print("✗ Outputs differ!")
+        sys.exit(1)
+    print("✓ Identical output")
+
+
+if __name__ == "__main__":
+    main()
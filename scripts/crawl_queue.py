@@ -0,0 +1,356 @@
+"""
+Crawl Queue - SQLite-backed work queue for distributed Heizmann crawling
+Any number of worker processes (on one or more hosts sharing the database file)
+lease product pages, scrape them with the existing scrapers and store the results
+
+Usage:
+    python scripts/crawl_queue.py enqueue fittings data/crawl_queue.db
+    python scripts/crawl_queue.py work data/crawl_queue.db --processes 4
+    python scripts/crawl_queue.py status data/crawl_queue.db
+    python scripts/crawl_queue.py export data/crawl_queue.db data/heizmann_fittings.json
+"""
+
+import sys
+import json
+import time
+import socket
+import random
+import sqlite3
+import argparse
+import multiprocessing
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from crawl_resilience import raise_swallowed
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+# Scrapers that can run as queue workers: key -> (module directory, module, class)
+SCRAPERS = {
+    'hose': (ROOT_DIR / 'Hose_Scraping' / 'scripts', 'heizmann_scraper', 'HeizmannScraper'),
+    'fittings': (ROOT_DIR / 'scripts', 'heizmann_fittings_scraper', 'HeizmannFittingsScraper'),
+    'improved': (ROOT_DIR / 'scripts', 'heizmann_improved_scraper', 'ImprovedHeizmannScraper'),
+}
+
+HOSE_CATEGORY_URL = "/de/category/5/hochdruck-gummischlaeuche"
+
+
+def load_scraper(key: str):
+    """Create a scraper instance by its queue key"""
+    if key not in SCRAPERS:
+        raise ValueError(f"Unknown scraper '{key}' (choose from {', '.join(SCRAPERS)})")
+
+    module_dir, module_name, class_name = SCRAPERS[key]
+    if str(module_dir) not in sys.path:
+        sys.path.append(str(module_dir))
+
+    module = __import__(module_name)
+    return getattr(module, class_name)()
+
+
+class CrawlQueue:
+    """Work queue with leases and retries stored in a single SQLite file
+
+    A task is leased by one worker for `lease_seconds`. If the worker dies, the
+    lease runs out and the next `lease()` call puts the task back in the queue.
+    Failed tasks are retried with exponential backoff up to `max_attempts`.
+
+    For several hosts, put the database on a shared filesystem and use
+    journal_mode='DELETE' (WAL needs shared memory and only works on one host).
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 120, max_attempts: int = 3,
+                 retry_delay: float = 30, journal_mode: str = 'WAL'):
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.journal_mode = journal_mode
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection in autocommit mode (transactions are explicit)
+
+        Closing without COMMIT rolls back, so an exception inside a
+        transaction never leaves a half-updated task behind.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create tables if they don't exist"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_key TEXT UNIQUE NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, available_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    task_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    worker TEXT,
+                    finished_at REAL
+                )
+            """)
+
+    def enqueue(self, payloads: Iterable[Dict]) -> int:
+        """Add tasks; tasks already in the queue (same payload) are skipped"""
+        added = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for payload in payloads:
+                text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tasks (task_key, payload) VALUES (?, ?)",
+                    (text, text)
+                )
+                added += cursor.rowcount
+            conn.execute("COMMIT")
+        return added
+
+    def lease(self, worker_id: str) -> Optional[Tuple[int, Dict]]:
+        """Lease the next available task, or return None if nothing is ready"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Expired leases belong to dead or stuck workers: requeue them
+            conn.execute("""
+                UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                 lease_owner = NULL, lease_expires = NULL,
+                                 last_error = 'lease expired'
+                WHERE status = 'leased' AND lease_expires < ?
+            """, (self.max_attempts, now))
+
+            row = conn.execute("""
+                SELECT id, payload FROM tasks
+                WHERE status = 'pending' AND available_at <= ?
+                ORDER BY id LIMIT 1
+            """, (now,)).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            task_id, payload = row
+            conn.execute("""
+                UPDATE tasks SET status = 'leased', attempts = attempts + 1,
+                                 lease_owner = ?, lease_expires = ?
+                WHERE id = ?
+            """, (worker_id, now + self.lease_seconds, task_id))
+            conn.execute("COMMIT")
+
+        return task_id, json.loads(payload)
+
+    def complete(self, task_id: int, worker_id: str, result) -> bool:
+        """Store the result of a leased task; False if the lease was lost meanwhile"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT task_key, payload FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (task_id, worker_id)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+
+            task_key, payload = row
+            conn.execute(
+                "INSERT OR REPLACE INTO results (task_key, payload, result, worker, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (task_key, payload, json.dumps(result, ensure_ascii=False), worker_id, time.time())
+            )
+            conn.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                (task_id,)
+            )
+            conn.execute("COMMIT")
+        return True
+
+    def fail(self, task_id: int, worker_id: str, error: str):
+        """Give a task back after an error; it is retried with backoff or marked failed"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (task_id, worker_id)
+            ).fetchone()
+
+            if row is not None:
+                attempts = row[0]
+                if attempts >= self.max_attempts:
+                    status, available_at = 'failed', 0
+                else:
+                    status = 'pending'
+                    available_at = time.time() + self.retry_delay * 2 ** (attempts - 1)
+
+                conn.execute("""
+                    UPDATE tasks SET status = ?, available_at = ?, last_error = ?,
+                                     lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ?
+                """, (status, available_at, str(error)[:500], task_id))
+            conn.execute("COMMIT")
+
+    def stats(self) -> Dict[str, int]:
+        """Number of tasks per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def has_open_tasks(self) -> bool:
+        """True while tasks are pending or leased"""
+        stats = self.stats()
+        return stats.get('pending', 0) + stats.get('leased', 0) > 0
+
+    def results(self) -> List[Dict]:
+        """All stored results, in task order"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT r.result FROM results r JOIN tasks t ON t.task_key = r.task_key
+                ORDER BY t.id
+            """).fetchall()
+
+        products = []
+        for (result,) in rows:
+            products.extend(json.loads(result))
+        return products
+
+
+def enqueue_scraper_links(queue: CrawlQueue, scraper_key: str) -> int:
+    """Collect product links with the scraper's own link finder and queue them"""
+    scraper = load_scraper(scraper_key)
+    payloads = []
+
+    if scraper_key == 'hose':
+        for name, url in scraper._get_hose_product_links(HOSE_CATEGORY_URL):
+            payloads.append({'scraper': scraper_key, 'args': [name, url]})
+    else:
+        for category_name, category_url in scraper.categories:
+            for name, url in scraper._get_product_links(category_url):
+                payloads.append({'scraper': scraper_key, 'args': [name, url, category_name]})
+
+    return queue.enqueue(payloads)
+
+
+def run_worker(db_path: str, worker_id: Optional[str] = None, delay: float = 2.0,
+               wait_for_work: bool = False, **queue_options) -> int:
+    """Lease tasks and run them through the scrapers' `_scrape_product_page` until the queue is empty"""
+    queue = CrawlQueue(db_path, **queue_options)
+    worker_id = worker_id or f"{socket.gethostname()}:{multiprocessing.current_process().pid}"
+    scrapers = {}
+    processed = 0
+
+    while True:
+        leased = queue.lease(worker_id)
+
+        if leased is None:
+            # Other workers may still hold leases that can expire and come back
+            if wait_for_work or queue.has_open_tasks():
+                time.sleep(5)
+                if not wait_for_work and not queue.has_open_tasks():
+                    break
+                continue
+            break
+
+        task_id, payload = leased
+        key = payload['scraper']
+
+        try:
+            if key not in scrapers:
+                scrapers[key] = load_scraper(key)
+            scraper = scrapers[key]
+
+            # The scrapers catch their own request errors; surface them for retry
+            scrape_page = raise_swallowed(scraper, scraper._scrape_product_page)
+            variants = scrape_page(*payload['args'])
+
+            queue.complete(task_id, worker_id, variants)
+            processed += 1
+            print(f"[{worker_id}] {payload['args'][0]}: {len(variants)} variants")
+
+        except Exception as e:
+            queue.fail(task_id, worker_id, repr(e))
+            print(f"[{worker_id}] {payload['args'][0]}: Error - {e}")
+
+        time.sleep(random.uniform(delay * 0.5, delay * 1.5))
+
+    return processed
+
+
+def _worker_process(db_path: str, delay: float):
+    """Entry point for worker processes started by `work`"""
+    run_worker(db_path, delay=delay)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Distributed Heizmann crawl queue")
+    sub = arg_parser.add_subparsers(dest='command', required=True)
+
+    enqueue_cmd = sub.add_parser('enqueue', help="queue all product pages of a scraper")
+    enqueue_cmd.add_argument('scraper', choices=sorted(SCRAPERS))
+    enqueue_cmd.add_argument('db')
+
+    work_cmd = sub.add_parser('work', help="run worker processes on this host")
+    work_cmd.add_argument('db')
+    work_cmd.add_argument('--processes', type=int, default=1)
+    work_cmd.add_argument('--delay', type=float, default=2.0, help="seconds between requests per worker")
+
+    status_cmd = sub.add_parser('status', help="show task counts")
+    status_cmd.add_argument('db')
+
+    export_cmd = sub.add_parser('export', help="write all results to a JSON file")
+    export_cmd.add_argument('db')
+    export_cmd.add_argument('output')
+
+    args = arg_parser.parse_args()
+
+    if args.command == 'enqueue':
+        queue = CrawlQueue(args.db)
+        added = enqueue_scraper_links(queue, args.scraper)
+        print(f"✓ Queued {added} product pages ({args.scraper})")
+
+    elif args.command == 'work':
+        workers = [
+            multiprocessing.Process(target=_worker_process, args=(args.db, args.delay))
+            for _ in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print(f"✓ Workers finished: {CrawlQueue(args.db).stats()}")
+
+    elif args.command == 'status':
+        for status, count in sorted(CrawlQueue(args.db).stats().items()):
+            print(f"  {status:8s}: {count}")
+
+    elif args.command == 'export':
+        products = CrawlQueue(args.db).results()
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(products, f, indent=2, ensure_ascii=False)
+        print(f"✓ Saved {len(products)} products to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
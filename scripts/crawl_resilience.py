@@ -0,0 +1,189 @@
+"""
+Crawl Resilience - circuit breaker and deferred retry queue for product page scraping
+A burst of failures pauses the host instead of waiting out every timeout;
+failed pages are retried with backoff at the end of the run
+"""
+
+import time
+from urllib.parse import urlparse
+from typing import List, Dict, Callable, Optional
+
+
+def raise_swallowed(scraper, method: Callable) -> Callable:
+    """Wrap a scraper method that catches its own errors so failures raise again
+
+    The Heizmann scrapers catch request errors inside `_scrape_product_page`
+    and keep them in `scraper.last_error`.
+    """
+    def call(*args):
+        scraper.last_error = None
+        result = method(*args)
+        if scraper.last_error is not None:
+            raise scraper.last_error
+        return result
+    return call
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker
+
+    closed    -> requests go through, consecutive failures are counted
+    open      -> after `failure_threshold` consecutive failures the host is paused
+                 for `cooldown` seconds and requests are deferred immediately
+    half-open -> after the cooldown one probe request is let through; success
+                 closes the circuit, failure opens it again
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hosts = {}
+
+    def _state(self, host: str) -> Dict:
+        if host not in self.hosts:
+            self.hosts[host] = {'failures': 0, 'opened_at': None, 'probing': False, 'trips': 0}
+        return self.hosts[host]
+
+    def allow(self, host: str) -> bool:
+        """True if a request to `host` may be sent now"""
+        state = self._state(host)
+        if state['opened_at'] is None:
+            return True
+
+        if time.time() - state['opened_at'] < self.cooldown or state['probing']:
+            return False
+
+        # Half-open: let a single probe through
+        state['probing'] = True
+        return True
+
+    def wait_time(self, host: str) -> float:
+        """Seconds until `host` accepts requests again"""
+        state = self._state(host)
+        if state['opened_at'] is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.time() - state['opened_at']))
+
+    def record_success(self, host: str):
+        state = self._state(host)
+        state['failures'] = 0
+        state['opened_at'] = None
+        state['probing'] = False
+
+    def record_failure(self, host: str):
+        state = self._state(host)
+        state['failures'] += 1
+        state['probing'] = False
+
+        if state['opened_at'] is not None or state['failures'] >= self.failure_threshold:
+            if state['opened_at'] is None:
+                state['trips'] += 1
+                print(f"  [Circuit open: {host} paused for {self.cooldown:.0f}s after {state['failures']} failures]")
+            state['opened_at'] = time.time()
+
+    def trips(self) -> int:
+        """How many times any circuit opened"""
+        return sum(state['trips'] for state in self.hosts.values())
+
+
+class RetryQueue:
+    """Failed pages, reprocessed at the end of the run with exponential backoff"""
+
+    def __init__(self, max_rounds: int = 3, base_delay: float = 15.0, max_delay: float = 120.0):
+        self.max_rounds = max_rounds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.pending = []
+        self.failed = []
+        self.deferred_count = 0
+        self.recovered_count = 0
+
+    def defer(self, url: str, args: tuple, error):
+        """Put a page aside for the retry phase"""
+        self.pending.append({'url': url, 'args': args, 'error': str(error), 'attempts': 0})
+        self.deferred_count += 1
+
+    def drain(self, func: Callable, on_result: Callable, breaker: Optional[CircuitBreaker] = None) -> int:
+        """Retry deferred pages with `func(*args)`; successful results go to `on_result(args, result)`"""
+        for round_num in range(1, self.max_rounds + 1):
+            if not self.pending:
+                break
+
+            delay = min(self.base_delay * 2 ** (round_num - 1), self.max_delay)
+            print(f"\nRetry round {round_num}/{self.max_rounds}: {len(self.pending)} pages (backoff {delay:.0f}s)")
+            time.sleep(delay)
+
+            still_failing = []
+            for item in self.pending:
+                host = urlparse(item['url']).netloc
+                if breaker:
+                    wait = breaker.wait_time(host)
+                    if wait > 0:
+                        time.sleep(wait)
+                    breaker.allow(host)
+
+                item['attempts'] += 1
+                try:
+                    result = func(*item['args'])
+                except Exception as e:
+                    item['error'] = str(e)
+                    still_failing.append(item)
+                    if breaker:
+                        breaker.record_failure(host)
+                    continue
+
+                if breaker:
+                    breaker.record_success(host)
+                on_result(item['args'], result)
+                self.recovered_count += 1
+
+            self.pending = still_failing
+
+        self.failed.extend(self.pending)
+        self.pending = []
+        return self.recovered_count
+
+
+class ResilientCrawl:
+    """Circuit breaker + deferred retry queue around one page-scraping function"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0,
+                 max_retry_rounds: int = 3, retry_delay: float = 15.0):
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.retry_queue = RetryQueue(max_retry_rounds, retry_delay)
+
+    def fetch(self, url: str, func: Callable, *args):
+        """Run `func(*args)` for `url`; returns (ok, result) and defers failures"""
+        host = urlparse(url).netloc
+
+        if not self.breaker.allow(host):
+            self.retry_queue.defer(url, args, 'circuit open')
+            return False, None
+
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.breaker.record_failure(host)
+            self.retry_queue.defer(url, args, e)
+            return False, None
+
+        self.breaker.record_success(host)
+        return True, result
+
+    def retry_deferred(self, func: Callable, on_result: Callable) -> int:
+        """Reprocess deferred pages; returns how many were recovered"""
+        return self.retry_queue.drain(func, on_result, self.breaker)
+
+    def summary(self) -> List[str]:
+        """Lines for the run summary"""
+        queue = self.retry_queue
+        lines = [
+            f"Deferred pages: {queue.deferred_count}",
+            f"Recovered on retry: {queue.recovered_count}",
+            f"Still failing: {len(queue.failed)}",
+        ]
+        if self.breaker.trips():
+            lines.append(f"Circuit breaker trips: {self.breaker.trips()}")
+        for item in queue.failed[:10]:
+            lines.append(f"  ✗ {item['url']}: {item['error'][:80]}")
+        return lines
@@ -0,0 +1,145 @@
+"""
+Fitting Attributes - product type, gender, standard and seat type of Balflex fittings
+Used by the fittings parser while a page's text is in memory, and by
+process_balflex_standards.py for older balflex_fittings_with_gender.json files
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+# A line naming the fitting end, e.g. "Female JIS 60° Cone Seat", "Male ORFS"
+GENDER_LINE_PATTERN = re.compile(r'\b(?:fe)?male\b', re.IGNORECASE)
+
+JIS_PATTERN = re.compile(r'JIS\s*\d+(?:-\d+)?', re.IGNORECASE)
+JIC_PATTERN = re.compile(r'JIC\s*\d+', re.IGNORECASE)
+SAE_PATTERN = re.compile(r'SAE\s*\d+', re.IGNORECASE)
+ISO_PATTERN = re.compile(r'ISO\s*\d+(?:-\d+)?', re.IGNORECASE)
+DIN_PATTERN = re.compile(r'DIN\s*\d+', re.IGNORECASE)
+CONE_PATTERN = re.compile(r'\d+°\s*(?:Cone|Inner Cone|Innenkonus)', re.IGNORECASE)
+
+
+def find_product_type(lines: List[str], anchor: Optional[int] = None) -> str:
+    """Line naming the fitting (the last male/female line at or above `anchor`)
+
+    `anchor` is the index of the table's first row in `lines`; without it, or
+    if nothing is found above it, the first such line on the page is used.
+    """
+    if anchor is not None:
+        for line in reversed(lines[:anchor + 1]):
+            if GENDER_LINE_PATTERN.search(line):
+                return line.strip()
+
+    for line in lines:
+        if GENDER_LINE_PATTERN.search(line):
+            return line.strip()
+
+    return ""
+
+
+def extract_gender(product_type: str) -> str:
+    """Female / Male from the product type line"""
+    if not product_type:
+        return ""
+    return 'Female' if 'female' in product_type.lower() else 'Male'
+
+
+def extract_standard(product_type):
+    """JIS, BSP, NPT, SAE, ORFS, ISO gibi standartları çıkar"""
+    if not product_type:
+        return None
+
+    product_upper = product_type.upper()
+
+    # Specific patterns
+    if 'JIS' in product_upper:
+        # JIS 8434-6 gibi detaylı varsa al, yoksa sadece JIS
+        match = JIS_PATTERN.search(product_type)
+        if match and 'JIS 60' not in match.group(0):  # "JIS 60°" değil "JIS 8363" gibi
+            return match.group(0)
+        return 'JIS'
+
+    if 'BSP' in product_upper:
+        return 'BSP'
+
+    if 'NPT' in product_upper or 'NPTF' in product_upper:
+        return 'NPT'
+
+    if 'JIC' in product_upper:
+        # JIC 37° gibi detaylı varsa al
+        match = JIC_PATTERN.search(product_type)
+        if match and '37' not in match.group(0):
+            return match.group(0)
+        return 'JIC'
+
+    if 'ORFS' in product_upper or 'O-RING FACE SEAL' in product_upper:
+        return 'ORFS'
+
+    if 'SAE' in product_upper:
+        match = SAE_PATTERN.search(product_type)
+        if match:
+            return match.group(0)
+        return 'SAE'
+
+    if 'ISO' in product_upper:
+        match = ISO_PATTERN.search(product_type)
+        if match:
+            return match.group(0)
+        return 'ISO'
+
+    if 'DIN' in product_upper:
+        match = DIN_PATTERN.search(product_type)
+        if match:
+            return match.group(0)
+        return 'DIN'
+
+    if 'KOMATSU' in product_upper:
+        return 'KOMATSU'
+
+    if 'CATERPILLAR' in product_upper or 'CAT' in product_upper:
+        return 'CATERPILLAR'
+
+    return None
+
+
+def extract_seat_type(product_type):
+    """60° Cone Seat, 74° Cone, Flat Face gibi seat type'ları çıkar"""
+    if not product_type:
+        return None
+
+    # 60° Cone Seat, 74° Cone, etc.
+    cone_match = CONE_PATTERN.search(product_type)
+    if cone_match:
+        return cone_match.group(0)
+
+    # Flat Face
+    if 'flat face' in product_type.lower():
+        return 'Flat Face'
+
+    # O-Ring
+    if 'o-ring' in product_type.lower() or 'oring' in product_type.lower():
+        return 'O-Ring'
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def product_type_attributes(product_type: str) -> Dict:
+    """gender / standard / seat_type of a product type (a page has only a few)"""
+    return {
+        'gender': extract_gender(product_type),
+        'standard': extract_standard(product_type),
+        'seat_type': extract_seat_type(product_type),
+    }
+
+
+def enrich_fitting(product: Dict, product_type: str) -> Dict:
+    """Add the ENHANCED fields to a parsed fitting, in the ENHANCED key order"""
+    attributes = product_type_attributes(product_type)
+    product['gender'] = attributes['gender']
+    product['product_type'] = product_type
+    product['thread_size'] = product.get('hose_size_inch', '')
+    product['standard'] = attributes['standard']
+    product['seat_type'] = attributes['seat_type']
+    return product
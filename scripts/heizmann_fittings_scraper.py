@@ -9,13 +9,28 @@ import json
 import re
 import time
 import random
+import argparse
 from typing import List, Dict
 
+from crawl_resilience import ResilientCrawl, raise_swallowed
+from refresh_scheduler import add_refresh_arguments, merge_with_output, scheduler_from_args
+
 class HeizmannFittingsScraper:
-    def __init__(self):
+    def __init__(self, scheduler=None, budget: int = None):
         self.base_url = "https://www.heizmann.ch"
         self.session = requests.Session()
         
+        # Optional RefreshScheduler: fetch only the stalest `budget` pages
+        self.scheduler = scheduler
+        self.budget = budget
+        self.refreshed_urls = set()
+        # Error swallowed by the last _scrape_product_page call (None = success)
+        self.last_error = None
+        
+        # Pause the host after a burst of failures, retry failed pages at the end
+        self.resilience = ResilientCrawl()
+        self._fetch_page = raise_swallowed(self, self._scrape_product_page)
+        
         # Rotate User-Agents to avoid detection
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -64,6 +79,9 @@ class HeizmannFittingsScraper:
         print("Heizmann Fittings Scraper")
         print("=" * 70)
         
+        if self.scheduler:
+            return self._scrape_planned()
+        
         for category_name, category_url in self.categories:
             print(f"\nCategory: {category_name}")
             print("-" * 70)
@@ -87,18 +105,76 @@ class HeizmannFittingsScraper:
                     time.sleep(random.uniform(8.0, 12.0))
                     self._update_user_agent()
                 
-                try:
-                    variants = self._scrape_product_page(name, url, category_name)
-                    self.products.extend(variants)
-                    print(f"  {name}: {len(variants)} variants")
-                except Exception as e:
-                    print(f"  {name}: Error - {e}")
+                ok, variants = self.resilience.fetch(f"{self.base_url}{url}", self._fetch_page, name, url, category_name)
+                if not ok:
+                    print(f"  {name}: failed - deferred for retry")
                     continue
+                
+                self._store_page(url, variants)
+                print(f"  {name}: {len(variants)} variants")
+        
+        self._retry_failed_pages()
         
         print(f"\n{'=' * 70}")
         print(f"Total products scraped: {len(self.products)}")
         return self.products
     
+    def _scrape_planned(self) -> List[Dict]:
+        """Refresh run: collect links from all categories, then fetch the stalest pages first"""
+        candidates = []
+        for category_name, category_url in self.categories:
+            time.sleep(random.uniform(3.0, 5.0))
+            links = self._get_product_links(category_url)
+            candidates.extend((name, url, category_name) for name, url in links)
+            print(f"  {category_name}: {len(links)} products")
+        
+        plan = self.scheduler.plan(candidates, budget=self.budget)
+        print(f"\nRefresh plan: {len(plan)} of {len(candidates)} pages (stalest first)")
+        print("-" * 70)
+        
+        for idx, (name, url, category_name) in enumerate(plan, 1):
+            time.sleep(random.uniform(2.0, 4.0))
+            
+            if idx % 10 == 0:
+                print(f"  [Pause after {idx} products - avoiding rate limit...]")
+                time.sleep(random.uniform(8.0, 12.0))
+                self._update_user_agent()
+            
+            ok, variants = self.resilience.fetch(f"{self.base_url}{url}", self._fetch_page, name, url, category_name)
+            if not ok:
+                print(f"  {name}: failed - deferred for retry")
+                continue
+            
+            self._store_page(url, variants)
+            print(f"  {name}: {len(variants)} variants")
+        
+        self._retry_failed_pages()
+        self.scheduler.save()
+        
+        print(f"\n{'=' * 70}")
+        print(f"Total products refreshed: {len(self.products)}")
+        return self.products
+    
+    def _store_page(self, url: str, variants: List[Dict]):
+        """Keep variants of a successfully scraped page"""
+        self.products.extend(variants)
+        if self.scheduler:
+            self.scheduler.record(url, variants)
+            self.refreshed_urls.add(f"{self.base_url}{url}")
+    
+    def _retry_failed_pages(self):
+        """Reprocess deferred pages with backoff and print the recovery summary"""
+        def on_result(args, variants):
+            name, url = args[0], args[1]
+            self._store_page(url, variants)
+            print(f"  {name}: recovered, {len(variants)} variants")
+        
+        self.resilience.retry_deferred(self._fetch_page, on_result)
+        
+        print()
+        for line in self.resilience.summary():
+            print(line)
+    
     def _get_product_links(self, category_url: str) -> List[tuple]:
         """Get all product links from category page"""
         products = []
@@ -167,6 +243,7 @@ class HeizmannFittingsScraper:
         
         except Exception as e:
             print(f"    Error: {e}")
+            self.last_error = e
         
         return variants
     
@@ -270,14 +347,26 @@ class HeizmannFittingsScraper:
             return None
     
     def save_to_json(self, filename: str):
-        """Save products to JSON"""
+        """Save products to JSON
+        
+        After a refresh run only the refreshed pages' products are replaced;
+        the rest of the existing file is kept.
+        """
+        products = self.products
+        if self.scheduler:
+            products = merge_with_output(filename, self.products, self.refreshed_urls)
+        
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
+            json.dump(products, f, indent=2, ensure_ascii=False)
         print(f"\n✓ Saved to {filename}")
 
 
 if __name__ == "__main__":
-    scraper = HeizmannFittingsScraper()
+    arg_parser = argparse.ArgumentParser(description="Scrape Heizmann fittings")
+    add_refresh_arguments(arg_parser, 'data/heizmann_fittings_refresh_state.json')
+    args = arg_parser.parse_args()
+    
+    scraper = HeizmannFittingsScraper(scheduler_from_args(args), args.refresh_budget)
     products = scraper.scrape()
     scraper.save_to_json('data/heizmann_fittings.json')
     
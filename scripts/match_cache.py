@@ -0,0 +1,157 @@
+"""
+Match Cache - ranked candidates of every left-side product kept between runs
+After a re-scrape usually only a few products differ; left products whose
+cached candidates are still valid are reused, or scored against the changed
+right-side products only, instead of rescoring every pair
+"""
+
+import json
+import hashlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from top_k import TopK
+
+
+# Bump when the cache file layout changes
+CACHE_VERSION = 1
+
+Ranked = List[Tuple[float, int, Any]]
+
+
+def record_hash(record: Dict) -> str:
+    """Content hash of a product record (all fields, key order ignored)"""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def record_ids(records: List[Dict]) -> List[str]:
+    """Stable id per record: content hash plus occurrence, so identical records stay distinct"""
+    seen = {}
+    ids = []
+    for record in records:
+        digest = record_hash(record)
+        seen[digest] = seen.get(digest, 0) + 1
+        ids.append(f"{digest}#{seen[digest]}")
+    return ids
+
+
+class MatchCache:
+    """Ranked candidate lists (TopK.ranked() format) keyed by left record hash
+
+    The file (JSON) holds the scorer key, the right-side ids of the run that
+    wrote it (the right-side version) and one candidate list per left record,
+    with right-side ids in place of indices. Invalidation rules, in order:
+
+    1. Another scorer key (matcher, its SCORER_VERSION, k): nothing is reused.
+    2. Right-side products present in both runs changed their relative order:
+       nothing is reused (equal scores are ranked by position).
+    3. A left record whose hash is not cached (new or changed): scored
+       against the whole right side.
+    4. A cached list naming a removed or changed right-side product (or a
+       copy of a record whose number of copies changed): scored against the
+       whole right side.
+    5. Otherwise the cached list is still the top-k of the unchanged products;
+       it is merged with the top-k of the added or changed ones, which are the
+       only pairs scored. Without right-side changes it is reused as is.
+    """
+
+    def __init__(self, cache_file: str, scorer_key: str, k: int):
+        self.cache_file = Path(cache_file)
+        self.scorer_key = scorer_key
+        self.k = k
+        self.reused = 0
+        self.updated = 0
+        self.rescored = 0
+        self.right_ids, self.entries = self._load()
+
+    def _load(self) -> Tuple[List[str], Dict[str, list]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return [], {}
+
+        if (data.get('version') != CACHE_VERSION or data.get('scorer_key') != self.scorer_key
+                or data.get('k') != self.k):
+            return [], {}
+        return data['right_ids'], data['entries']
+
+    def rank(self, left_records: List[Dict], right_records: List[Dict],
+             rank_all: Callable[[List[int]], List[Ranked]],
+             rank_subset: Callable[[int, List[int]], Ranked]) -> List[Ranked]:
+        """Ranked candidates of every left record, scoring only what the rules require
+
+        rank_all(left positions) ranks those left records against the whole
+        right side; rank_subset(left position, right indices) ranks one
+        against the given right indices only. Both return TopK.ranked() lists.
+        """
+        right_ids = record_ids(right_records)
+        position = {right_id: idx for idx, right_id in enumerate(right_ids)}
+
+        # Copies of a record are renumbered when their count changes, so then
+        # all of them count as removed and added
+        old_counts = Counter(right_id.split('#')[0] for right_id in self.right_ids)
+        new_counts = Counter(right_id.split('#')[0] for right_id in right_ids)
+        kept = set()
+        for right_id in self.right_ids:
+            digest = right_id.split('#')[0]
+            if right_id in position and old_counts[digest] == new_counts[digest]:
+                kept.add(right_id)
+        removed = set(self.right_ids) - kept
+        added = [idx for idx, right_id in enumerate(right_ids) if right_id not in kept]
+
+        entries = self.entries
+        kept_old_order = [right_id for right_id in self.right_ids if right_id in kept]
+        kept_new_order = [right_id for right_id in right_ids if right_id in kept]
+        if kept_old_order != kept_new_order:
+            entries = {}
+
+        left_hashes = [record_hash(record) for record in left_records]
+        ranked_lists = [None] * len(left_records)
+        to_rescore = []
+
+        for pos, left_hash in enumerate(left_hashes):
+            entry = entries.get(left_hash)
+            if entry is None or any(right_id in removed for _, right_id, _ in entry):
+                to_rescore.append(pos)
+                continue
+
+            cached = [(score, position[right_id], item) for score, right_id, item in entry]
+            if not added:
+                ranked_lists[pos] = cached
+                self.reused += 1
+                continue
+
+            top = TopK(self.k)
+            for score, idx, item in cached + rank_subset(pos, added):
+                top.push(score, idx, item)
+            ranked_lists[pos] = top.ranked()
+            self.updated += 1
+
+        for pos, ranked in zip(to_rescore, rank_all(to_rescore) if to_rescore else []):
+            ranked_lists[pos] = ranked
+        self.rescored += len(to_rescore)
+
+        self.right_ids = right_ids
+        self.entries = {
+            left_hash: [[score, right_ids[idx], item] for score, idx, item in ranked]
+            for left_hash, ranked in zip(left_hashes, ranked_lists)
+        }
+        return ranked_lists
+
+    def save(self):
+        data = {
+            'version': CACHE_VERSION,
+            'scorer_key': self.scorer_key,
+            'k': self.k,
+            'right_ids': self.right_ids,
+            'entries': self.entries,
+        }
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    def summary(self) -> str:
+        return (f"match cache: {self.reused} reused, {self.updated} updated, "
+                f"{self.rescored} rescored ({self.cache_file.name})")
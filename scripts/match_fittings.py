@@ -3,15 +3,55 @@ Fittings Matcher - Compares Balflex and Heizmann fittings
 Matches based on: thread type, dash size, connection type, dimensions
 """
 
+import os
 import json
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+from collections import defaultdict
 from difflib import SequenceMatcher
 
+from top_k import TopK
+from assignment import CANDIDATES_PER_PRODUCT, assign_ranked
+from parallel_match import map_shards
+from match_cache import MatchCache
+
+
+# Score components of _score_components, as bits of one int
+THREAD_MATCH, SIZE_MATCH, HOSE_SIZE_MATCH, CONNECTION_MATCH, CATEGORY_MATCH = 1, 2, 4, 8, 16
+
 
 class FittingsMatcher:
     """Match fittings from Balflex and Heizmann based on specifications"""
     
+    # Bump when scoring changes; stored match caches of other versions are not reused
+    SCORER_VERSION = '2'
+    
+    # Thread type equivalents
+    THREAD_GROUPS = [
+        ['JIC', 'JIC 37', 'JIC 37°', 'SAE J514'],
+        ['ORFS', 'O-RING FACE SEAL'],
+        ['BSP', 'BSPP', 'BSPT', 'G'],
+        ['NPT', 'NPTF'],
+        ['METRIC', 'M', 'DIN'],
+    ]
+    
+    # Dash to DN conversion (approximation)
+    # -4 ≈ DN6, -6 ≈ DN10, -8 ≈ DN12, -10 ≈ DN16, -12 ≈ DN20
+    DASH_TO_DN = {
+        3: 5,
+        4: 6,
+        5: 8,
+        6: 10,
+        8: 12,
+        10: 16,
+        12: 20,
+        16: 25,
+        20: 32,
+        24: 40,
+        32: 50,
+    }
+    DN_TOLERANCE = 2
+    
     def __init__(self, balflex_file: str, heizmann_file: str):
         self.balflex_fittings = self._load_json(balflex_file)
         self.heizmann_fittings = self._load_json(heizmann_file)
@@ -25,8 +65,26 @@ class FittingsMatcher:
         except:
             return []
     
-    def match(self) -> List[Dict]:
-        """Find matches between Balflex and Heizmann fittings"""
+    def match(self, top_k: int = 1, one_to_one: bool = False, workers: int = 1,
+              cache_file: str = None, blocking: bool = True) -> List[Dict]:
+        """Find matches between Balflex and Heizmann fittings
+        
+        With blocking, each Balflex fitting is scored only against the Heizmann
+        fittings of its thread family and size class (see _candidate_indices);
+        without it, against all of them. Both give the same matches.
+        
+        top_k > 1 keeps the k best Heizmann fittings per Balflex fitting as
+        consecutive rows with a 'rank' field, best first. one_to_one=True
+        uses every Heizmann fitting at most once, assigned over the
+        CANDIDATES_PER_PRODUCT best candidates of each Balflex fitting.
+        workers > 1 scores shards of the Balflex fittings in parallel
+        processes (see scripts/parallel_match.py), with identical output.
+        cache_file keeps the candidates between runs, so only fittings
+        affected by changes are scored again (see scripts/match_cache.py).
+        """
+        if one_to_one and top_k > 1:
+            raise ValueError("top_k and one_to_one cannot be combined")
+        
         print(f"\nMatching {len(self.balflex_fittings)} Balflex fittings with {len(self.heizmann_fittings)} Heizmann fittings...")
         print("=" * 70)
         
@@ -52,19 +110,37 @@ class FittingsMatcher:
         print(f"Filtering out non-fitting categories: {len(self.heizmann_fittings) - len(valid_heizmann)} excluded")
         print(f"Matching against {len(valid_heizmann)} valid Heizmann fittings")
         
-        for bal_fitting in self.balflex_fittings:
-            best_match = None
-            best_score = 0
-            
-            for heiz_fitting in valid_heizmann:
-                score = self._calculate_match_score(bal_fitting, heiz_fitting)
-                
-                if score > best_score and score >= 45:  # Minimum 45% match (thread+size required)
-                    best_score = score
-                    best_match = heiz_fitting
-            
-            if best_match:
-                self.matches.append({
+        k = CANDIDATES_PER_PRODUCT if one_to_one else top_k
+        # Built once here, before any worker process starts
+        index = self._build_candidate_index(valid_heizmann) if blocking else None
+        
+        def rank_all(positions):
+            fittings = [self.balflex_fittings[pos] for pos in positions]
+            ranked_matches = []
+            for shard_ranked in map_shards(_rank_fitting_shard, (self, fittings, valid_heizmann, k, index),
+                                           len(fittings), workers):
+                ranked_matches.extend(shard_ranked)
+            return ranked_matches
+        
+        if cache_file:
+            cache = MatchCache(cache_file, f"FittingsMatcher:{self.SCORER_VERSION}", k)
+            ranked_matches = cache.rank(
+                self.balflex_fittings, valid_heizmann, rank_all,
+                lambda pos, indices: self._rank_candidates(self.balflex_fittings[pos], valid_heizmann, k, indices)
+            )
+            cache.save()
+            print(f"✓ {cache.summary()}")
+        else:
+            ranked_matches = rank_all(range(len(self.balflex_fittings)))
+        
+        if one_to_one:
+            ranked_matches, assignment = assign_ranked(ranked_matches)
+            print(f"✓ {assignment.summary()}")
+        
+        for bal_fitting, ranked in zip(self.balflex_fittings, ranked_matches):
+            for rank, (best_score, idx, components) in enumerate(ranked, start=1):
+                best_match = valid_heizmann[idx]
+                match = {
                     'balflex_reference': bal_fitting.get('reference', ''),
                     'balflex_category': bal_fitting.get('category', ''),
                     'balflex_dash_size': bal_fitting.get('dash_size', ''),
@@ -82,37 +158,139 @@ class FittingsMatcher:
                     'heizmann_material': best_match.get('material', ''),
                     
                     'match_score': round(best_score, 1),
-                    'match_reason': self._get_match_reason(bal_fitting, best_match)
-                })
+                    'match_reason': self._get_match_reason(bal_fitting, best_match, components)
+                }
+                if top_k > 1:
+                    match['rank'] = rank
+                self.matches.append(match)
         
         print(f"\n✓ Found {len(self.matches)} matches")
         return self.matches
     
+    def _rank_candidates(self, bal_fitting: Dict, valid_heizmann: List[Dict], k: int, indices: List[int] = None) -> List:
+        """(score, index in valid_heizmann, score components) of the k best Heizmann fittings, best first
+        
+        `indices` limits the scan to those positions of valid_heizmann.
+        """
+        top = TopK(k)
+        
+        for idx in (range(len(valid_heizmann)) if indices is None else indices):
+            heiz_fitting = valid_heizmann[idx]
+            score, components = self._score_components(bal_fitting, heiz_fitting)
+            
+            if score >= 45:  # Minimum 45% match (thread+size required)
+                top.push(score, idx, components)
+        
+        return top.ranked()
+    
+    def _build_candidate_index(self, valid_heizmann: List[Dict]) -> Dict:
+        """Positions in valid_heizmann by thread and by size, for _candidate_indices
+        
+        'thread': exact upper-case thread type, 'thread_group': THREAD_GROUPS
+        position, 'un_thread': UN/UNF threads (candidates of JIC fittings),
+        'by_dn': DN number, 'size' / 'size_no_dn': size field key of all
+        fittings / of those without a DN number.
+        """
+        index = {
+            'thread': defaultdict(list),
+            'thread_group': defaultdict(list),
+            'un_thread': [],
+            'by_dn': defaultdict(list),
+            'size': defaultdict(list),
+            'size_no_dn': defaultdict(list),
+        }
+        
+        for idx, heizmann in enumerate(valid_heizmann):
+            thread = heizmann.get('thread_type', '')
+            if thread:
+                thread = thread.upper()
+                index['thread'][thread].append(idx)
+                for group_no, group in enumerate(self.THREAD_GROUPS):
+                    if any(t in thread for t in group):
+                        index['thread_group'][group_no].append(idx)
+                if 'UN' in thread:
+                    index['un_thread'].append(idx)
+            
+            dn_num = self._dn_number(heizmann)
+            if dn_num:
+                index['by_dn'][dn_num].append(idx)
+            size = heizmann.get('size', '')
+            if size:
+                index['size'][self._size_key(size)].append(idx)
+                if not dn_num:
+                    index['size_no_dn'][self._size_key(size)].append(idx)
+        
+        return index
+    
+    def _candidate_indices(self, balflex: Dict, index: Dict) -> List[int]:
+        """Heizmann positions that can reach the 45 point threshold, in scan order
+        
+        Without a thread match (40) or a size match (30) a pair scores at most
+        30, so only fittings that pass _threads_match or _sizes_match are
+        candidates: those of the thread's bucket and groups, and those in the
+        DN buckets within DN_TOLERANCE of the dash size (or, without a DN
+        comparison, with the same size field).
+        """
+        candidates = set()
+        
+        thread = balflex.get('thread_type', '')
+        if thread:
+            thread = thread.upper()
+            candidates.update(index['thread'].get(thread, []))
+            for group_no, group in enumerate(self.THREAD_GROUPS):
+                if any(t in thread for t in group):
+                    candidates.update(index['thread_group'].get(group_no, []))
+            if 'JIC' in thread:
+                candidates.update(index['un_thread'])
+        
+        dash_num = self._dash_number(balflex)
+        expected_dn = self.DASH_TO_DN.get(dash_num) if dash_num else None
+        hose_inch = balflex.get('hose_size_inch', '')
+        if expected_dn:
+            for dn in range(expected_dn - self.DN_TOLERANCE, expected_dn + self.DN_TOLERANCE + 1):
+                candidates.update(index['by_dn'].get(dn, []))
+            if hose_inch:
+                candidates.update(index['size_no_dn'].get(self._size_key(hose_inch), []))
+        elif hose_inch:
+            candidates.update(index['size'].get(self._size_key(hose_inch), []))
+        
+        return sorted(candidates)
+    
     def _calculate_match_score(self, balflex: Dict, heizmann: Dict) -> float:
         """Calculate match score between two fittings (0-100)"""
+        return self._score_components(balflex, heizmann)[0]
+    
+    def _score_components(self, balflex: Dict, heizmann: Dict) -> Tuple[int, int]:
+        """Match score and the components that matched (THREAD_MATCH | SIZE_MATCH ...)"""
         score = 0
+        components = 0
         
         # Thread type matching (40 points) - MOST IMPORTANT
         if self._threads_match(balflex.get('thread_type', ''), heizmann.get('thread_type', '')):
             score += 40
+            components |= THREAD_MATCH
         
         # Dash size / DN matching (30 points)
         if self._sizes_match(balflex, heizmann):
             score += 30
+            components |= SIZE_MATCH
         
         # Hose size matching (15 points)
         if self._hose_sizes_match(balflex, heizmann):
             score += 15
+            components |= HOSE_SIZE_MATCH
         
         # Connection type matching (10 points) - Optional
         if self._connections_match(balflex.get('connection_type', ''), heizmann.get('connection_type', '')):
             score += 10
+            components |= CONNECTION_MATCH
         
         # Category matching (5 points)
         if self._categories_match(balflex.get('category', ''), heizmann.get('category', '')):
             score += 5
+            components |= CATEGORY_MATCH
         
-        return score
+        return score, components
     
     def _threads_match(self, balflex_thread: str, heizmann_thread: str) -> bool:
         """Check if thread types match"""
@@ -126,16 +304,7 @@ class FittingsMatcher:
         if bal == heiz:
             return True
         
-        # Thread type equivalents
-        thread_groups = [
-            ['JIC', 'JIC 37', 'JIC 37°', 'SAE J514'],
-            ['ORFS', 'O-RING FACE SEAL'],
-            ['BSP', 'BSPP', 'BSPT', 'G'],
-            ['NPT', 'NPTF'],
-            ['METRIC', 'M', 'DIN'],
-        ]
-        
-        for group in thread_groups:
+        for group in self.THREAD_GROUPS:
             if any(t in bal for t in group) and any(t in heiz for t in group):
                 return True
         
@@ -174,52 +343,44 @@ class FittingsMatcher:
         
         return False
     
-    def _sizes_match(self, balflex: Dict, heizmann: Dict) -> bool:
-        """Check if sizes/DN match"""
-        # Extract dash size from Balflex (e.g., "- 4" -> 4)
+    def _dash_number(self, balflex: Dict) -> Optional[int]:
+        """Dash size of a Balflex fitting (e.g., "- 4" -> 4)"""
         bal_dash = balflex.get('dash_size', '')
-        dash_num = None
         if bal_dash:
             match = re.search(r'-\s*(\d+)', bal_dash)
             if match:
-                dash_num = int(match.group(1))
-        
-        # Extract DN from Heizmann (both 'DN' and 'dn' fields)
+                return int(match.group(1))
+        return None
+    
+    def _dn_number(self, heizmann: Dict) -> Optional[int]:
+        """DN of a Heizmann fitting (both 'DN' and 'dn' fields)"""
         heiz_dn = heizmann.get('DN', '') or heizmann.get('dn', '')
-        dn_num = None
         if heiz_dn:
             match = re.search(r'DN\s*(\d+)', heiz_dn, re.IGNORECASE)
             if match:
-                dn_num = int(match.group(1))
-        
-        # Dash to DN conversion (approximation)
-        # -4 ≈ DN6, -6 ≈ DN10, -8 ≈ DN12, -10 ≈ DN16, -12 ≈ DN20
-        dash_to_dn = {
-            3: 5,
-            4: 6,
-            5: 8,
-            6: 10,
-            8: 12,
-            10: 16,
-            12: 20,
-            16: 25,
-            20: 32,
-            24: 40,
-            32: 50,
-        }
+                return int(match.group(1))
+        return None
+    
+    def _size_key(self, size: str) -> str:
+        return size.strip().replace('"', '')
+    
+    def _sizes_match(self, balflex: Dict, heizmann: Dict) -> bool:
+        """Check if sizes/DN match"""
+        dash_num = self._dash_number(balflex)
+        dn_num = self._dn_number(heizmann)
         
         if dash_num and dn_num:
-            expected_dn = dash_to_dn.get(dash_num)
+            expected_dn = self.DASH_TO_DN.get(dash_num)
             if expected_dn:
                 # Allow ±2 tolerance
-                return abs(expected_dn - dn_num) <= 2
+                return abs(expected_dn - dn_num) <= self.DN_TOLERANCE
         
         # Also check size field (e.g., "1/4"" in Heizmann)
         heiz_size = heizmann.get('size', '')
         bal_hose_inch = balflex.get('hose_size_inch', '')
         
         if heiz_size and bal_hose_inch:
-            if heiz_size.strip().replace('"', '') == bal_hose_inch.strip().replace('"', ''):
+            if self._size_key(heiz_size) == self._size_key(bal_hose_inch):
                 return True
         
         return False
@@ -263,17 +424,23 @@ class FittingsMatcher:
         
         return False
     
-    def _get_match_reason(self, balflex: Dict, heizmann: Dict) -> str:
-        """Generate human-readable match reason"""
+    def _get_match_reason(self, balflex: Dict, heizmann: Dict, components: int = None) -> str:
+        """Generate human-readable match reason
+        
+        `components` are the pair's _score_components bits; without them the
+        match predicates are run again.
+        """
+        if components is None:
+            components = self._score_components(balflex, heizmann)[1]
         reasons = []
         
-        if self._threads_match(balflex.get('thread_type', ''), heizmann.get('thread_type', '')):
+        if components & THREAD_MATCH:
             reasons.append(f"Thread: {balflex.get('thread_type', 'N/A')} ↔ {heizmann.get('thread_type', 'N/A')}")
         
-        if self._connections_match(balflex.get('connection_type', ''), heizmann.get('connection_type', '')):
+        if components & CONNECTION_MATCH:
             reasons.append(f"Connection: {balflex.get('connection_type', 'N/A')} ↔ {heizmann.get('connection_type', 'N/A')}")
         
-        if self._sizes_match(balflex, heizmann):
+        if components & SIZE_MATCH:
             reasons.append(f"Size: {balflex.get('dash_size', 'N/A')} ↔ {heizmann.get('DN', 'N/A')}")
         
         return " | ".join(reasons) if reasons else "General compatibility"
@@ -301,6 +468,7 @@ class FittingsMatcher:
                 'balflex_reference',
                 'heizmann_article',
                 'match_score',
+                'rank',
                 'balflex_category',
                 'heizmann_category',
                 'balflex_dash_size',
@@ -318,8 +486,9 @@ class FittingsMatcher:
             
             df = df[[col for col in column_order if col in df.columns]]
             
-            # Sort by match score
-            df = df.sort_values('match_score', ascending=False)
+            # Sort by match score; ranked candidates stay grouped per Balflex fitting
+            if 'rank' not in df.columns:
+                df = df.sort_values('match_score', ascending=False)
             
             # Save to Excel
             with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
@@ -343,14 +512,24 @@ class FittingsMatcher:
             print("Install with: pip install pandas openpyxl")
 
 
+def _rank_fitting_shard(shared: tuple, start: int, stop: int) -> List:
+    """Worker: ranked candidates of Balflex fittings start..stop-1"""
+    matcher, fittings, valid_heizmann, k, index = shared
+    return [
+        matcher._rank_candidates(fitting, valid_heizmann, k,
+                                 None if index is None else matcher._candidate_indices(fitting, index))
+        for fitting in fittings[start:stop]
+    ]
+
+
 if __name__ == "__main__":
     # Run matching
     matcher = FittingsMatcher(
-        'data/balflex_fittings.json',
+        'data/balflex_fittings_ENHANCED.json',
         'data/heizmann_fittings.json'
     )
     
-    matches = matcher.match()
+    matches = matcher.match(workers=os.cpu_count() or 1, cache_file='data/fittings_matches.cache.json')
     
     # Save results
     matcher.save_matches('data/fittings_matches.json')
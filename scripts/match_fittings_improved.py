@@ -3,16 +3,25 @@ IMPROVED Fittings Matcher
 Uses merged Heizmann data with better thread extraction
 """
 
+import os
 import json
 import re
 from typing import List, Dict
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 
+from top_k import TopK
+from assignment import CANDIDATES_PER_PRODUCT, assign_ranked
+from parallel_match import map_shards
+from match_cache import MatchCache
+
 
 class ImprovedFittingsMatcher:
     """Match fittings with improved data"""
     
+    # Bump when scoring changes; stored match caches of other versions are not reused
+    SCORER_VERSION = '1'
+    
     def __init__(self, balflex_file: str, heizmann_file: str):
         self.balflex_fittings = self._load_json(balflex_file)
         self.heizmann_fittings = self._load_json(heizmann_file)
@@ -22,8 +31,22 @@ class ImprovedFittingsMatcher:
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     
-    def match(self) -> List[Dict]:
-        """Find matches between Balflex and Heizmann fittings"""
+    def match(self, top_k: int = 1, one_to_one: bool = False, workers: int = 1,
+              cache_file: str = None) -> List[Dict]:
+        """Find matches between Balflex and Heizmann fittings
+        
+        top_k > 1 keeps the k best Heizmann fittings per Balflex fitting as
+        consecutive rows with a 'rank' field, best first. one_to_one=True
+        uses every Heizmann fitting at most once, assigned over the
+        CANDIDATES_PER_PRODUCT best candidates of each Balflex fitting.
+        workers > 1 scores shards of the Balflex fittings in parallel
+        processes (see scripts/parallel_match.py), with identical output.
+        cache_file keeps the candidates between runs, so only fittings
+        affected by changes are scored again (see scripts/match_cache.py).
+        """
+        if one_to_one and top_k > 1:
+            raise ValueError("top_k and one_to_one cannot be combined")
+        
         print(f"\nMatching {len(self.balflex_fittings)} Balflex with {len(self.heizmann_fittings)} Heizmann...")
         print("=" * 70)
         
@@ -41,22 +64,35 @@ class ImprovedFittingsMatcher:
         print(f"Valid Heizmann: {len(valid_heizmann)} (excluded {len(self.heizmann_fittings) - len(valid_heizmann)})")
         
         # Match
-        for bal in self.balflex_fittings:
-            best_match = None
-            best_score = 0
-            
-            for heiz in valid_heizmann:
-                score = self._calculate_score(bal, heiz)
-                
-                # Require minimum 55% score and thread compatibility
-                if score > best_score and score >= 55:
-                    # Check thread compatibility
-                    if self._threads_compatible(bal, heiz):
-                        best_score = score
-                        best_match = heiz
-            
-            if best_match:
-                self.matches.append({
+        k = CANDIDATES_PER_PRODUCT if one_to_one else top_k
+        
+        def rank_all(positions):
+            fittings = [self.balflex_fittings[pos] for pos in positions]
+            ranked_matches = []
+            for shard_ranked in map_shards(_rank_fitting_shard, (self, fittings, valid_heizmann, k),
+                                           len(fittings), workers):
+                ranked_matches.extend(shard_ranked)
+            return ranked_matches
+        
+        if cache_file:
+            cache = MatchCache(cache_file, f"ImprovedFittingsMatcher:{self.SCORER_VERSION}", k)
+            ranked_matches = cache.rank(
+                self.balflex_fittings, valid_heizmann, rank_all,
+                lambda pos, indices: self._rank_candidates(self.balflex_fittings[pos], valid_heizmann, k, indices)
+            )
+            cache.save()
+            print(f"✅ {cache.summary()}")
+        else:
+            ranked_matches = rank_all(range(len(self.balflex_fittings)))
+        
+        if one_to_one:
+            ranked_matches, assignment = assign_ranked(ranked_matches)
+            print(f"✅ {assignment.summary()}")
+        
+        for bal, ranked in zip(self.balflex_fittings, ranked_matches):
+            for rank, (best_score, idx, _) in enumerate(ranked, start=1):
+                best_match = valid_heizmann[idx]
+                match = {
                     'balflex_reference': bal.get('reference', ''),
                     'balflex_category': bal.get('category', ''),
                     'balflex_dash_size': bal.get('dash_size', ''),
@@ -72,11 +108,33 @@ class ImprovedFittingsMatcher:
                     
                     'match_score': best_score,
                     'match_reason': self._get_match_reason(bal, best_match)
-                })
+                }
+                if top_k > 1:
+                    match['rank'] = rank
+                self.matches.append(match)
         
         print(f"\n✅ Found {len(self.matches)} matches!")
         return self.matches
     
+    def _rank_candidates(self, bal: Dict, valid_heizmann: List[Dict], k: int, indices: List[int] = None) -> List:
+        """(score, index in valid_heizmann, None) of the k best Heizmann fittings, best first
+        
+        `indices` limits the scan to those positions of valid_heizmann.
+        """
+        top = TopK(k)
+        
+        for idx in (range(len(valid_heizmann)) if indices is None else indices):
+            heiz = valid_heizmann[idx]
+            score = self._calculate_score(bal, heiz)
+            
+            # Require minimum 55% score and thread compatibility
+            if score >= 55:
+                # Check thread compatibility
+                if self._threads_compatible(bal, heiz):
+                    top.push(score, idx)
+        
+        return top.ranked()
+    
     def _calculate_score(self, bal: Dict, heiz: Dict) -> int:
         """Calculate match score"""
         score = 0
@@ -196,6 +254,9 @@ class ImprovedFittingsMatcher:
             'Balflex Reference', 'Balflex Category', 'Balflex Thread', 'Balflex Dash', 'Balflex Hose (mm)',
             'Heizmann Article', 'Heizmann Category', 'Heizmann Thread', 'Heizmann Size', 'Heizmann DN', 'Heizmann Pressure'
         ]
+        ranked = any('rank' in match for match in self.matches)
+        if ranked:
+            headers.append('Rank')
         
         for col, header in enumerate(headers, 1):
             cell = ws.cell(1, col, header)
@@ -218,6 +279,8 @@ class ImprovedFittingsMatcher:
             ws.cell(row_idx, 11, match['heizmann_size'])
             ws.cell(row_idx, 12, match['heizmann_dn'])
             ws.cell(row_idx, 13, match['heizmann_pressure'])
+            if ranked:
+                ws.cell(row_idx, 14, match.get('rank', 1))
         
         # Adjust column widths
         ws.column_dimensions['A'].width = 12
@@ -235,13 +298,19 @@ class ImprovedFittingsMatcher:
         print(f"✅ Saved JSON: {filename}")
 
 
+def _rank_fitting_shard(shared: tuple, start: int, stop: int) -> List:
+    """Worker: ranked candidates of Balflex fittings start..stop-1"""
+    matcher, fittings, valid_heizmann, k = shared
+    return [matcher._rank_candidates(fitting, valid_heizmann, k) for fitting in fittings[start:stop]]
+
+
 if __name__ == "__main__":
     matcher = ImprovedFittingsMatcher(
-        'data/balflex_fittings.json',
+        'data/balflex_fittings_ENHANCED.json',
         'data/heizmann_fittings_merged.json'
     )
     
-    matches = matcher.match()
+    matches = matcher.match(workers=os.cpu_count() or 1, cache_file='data/fittings_matches_improved.cache.json')
     
     # Analyze
     print(f"\n📊 MATCH ANALYSIS:")
@@ -0,0 +1,68 @@
+"""
+Parallel Matching - left-side catalogue sharded across worker processes
+The right side (products, feature records, blocking index) is handed to the
+workers once: inherited copy-on-write through fork where available, otherwise
+pickled once per worker by the pool initializer, never once per task
+"""
+
+import gc
+import multiprocessing
+from typing import Any, Callable, Iterator
+
+
+# Shared state of the current map_shards call, as seen by the worker processes
+_shared = None
+
+
+def _init_worker(shared: Any):
+    global _shared
+    _shared = shared
+
+
+def _run_shard(task: tuple):
+    function, start, stop = task
+    return function(_shared, start, stop)
+
+
+def shard_bounds(count: int, shard_count: int) -> list:
+    """Start/stop boundaries of `shard_count` contiguous, near-equal shards of range(count)"""
+    return [count * i // shard_count for i in range(shard_count + 1)]
+
+
+def map_shards(function: Callable, shared: Any, count: int, workers: int = 1,
+               shards_per_worker: int = 4) -> Iterator:
+    """function(shared, start, stop) over contiguous shards of range(count)
+
+    Results are yielded in shard order whatever order the workers finish in,
+    so concatenating them gives the same output as a serial run. `function`
+    must be a module-level function (tasks carry only its name and bounds).
+    A few shards per worker keeps processes busy when product costs differ.
+    """
+    global _shared
+
+    if count == 0:
+        return
+    if workers <= 1:
+        yield function(shared, 0, count)
+        return
+
+    shard_count = min(count, workers * shards_per_worker)
+    bounds = shard_bounds(count, shard_count)
+    tasks = [(function, bounds[i], bounds[i + 1]) for i in range(shard_count)]
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # Children inherit `shared` from this process; freezing the GC keeps
+        # collections in the children from touching (and copying) its pages
+        _shared = shared
+        gc.freeze()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(shared,))
+
+    try:
+        with pool:
+            # imap hands back shard results in submission order as they finish
+            yield from pool.imap(_run_shard, tasks)
+    finally:
+        _shared = None
+        gc.unfreeze()
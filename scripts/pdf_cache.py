@@ -0,0 +1,105 @@
+"""
+PDF Extraction Cache - pdfplumber output stored per page on disk
+Re-running a parser after changing its row-mapping rules reads tables and text
+from the cache instead of running pdfplumber over the whole catalogue again
+"""
+
+import json
+import zlib
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pdfplumber
+
+from pdf_pages import file_sha256, sidecar_path
+from pdf_layout import PageLayout, layout_text, LAYOUT_ENGINE_VERSION
+
+
+class ExtractionCache:
+    """extract_tables() / extract_text() results keyed by (PDF hash, page, settings)
+
+    Stored in a SQLite file beside the PDF (<name>.cache.sqlite) as
+    zlib-compressed JSON. The settings key covers the extraction settings and
+    the pdfplumber version, so changing either misses the cache; entries of
+    other PDF editions are dropped when the cache is opened.
+    """
+
+    def __init__(self, pdf_path: str, cache_file: Optional[str] = None):
+        self.pdf_path = pdf_path
+        self.cache_file = Path(cache_file) if cache_file else sidecar_path(pdf_path, 'cache.sqlite')
+        self.pdf_hash = file_sha256(pdf_path)
+        self.hits = 0
+        self.misses = 0
+
+        # Parallel parsers write to the same file from several processes
+        self.conn = sqlite3.connect(str(self.cache_file), timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                pdf_sha256 TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                settings_key TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (pdf_sha256, page_num, kind, settings_key)
+            )
+        ''')
+        self.conn.execute('DELETE FROM pages WHERE pdf_sha256 != ?', (self.pdf_hash,))
+        self.conn.commit()
+
+    @staticmethod
+    def settings_key(settings: Optional[Dict]) -> str:
+        """Short hash of extraction settings + pdfplumber version"""
+        payload = json.dumps({'settings': settings or {}, 'pdfplumber': pdfplumber.__version__},
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _cached(self, page_num: int, kind: str, settings: Optional[Dict], compute: Callable):
+        key = self.settings_key(settings)
+        row = self.conn.execute(
+            'SELECT data FROM pages WHERE pdf_sha256 = ? AND page_num = ? AND kind = ? AND settings_key = ?',
+            (self.pdf_hash, page_num, kind, key)
+        ).fetchone()
+        if row is not None:
+            self.hits += 1
+            return json.loads(zlib.decompress(row[0]))
+
+        self.misses += 1
+        value = compute()
+        data = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (pdf_sha256, page_num, kind, settings_key, data) VALUES (?, ?, ?, ?, ?)',
+            (self.pdf_hash, page_num, kind, key, data)
+        )
+        self.conn.commit()
+        return value
+
+    def tables(self, page, page_num: int, table_settings: Optional[Dict] = None):
+        """page.extract_tables(table_settings), cached"""
+        return self._cached(page_num, 'tables', table_settings,
+                            lambda: page.extract_tables(table_settings))
+
+    def text(self, page, page_num: int, **text_settings):
+        """page.extract_text(**text_settings), cached"""
+        return self._cached(page_num, 'text', text_settings,
+                            lambda: page.extract_text(**text_settings))
+
+    def layout(self, page, page_num: int, table_settings: Optional[Dict] = None) -> Dict:
+        """PageLayout(page, table_settings).to_dict(), cached"""
+        settings = {'table_settings': table_settings, 'layout_engine': LAYOUT_ENGINE_VERSION}
+        return self._cached(page_num, 'layout', settings,
+                            lambda: PageLayout(page, table_settings).to_dict())
+
+    def layout_text(self, page, page_num: int) -> str:
+        """pdf_layout.layout_text(page), cached"""
+        settings = {'layout_text': LAYOUT_ENGINE_VERSION}
+        return self._cached(page_num, 'layout_text', settings, lambda: layout_text(page))
+
+    def close(self):
+        self.conn.close()
+
+    def summary(self) -> str:
+        return f"extraction cache: {self.hits} hits, {self.misses} misses ({self.cache_file.name})"
@@ -0,0 +1,157 @@
+"""
+PDF Edition Diff - incremental re-parse of a new catalogue edition
+Each page is fingerprinted from its content stream; pages whose fingerprint
+already appeared in the previous edition reuse that edition's products
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from collections import defaultdict
+from typing import List, Dict, Optional
+
+from pdfminer.pdftypes import resolve1
+
+
+def page_fingerprint(page) -> str:
+    """Hash of a page's decoded content stream(s) and page size
+
+    Two pages with the same fingerprint draw exactly the same text, lines and
+    images (resources are referenced by name from the stream).
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([round(float(v), 2) for v in page.mediabox]).encode('ascii'))
+
+    contents = page.page_obj.contents
+    if not isinstance(contents, list):
+        contents = [contents]
+    for stream in contents:
+        stream = resolve1(stream)
+        if stream is not None:
+            digest.update(stream.get_data())
+
+    return digest.hexdigest()
+
+
+class EditionDiff:
+    """Page fingerprints and per-page products of the last parsed edition
+
+    The snapshot file is rewritten with the new edition after each run, so the
+    next edition is compared against this one. Products are reused only while
+    the parser rules are the same; pass a different `parser_version` (or delete
+    the snapshot) after changing them to force a full parse.
+
+    Page statuses in the report:
+        unchanged - same content at the same page number
+        moved     - same content as a page elsewhere in the previous edition
+        changed   - page number existed before, content is different
+        new       - page number beyond the previous edition's page count
+    Previous pages past the new page count whose content does not appear
+    anymore are listed as removed.
+    """
+
+    def __init__(self, snapshot_file: str, parser_version: str = '1'):
+        self.snapshot_file = Path(snapshot_file)
+        self.parser_version = parser_version
+        self.previous = self._load()
+
+        # fingerprint -> previous page entries (identical pages can repeat)
+        self.by_fingerprint = defaultdict(list)
+        for entry in self.previous.get('pages', []):
+            self.by_fingerprint[entry['fingerprint']].append(entry)
+
+        self.previous_page_count = len(self.previous.get('pages', []))
+        self.pages = {}
+        self.statuses = {}
+        self.matched = set()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if data.get('parser_version') != self.parser_version:
+            print(f"  Edition snapshot was made by parser version {data.get('parser_version')}, ignoring it")
+            return {}
+        return data
+
+    def reuse(self, page, page_num: int) -> Optional[List[Dict]]:
+        """Previous products of this page if its content is unchanged, else None
+
+        Call record() with the freshly parsed products when None is returned.
+        """
+        fingerprint = page_fingerprint(page)
+        self.pages[page_num] = {'page': page_num, 'fingerprint': fingerprint, 'products': []}
+
+        candidates = self.by_fingerprint.get(fingerprint, [])
+        if not candidates:
+            self.statuses[page_num] = 'changed' if page_num <= self.previous_page_count else 'new'
+            return None
+
+        # Prefer the same page number, otherwise the first unused copy
+        match = next((e for e in candidates if e['page'] == page_num), None)
+        if match is None:
+            match = next((e for e in candidates if e['page'] not in self.matched), candidates[0])
+
+        self.matched.add(match['page'])
+        self.statuses[page_num] = 'unchanged' if match['page'] == page_num else 'moved'
+        self.pages[page_num]['previous_page'] = match['page']
+        self.pages[page_num]['products'] = match['products']
+        return list(match['products'])
+
+    def record(self, page_num: int, products: List[Dict]):
+        """Store freshly parsed products of a new or changed page"""
+        self.pages[page_num]['products'] = products
+
+    def report(self) -> Dict:
+        """Per-page change report"""
+        counts = defaultdict(int)
+        for status in self.statuses.values():
+            counts[status] += 1
+
+        # Pages past the end of the new edition; unmatched pages inside it are 'changed'
+        page_count = max(self.statuses, default=0)
+        removed = [e['page'] for e in self.previous.get('pages', [])
+                   if e['page'] > page_count and e['page'] not in self.matched]
+
+        return {
+            'previous_pdf': self.previous.get('pdf_name'),
+            'summary': dict(counts, removed=len(removed)),
+            'pages': [
+                {
+                    'page': page_num,
+                    'status': self.statuses[page_num],
+                    'previous_page': self.pages[page_num].get('previous_page'),
+                    'products': len(self.pages[page_num]['products']),
+                }
+                for page_num in sorted(self.statuses)
+            ],
+            'removed_pages': removed,
+        }
+
+    def save(self, pdf_path: str, report_file: Optional[str] = None) -> Dict:
+        """Write the new snapshot (and the change report) and return the report"""
+        report = self.report()
+
+        snapshot = {
+            'pdf_name': Path(pdf_path).name,
+            'parser_version': self.parser_version,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'pages': [self.pages[page_num] for page_num in sorted(self.pages)],
+        }
+        self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.snapshot_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+
+        report_file = Path(report_file) if report_file else self.snapshot_file.with_name(
+            f"{self.snapshot_file.stem}.changes.json")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        summary = ', '.join(f"{k}: {v}" for k, v in report['summary'].items())
+        print(f"Edition diff vs {report['previous_pdf'] or '(no previous edition)'}: {summary}")
+        print(f"✓ Change report saved to {report_file}")
+        return report
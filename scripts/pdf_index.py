@@ -0,0 +1,195 @@
+"""
+Catalogue Index - series and section headings mapped to page ranges and standards
+Built in one pass over the PDF and stored beside it (<name>.index.json), so
+parsers can target the pages of one series and questions like "which pages
+hold 4SP hoses" are answered without opening the PDF
+
+Usage:
+    python scripts/pdf_index.py catalogue.pdf          # list sections
+    python scripts/pdf_index.py catalogue.pdf 4SP      # pages of matching sections
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import pdfplumber
+
+from pdf_pages import SERIES_NAMES, HOSE_ARTICLE_PATTERN, file_sha256, sidecar_path, iter_pages
+from pdf_layout import fast_extract_text
+
+
+# Bump when the index contents below change so stored indexes are rebuilt
+INDEX_VERSION = 1
+
+STANDARD_PATTERNS = [
+    re.compile(r'DIN\s*EN\s*\d+\s*[A-Z0-9]+', re.IGNORECASE),
+    re.compile(r'SAE\s*(?:J517\s*)?100R\d+[A-Z]*', re.IGNORECASE),
+    re.compile(r'\bISO\s*\d+', re.IGNORECASE),
+]
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Hose reference before the size, e.g. 4SP-04-F -> 4SP, R13-06 -> R13
+REFERENCE_TYPE_PATTERN = re.compile(r'^([A-Z0-9]+)-\d+', re.MULTILINE)
+
+
+def find_model_line(text: str) -> str:
+    """First page line naming a known series, tried in SERIES_NAMES order
+
+    Same result as checking `model in text.upper()` and scanning the lines for
+    each series name, but the text is upper-cased and split only once.
+    """
+    upper = text.upper()
+    lines = None
+    for model in SERIES_NAMES:
+        if model in upper:
+            if lines is None:
+                lines = text.split('\n')
+            for line in lines:
+                if model in line.upper():
+                    return line.strip()
+    return ""
+
+
+def find_standards(text: str) -> List[str]:
+    """Hose standards mentioned on a page (DIN EN / SAE 100R / ISO), in order"""
+    standards = []
+    for pattern in STANDARD_PATTERNS:
+        for match in pattern.finditer(text):
+            standard = WHITESPACE_PATTERN.sub(' ', match.group(0)).strip().upper()
+            standard = standard.replace('J517 ', '')
+            if standard not in standards:
+                standards.append(standard)
+    return standards
+
+
+class CatalogueIndex:
+    """Sections (consecutive pages under the same series heading) of one PDF
+
+    Each section: {'title', 'series', 'pages': [first, last], 'standards',
+    'types'}. `types` are the hose reference prefixes of the section's rows
+    (4SP, R13, 2SC...). The stored index is only used while the PDF hash and
+    INDEX_VERSION match.
+    """
+
+    def __init__(self, pdf_path: str, index_file: Optional[str] = None):
+        self.pdf_path = pdf_path
+        self.index_file = Path(index_file) if index_file else sidecar_path(pdf_path, 'index.json')
+        self.pdf_hash = file_sha256(pdf_path)
+        self.sections = self._load()
+        if self.sections is None:
+            self.sections = self.build()
+            self.save()
+
+    def _load(self) -> Optional[List[Dict]]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if data.get('pdf_sha256') != self.pdf_hash or data.get('version') != INDEX_VERSION:
+            return None
+        return data['sections']
+
+    def build(self) -> List[Dict]:
+        """One pass over the pages; a page without a series heading ends the current section"""
+        print(f"Building catalogue index for {Path(self.pdf_path).name}...")
+        sections = []
+        current = None
+
+        with pdfplumber.open(self.pdf_path) as pdf:
+            for page_num, page in iter_pages(pdf):
+                text = fast_extract_text(page.chars)
+                title = find_model_line(text)
+
+                if not title:
+                    current = None
+                    continue
+
+                if current is None or current['title'] != title:
+                    current = {
+                        'title': title,
+                        'series': next(name for name in SERIES_NAMES if name in title.upper()),
+                        'pages': [page_num, page_num],
+                        'standards': [],
+                        'types': [],
+                    }
+                    sections.append(current)
+                current['pages'][1] = page_num
+
+                for standard in find_standards(text):
+                    if standard not in current['standards']:
+                        current['standards'].append(standard)
+                if HOSE_ARTICLE_PATTERN.search(text):
+                    for hose_type in REFERENCE_TYPE_PATTERN.findall(text):
+                        if hose_type not in current['types']:
+                            current['types'].append(hose_type)
+
+        print(f"✓ {len(sections)} sections indexed")
+        return sections
+
+    def save(self):
+        data = {
+            'pdf_sha256': self.pdf_hash,
+            'version': INDEX_VERSION,
+            'pdf_name': Path(self.pdf_path).name,
+            'sections': self.sections,
+        }
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def find(self, term: str) -> List[Dict]:
+        """Sections whose title, standards or hose types contain `term` (case-insensitive)"""
+        term = WHITESPACE_PATTERN.sub(' ', term).strip().upper()
+        return [
+            section for section in self.sections
+            if term in section['title'].upper()
+            or any(term in standard for standard in section['standards'])
+            or any(term == hose_type.upper() for hose_type in section['types'])
+        ]
+
+    def page_numbers(self, *terms: str) -> List[int]:
+        """Sorted page numbers of all sections matching any of the terms"""
+        pages = set()
+        for term in terms:
+            for section in self.find(term):
+                pages.update(range(section['pages'][0], section['pages'][1] + 1))
+        return sorted(pages)
+
+
+def _format_section(section: Dict) -> str:
+    first, last = section['pages']
+    pages = f"p. {first}" if first == last else f"p. {first}-{last}"
+    details = ', '.join(section['standards'] + section['types'])
+    return f"  {pages:12s} {section['title']}" + (f"  [{details}]" if details else "")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Catalogue index: series -> page ranges")
+    arg_parser.add_argument('pdf', help="Balflex catalogue PDF")
+    arg_parser.add_argument('terms', nargs='*', help="series, standard or hose type, e.g. 4SP, R13, 'EN 856'")
+    arg_parser.add_argument('--rebuild', action='store_true', help="ignore the stored index")
+    args = arg_parser.parse_args()
+
+    if args.rebuild:
+        sidecar_path(args.pdf, 'index.json').unlink(missing_ok=True)
+    index = CatalogueIndex(args.pdf)
+
+    if not args.terms:
+        for section in index.sections:
+            print(_format_section(section))
+        return
+
+    for term in args.terms:
+        sections = index.find(term)
+        print(f"{term}: {len(sections)} sections")
+        for section in sections:
+            print(_format_section(section))
+    print(f"Pages: {index.page_numbers(*args.terms)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+PDF Layout - text lines, header region and table cells from one walk over page.chars
+pdfplumber's extract_tables() filters every character once per table row and
+once per cell, and extract_text() groups the same characters into words again;
+PageLayout assigns each character to its table cell by bisection instead and
+builds the page lines in the same pass
+"""
+
+from bisect import bisect_right
+from typing import List, Dict, Optional
+
+from pdfplumber.utils import extract_text
+from pdfplumber.utils.text import LIGATURES, DEFAULT_X_DENSITY, DEFAULT_X_TOLERANCE, DEFAULT_Y_TOLERANCE
+
+
+# Bump when the output below changes; part of the extraction cache key
+LAYOUT_ENGINE_VERSION = 1
+
+
+def _cluster(objs: List[Dict], tolerance: float, preserve_order: bool) -> List[List[Dict]]:
+    """pdfplumber's cluster_objects() on 'top', without the generic key machinery"""
+    values = sorted({obj['top'] for obj in objs})
+    cluster_of = {}
+    index = 0
+    last = values[0]
+    for value in values:
+        if value > last + tolerance:
+            index += 1
+        cluster_of[value] = index
+        last = value
+
+    if preserve_order:
+        # Consecutive objects of the same cluster form one group
+        groups = []
+        prev = None
+        for obj in objs:
+            idx = cluster_of[obj['top']]
+            if idx != prev:
+                groups.append([])
+                prev = idx
+            groups[-1].append(obj)
+        return groups
+
+    groups = [[] for _ in range(index + 1)]
+    for obj in objs:
+        groups[cluster_of[obj['top']]].append(obj)
+    return [group for group in groups if group]
+
+
+def _words(chars: List[Dict]) -> List[Dict]:
+    """Words of upright, left-to-right text with pdfplumber's default WordExtractor rules"""
+    words = []
+
+    def flush(word_chars):
+        if word_chars:
+            words.append({
+                'text': ''.join(LIGATURES.get(c['text'], c['text'] or '') for c in word_chars),
+                'top': min(c['top'] for c in word_chars),
+                'bottom': max(c['bottom'] for c in word_chars),
+                'x0': min(c['x0'] for c in word_chars),
+                'x1': max(c['x1'] for c in word_chars),
+            })
+
+    for line in _cluster(chars, DEFAULT_Y_TOLERANCE, preserve_order=False):
+        line.sort(key=lambda c: c['x0'])
+        current = []
+        for char in line:
+            if char['text'].isspace():
+                flush(current)
+                current = []
+            elif current and (char['x0'] < current[-1]['x0']
+                              or char['x0'] > current[-1]['x1'] + DEFAULT_X_TOLERANCE
+                              or abs(char['top'] - current[-1]['top']) > DEFAULT_Y_TOLERANCE):
+                flush(current)
+                current = [char]
+            else:
+                current.append(char)
+        flush(current)
+
+    return words
+
+
+def _text_lines(chars: List[Dict], preserve_order: bool) -> List[List[Dict]]:
+    """Words grouped into lines, as extract_text() (preserve_order=False) or
+    page.extract_text() (preserve_order=True) group them"""
+    words = _words(chars)
+    if not words:
+        return []
+    return _cluster(words, DEFAULT_Y_TOLERANCE, preserve_order)
+
+
+def fast_extract_text(chars: List[Dict]) -> str:
+    """pdfplumber.utils.extract_text(chars) with default settings"""
+    if not chars:
+        return ""
+    if not all(c['upright'] for c in chars):
+        # Rotated text follows other direction rules; leave it to pdfplumber
+        return extract_text(chars)
+    return '\n'.join(' '.join(w['text'] for w in line) for line in _text_lines(chars, False))
+
+
+def layout_text(page, x_density: float = DEFAULT_X_DENSITY) -> str:
+    """Page text with column positions kept (one output line per text line)
+
+    Each word starts at column round(x0 / x_density), like
+    page.extract_text(layout=True), but without the blank lines that mimic
+    vertical spacing. Table rows come out as aligned columns, which is what
+    the text-regex parser (balflex_parser.py) expects.
+    """
+    chars = page.chars
+    if not chars:
+        return ""
+    if not all(c['upright'] for c in chars):
+        lines = page.extract_text(layout=True).split('\n')
+        return '\n'.join(line.rstrip() for line in lines if line.strip())
+
+    x_shift = page.bbox[0]
+    out = []
+    for line_words in _text_lines(chars, preserve_order=True):
+        line = ''
+        for word in line_words:
+            column = round((word['x0'] - x_shift) / x_density)
+            line += ' ' * max(min(1, len(line)), column - len(line)) + word['text']
+        out.append(line)
+    return '\n'.join(out)
+
+
+class _TableGrid:
+    """Cell lookup for one table found by page.find_tables()
+
+    Cell edges split the table into elementary slots; every slot belongs to at
+    most one cell, so a character's cell is two bisections away.
+    """
+
+    def __init__(self, table):
+        self.bbox = table.bbox
+        self.rows = [row.cells for row in table.rows]
+        self.xs = sorted({v for cell in table.cells for v in (cell[0], cell[2])})
+        self.ys = sorted({v for cell in table.cells for v in (cell[1], cell[3])})
+
+        self.slots = {}
+        for row_idx, cells in enumerate(self.rows):
+            for col_idx, cell in enumerate(cells):
+                if cell is None:
+                    continue
+                x0, top, x1, bottom = cell
+                for i in range(self.xs.index(x0), self.xs.index(x1)):
+                    for j in range(self.ys.index(top), self.ys.index(bottom)):
+                        self.slots[(i, j)] = (row_idx, col_idx)
+
+        self.cell_chars = {}
+
+    def add(self, char: Dict, h_mid: float, v_mid: float):
+        """Put a character into the cell containing its midpoint, if any"""
+        x0, top, x1, bottom = self.bbox
+        if not (x0 <= h_mid < x1 and top <= v_mid < bottom):
+            return
+
+        key = self.slots.get((bisect_right(self.xs, h_mid) - 1, bisect_right(self.ys, v_mid) - 1))
+        if key is not None:
+            self.cell_chars.setdefault(key, []).append(char)
+
+    def extract(self) -> List[List[Optional[str]]]:
+        """Same structure and cell texts as pdfplumber's Table.extract()"""
+        table = []
+        for row_idx, cells in enumerate(self.rows):
+            row = []
+            for col_idx, cell in enumerate(cells):
+                if cell is None:
+                    row.append(None)
+                    continue
+                chars = self.cell_chars.get((row_idx, col_idx))
+                row.append(fast_extract_text(chars) if chars else "")
+            table.append(row)
+        return table
+
+
+class PageLayout:
+    """Lines, header region and table cells of one page
+
+    - `tables`: same as page.extract_tables(table_settings)
+    - `text`: same as page.extract_text()
+    - `lines`: [{'text', 'top', 'bottom', 'x0', 'x1'}] in reading order
+    - `header_lines`: lines above the first table (model name, standard...)
+    """
+
+    def __init__(self, page, table_settings: Optional[Dict] = None):
+        # Table edges come from lines/rects, not from characters
+        self.grids = [_TableGrid(table) for table in page.find_tables(table_settings)]
+        self.lines = []
+        self._text = None
+        self._walk(page, page.chars)
+        self.tables = [grid.extract() for grid in self.grids]
+
+    def _walk(self, page, chars: List[Dict]):
+        for char in chars:
+            h_mid = (char['x0'] + char['x1']) / 2
+            v_mid = (char['top'] + char['bottom']) / 2
+            for grid in self.grids:
+                grid.add(char, h_mid, v_mid)
+
+        if not chars:
+            return
+        if not all(c['upright'] for c in chars):
+            # Rotated text follows other direction rules; leave it to pdfplumber
+            self._text = page.extract_text()
+            self.lines = [{key: line[key] for key in ('text', 'top', 'bottom', 'x0', 'x1')}
+                          for line in page.extract_text_lines(strip=False, return_chars=False)]
+            return
+
+        # Words and lines exactly as page.extract_text() groups them
+        for line_words in _text_lines(chars, preserve_order=True):
+            self.lines.append({
+                'text': ' '.join(word['text'] for word in line_words),
+                'top': min(word['top'] for word in line_words),
+                'bottom': max(word['bottom'] for word in line_words),
+                'x0': min(word['x0'] for word in line_words),
+                'x1': max(word['x1'] for word in line_words),
+            })
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        return '\n'.join(line['text'] for line in self.lines)
+
+    @property
+    def header_lines(self) -> List[str]:
+        if not self.grids:
+            return [line['text'] for line in self.lines]
+        table_top = min(grid.bbox[1] for grid in self.grids)
+        return [line['text'] for line in self.lines if line['bottom'] <= table_top]
+
+    def to_dict(self) -> Dict:
+        """Plain data for caching"""
+        return {'tables': self.tables, 'text': self.text, 'header_lines': self.header_lines}
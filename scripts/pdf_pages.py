@@ -0,0 +1,194 @@
+"""
+PDF Page Helpers - cheap page pre-classification for the Balflex catalogue parsers
+Pages are classified from their raw character stream (no word/line layout and
+no table finding), and the result is stored beside the PDF for later runs
+"""
+
+import re
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+# Bump when the features below change so stored classifications are rebuilt
+CLASSIFIER_VERSION = 1
+
+HOSE_ARTICLE_PATTERN = re.compile(r'10\.\d{4}\.\d{2}')
+FITTING_ARTICLE_PATTERN = re.compile(r'\d{2}\.\d{3,4}\.\d{2,4}')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Series names, compared without spaces (the char stream may not contain any)
+SERIES_NAMES = [
+    'POWERSPIR BESTFLEX',
+    'BALMASTER BESTFLEX',
+    'BALPAC IMPACTUS',
+    'TEXMASTER',
+    'BALFLON',
+    'FORZA',
+    'MULTIFLEX',
+    'MULTIPURPOSE',
+]
+
+
+_hash_memo = {}
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file (used to tie cached data to one PDF edition)
+
+    Remembered per (path, size, mtime) so several caches on the same PDF
+    only read it once.
+    """
+    stat = Path(path).stat()
+    memo_key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def page_char_text(page) -> str:
+    """Concatenated characters of a page in content-stream order, without layout"""
+    return ''.join(char['text'] for char in page.chars)
+
+
+def classify_page(page) -> Dict:
+    """Cheap features of a page, taken from its raw character stream
+
+    Words are not separated in the char stream, so every check is a substring
+    test on the upper-cased, whitespace-free text. Anything extract_text()
+    would find inside one word is found here too.
+    """
+    compact = WHITESPACE_PATTERN.sub('', page_char_text(page)).upper()
+
+    return {
+        'has_reference': 'REFERENCE' in compact,
+        'has_dn': 'DN' in compact,
+        'hose_articles': len(HOSE_ARTICLE_PATTERN.findall(compact)),
+        'fitting_articles': len(FITTING_ARTICLE_PATTERN.findall(compact)),
+        'series': [name for name in SERIES_NAMES if name.replace(' ', '') in compact],
+    }
+
+
+def iter_pages(pdf, page_numbers: Optional[Iterable[int]] = None,
+               release: bool = True) -> Iterator[Tuple[int, object]]:
+    """Yield (page_num, page) for 1-based page numbers of an open PDF
+
+    pdfplumber keeps every page's parsed layout (chars, lines, rects...) on the
+    Page object until the PDF is closed, so memory grows with the page count.
+    With `release` each page's caches are dropped once the caller moves on,
+    which keeps a whole-catalogue run within the memory of a single page.
+    """
+    if page_numbers is None:
+        page_numbers = range(1, len(pdf.pages) + 1)
+
+    for page_num in page_numbers:
+        page = pdf.pages[page_num - 1]
+        try:
+            yield page_num, page
+        finally:
+            if release:
+                page.close()
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """Peak resident memory of this process and of its finished child processes"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: no resource module, psutil reports the peak working set
+        try:
+            import psutil
+        except ImportError:
+            return {'self': None, 'children': None}
+        info = psutil.Process().memory_info()
+        return {'self': getattr(info, 'peak_wset', info.rss) / 1048576, 'children': None}
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1048576 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit,
+    }
+
+
+def memory_report(workers: bool = False) -> str:
+    """One line for the end of a parser run (workers: also show the largest child)"""
+    peak = peak_rss_mb()
+    if peak['self'] is None:
+        return "Peak RSS: unavailable (install psutil)"
+
+    line = f"Peak RSS: {peak['self']:.0f} MB"
+    if workers and peak['children']:
+        line += f" (largest worker: {peak['children']:.0f} MB)"
+    return line
+
+
+def sidecar_path(pdf_path: str, suffix: str) -> Path:
+    """File stored beside the PDF, e.g. catalogue.pdf -> catalogue.pages.json"""
+    path = Path(pdf_path)
+    return path.with_name(f"{path.stem}.{suffix}")
+
+
+class PageClassCache:
+    """Page classifications of one PDF, persisted beside it as <name>.pages.json
+
+    The stored data is only used while the PDF hash and the classifier version
+    match; otherwise every page is classified again.
+    """
+
+    def __init__(self, pdf_path: str, cache_file: Optional[str] = None):
+        self.pdf_path = pdf_path
+        self.cache_file = Path(cache_file) if cache_file else sidecar_path(pdf_path, 'pages.json')
+        self.pdf_hash = file_sha256(pdf_path)
+        self.pages = self._load()
+        self.dirty = False
+
+    def _load(self) -> Dict[int, Dict]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if data.get('pdf_sha256') != self.pdf_hash or data.get('version') != CLASSIFIER_VERSION:
+            return {}
+
+        return {int(page_num): features for page_num, features in data.get('pages', {}).items()}
+
+    def get(self, page, page_num: int) -> Dict:
+        """Stored features of a page, classifying it if needed"""
+        features = self.pages.get(page_num)
+        if features is None:
+            features = classify_page(page)
+            self.pages[page_num] = features
+            self.dirty = True
+        return features
+
+    def update(self, pages: Dict[int, Dict]):
+        """Merge classifications made elsewhere (e.g. in worker processes)"""
+        for page_num, features in pages.items():
+            if page_num not in self.pages:
+                self.pages[page_num] = features
+                self.dirty = True
+
+    def save(self):
+        """Write classifications beside the PDF if anything new was classified"""
+        if not self.dirty:
+            return
+
+        data = {
+            'pdf_sha256': self.pdf_hash,
+            'version': CLASSIFIER_VERSION,
+            'pages': {str(page_num): self.pages[page_num] for page_num in sorted(self.pages)},
+        }
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        self.dirty = False
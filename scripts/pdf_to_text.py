@@ -0,0 +1,79 @@
+"""
+PDF to Layout Text - column-aligned catalogue text straight from the PDF
+Replaces the hand-made balflex_catalog.txt dump: pages are converted in
+parallel and cached per page by PDF hash, so re-runs only read the cache
+"""
+
+import sys
+import multiprocessing
+from typing import List, Iterator
+
+import pdfplumber
+
+from pdf_pages import iter_pages
+from pdf_cache import ExtractionCache
+from pdf_layout import layout_text
+
+
+def _convert_pages(pdf_path: str, start: int, stop: int, use_cache: bool = True) -> List[str]:
+    """Layout text of pages start..stop-1"""
+    cache = ExtractionCache(pdf_path) if use_cache else None
+    texts = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in iter_pages(pdf, range(start, stop)):
+            texts.append(cache.layout_text(page, page_num) if cache else layout_text(page))
+    if cache:
+        cache.close()
+    return texts
+
+
+def _convert_chunk(chunk: tuple) -> List[str]:
+    """Worker: `chunk` is (pdf_path, start, stop, use_cache)"""
+    return _convert_pages(*chunk)
+
+
+def iter_page_texts(pdf_path: str, workers: int = 1, use_cache: bool = True) -> Iterator[str]:
+    """Yield the layout text of every page in page order"""
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+
+    if workers <= 1:
+        yield from _convert_pages(pdf_path, 1, total_pages + 1, use_cache)
+        return
+
+    # Same chunking as the table parser: a few contiguous ranges per worker
+    chunk_count = min(total_pages, workers * 4)
+    bounds = [1 + total_pages * i // chunk_count for i in range(chunk_count + 1)]
+    chunks = [(pdf_path, bounds[i], bounds[i + 1], use_cache) for i in range(chunk_count)]
+
+    with multiprocessing.Pool(workers) as pool:
+        for texts in pool.imap(_convert_chunk, chunks):
+            yield from texts
+
+
+def convert(pdf_path: str, output_file: str, workers: int = 1, use_cache: bool = True) -> int:
+    """Write the catalogue's layout text (pages separated by form feeds); returns page count"""
+    pages = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for text in iter_page_texts(pdf_path, workers, use_cache):
+            if pages:
+                f.write('\n\f\n')
+            f.write(text)
+            pages += 1
+        f.write('\n')
+
+    print(f"✓ Wrote layout text of {pages} pages to {output_file}")
+    return pages
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python pdf_to_text.py <catalogue.pdf> <output.txt> [workers]")
+        return
+
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (multiprocessing.cpu_count() or 1)
+    convert(sys.argv[1], sys.argv[2], workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Pressarmaturen Matcher - Heizmann Serie X press fittings against Balflex fittings
+Both datasets are normalized once into feature records, and every Heizmann
+item is scored only against Balflex fittings of its standard (plus those
+without a standard): a standard mismatch scores 0, so the others never match
+"""
+
+import re
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from top_k import TopK
+
+
+STANDARDS = ['JIS', 'BSP', 'NPT', 'JIC', 'ORFS', 'SAE', 'ISO', 'DIN']
+MIN_SCORE = 40
+
+
+# Parse DN from identification field
+def extract_dn_from_identification(ident):
+    """DKM-K DN6 → 6"""
+    if not ident:
+        return None
+
+    match = re.search(r'DN\s*(\d+)', ident, re.IGNORECASE)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+# Parse thread size from identification
+def extract_thread_from_identification(ident):
+    """DKM-K DN6 M16X1,5 → M16X1.5"""
+    if not ident:
+        return None
+
+    # M14X1.5, G1/4-19, etc.
+    match = re.search(r'([MG]\d+[X/][\d.,-]+)', ident, re.IGNORECASE)
+    if match:
+        return match.group(1).replace(',', '.')
+    return None
+
+
+# Normalize standard names
+def normalize_standard(std):
+    """JIS 8363 → JIS, ISO 8434-6 → ISO"""
+    if not std:
+        return None
+
+    std_upper = std.upper()
+
+    # Extract base standard
+    for base in STANDARDS:
+        if base in std_upper:
+            return base
+
+    return None
+
+
+# Normalize seat type
+def normalize_seat_type(seat):
+    """60° Innenkonus → 60° Cone, 60° Cone Seat → 60° Cone"""
+    if not seat:
+        return None
+
+    # Extract degree
+    match = re.search(r'(\d+)°', seat)
+    if match:
+        return f"{match.group(1)}° Cone"
+
+    if 'flat' in seat.lower():
+        return "Flat Face"
+
+    if 'o-ring' in seat.lower() or 'oring' in seat.lower():
+        return "O-Ring"
+
+    return None
+
+
+# Determine gender from connection type and identification
+def determine_gender(heizmann_item):
+    """Innengewinde → Female, Aussengewinde → Male"""
+    connection = heizmann_item.get('connection_type', '')
+    ident = heizmann_item.get('identification', '')
+    model = heizmann_item.get('model', '')
+
+    # Connection type based
+    if connection:
+        if 'innengewinde' in connection.lower() or 'innenkegel' in connection.lower():
+            return 'Female'
+        if 'aussengewinde' in connection.lower() or 'aussenkegel' in connection.lower():
+            return 'Male'
+
+    # Identification based
+    combined = f"{model} {ident}".lower()
+
+    female_keywords = ['muffe', 'mutter', 'female', 'socket', 'coupler']
+    male_keywords = ['nippel', 'stecker', 'male', 'plug', 'stem']
+
+    for keyword in female_keywords:
+        if keyword in combined:
+            return 'Female'
+
+    for keyword in male_keywords:
+        if keyword in combined:
+            return 'Male'
+
+    return 'Unknown'
+
+
+def heizmann_features(heizmann_item: Dict) -> Dict:
+    """Normalized fields of a Heizmann item used by score_features"""
+    return {
+        'dn': extract_dn_from_identification(heizmann_item.get('identification')),
+        'standard': normalize_standard(heizmann_item.get('standard')),
+        'seat': normalize_seat_type(heizmann_item.get('seat_type')),
+        'gender': determine_gender(heizmann_item),
+    }
+
+
+def balflex_features(balflex_item: Dict) -> Dict:
+    """Normalized fields of a Balflex fitting used by score_features"""
+    dn = None
+    if balflex_item.get('hose_size_mm'):
+        try:
+            dn = int(float(balflex_item['hose_size_mm']))
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    return {
+        'dn': dn,
+        'standard': normalize_standard(balflex_item.get('standard')),
+        'seat': normalize_seat_type(balflex_item.get('seat_type')),
+        'gender': balflex_item.get('gender'),
+    }
+
+
+def score_features(heizmann: Dict, balflex: Dict) -> Tuple[int, List[str]]:
+    """
+    Scoring system:
+    - Standard match: 40 points (mandatory)
+    - DN match: 30 points
+    - Seat type match: 20 points
+    - Gender match: 10 points
+    Total: 100 points
+    Minimum: 40 points (only standard)
+    """
+    score = 0
+    reasons = []
+
+    # 1. STANDARD (Mandatory - 40 points)
+    # If either doesn't have standard, skip this criterion but allow match
+    if heizmann['standard'] and balflex['standard']:
+        if heizmann['standard'] == balflex['standard']:
+            score += 40
+            reasons.append(f"Standard: {heizmann['standard']}")
+        else:
+            return 0, []  # No match if standards don't match
+
+    # 2. DN (30 points)
+    heizmann_dn, balflex_dn = heizmann['dn'], balflex['dn']
+    if heizmann_dn and balflex_dn:
+        if heizmann_dn == balflex_dn:
+            score += 30
+            reasons.append(f"DN: {heizmann_dn}")
+        elif abs(heizmann_dn - balflex_dn) <= 2:
+            score += 15  # Partial match for close DN
+            reasons.append(f"DN close: {heizmann_dn}≈{balflex_dn}")
+
+    # 3. SEAT TYPE (20 points)
+    if heizmann['seat'] and balflex['seat']:
+        if heizmann['seat'] == balflex['seat']:
+            score += 20
+            reasons.append(f"Seat: {heizmann['seat']}")
+
+    # 4. GENDER (10 points)
+    heizmann_gender, balflex_gender = heizmann['gender'], balflex['gender']
+    if heizmann_gender and balflex_gender:
+        if heizmann_gender == balflex_gender:
+            score += 10
+            reasons.append(f"Gender: {heizmann_gender}")
+        elif heizmann_gender != 'Unknown' and balflex_gender != 'Unknown':
+            score -= 10  # Penalty for gender mismatch
+            reasons.append(f"Gender mismatch: {heizmann_gender}≠{balflex_gender}")
+
+    return score, reasons
+
+
+def calculate_match_score(heizmann_item: Dict, balflex_item: Dict) -> Tuple[int, List[str]]:
+    """Score of one pair of raw items, normalizing both (see score_features)"""
+    return score_features(heizmann_features(heizmann_item), balflex_features(balflex_item))
+
+
+def build_standard_index(balflex: List[Dict]) -> Dict[Optional[str], List[int]]:
+    """Balflex positions by normalized standard; None holds the standard-less ones"""
+    index = defaultdict(list)
+    for idx, features in enumerate(balflex):
+        index[features['standard']].append(idx)
+    return dict(index)
+
+
+class PressarmaturenMatcher:
+    """Best Balflex fittings for every Heizmann press fitting"""
+
+    def __init__(self, heizmann_data: List[Dict], balflex_data: List[Dict]):
+        self.heizmann_data = heizmann_data
+        self.balflex_data = balflex_data
+        self.comparisons = 0
+
+    def match(self, top_k: int = 1, blocking: bool = True) -> List[Dict]:
+        """Match rows (Heizmann_*, Balflex_*, Match_*) of the top_k best Balflex fittings per Heizmann item
+
+        With blocking, a Heizmann item with a standard is scored against the
+        Balflex fittings of that standard and those without one only; every
+        other pair scores 0. Without blocking every pair is scored. Both give
+        the same rows.
+        """
+        heizmann = [heizmann_features(item) for item in self.heizmann_data]
+        balflex = [balflex_features(item) for item in self.balflex_data]
+        index = build_standard_index(balflex) if blocking else None
+        every_fitting = range(len(balflex))
+        candidates_by_standard = {}
+        self.comparisons = 0
+
+        matches = []
+        for heizmann_item, features in zip(self.heizmann_data, heizmann):
+            standard = features['standard']
+            if index is None or standard is None:
+                candidates = every_fitting
+            else:
+                if standard not in candidates_by_standard:
+                    # Position order, so equal scores rank as in a full scan
+                    candidates_by_standard[standard] = list(heapq.merge(index.get(standard, []),
+                                                                        index.get(None, [])))
+                candidates = candidates_by_standard[standard]
+
+            top = TopK(top_k)
+            for idx in candidates:
+                score, reasons = score_features(features, balflex[idx])
+                if score >= MIN_SCORE:
+                    top.push(score, idx, reasons)
+            self.comparisons += len(candidates)
+
+            for rank, (best_score, idx, best_reasons) in enumerate(top.ranked(), start=1):
+                matches.append(self._match_row(heizmann_item, features, self.balflex_data[idx],
+                                               best_score, best_reasons, rank if top_k > 1 else None))
+
+        return matches
+
+    def _match_row(self, heizmann_item: Dict, features: Dict, best_match: Dict, best_score: int,
+                   best_reasons: List[str], rank: Optional[int]) -> Dict:
+        match = {
+            # Heizmann
+            'Heizmann_Model': heizmann_item['model'],
+            'Heizmann_Article': heizmann_item['article_number'],
+            'Heizmann_Reference': heizmann_item['reference'],
+            'Heizmann_DN': features['dn'],
+            'Heizmann_Standard': heizmann_item.get('standard'),
+            'Heizmann_Seat_Type': heizmann_item.get('seat_type'),
+            'Heizmann_Connection': heizmann_item.get('connection_type'),
+            'Heizmann_Identification': heizmann_item.get('identification'),
+            'Heizmann_URL': heizmann_item['url'],
+
+            # Balflex
+            'Balflex_Reference': best_match['reference'],
+            'Balflex_Article': best_match['article_number'],
+            'Balflex_Product_Type': best_match.get('product_type'),
+            'Balflex_DN_mm': best_match.get('hose_size_mm'),
+            'Balflex_Standard': best_match.get('standard'),
+            'Balflex_Seat_Type': best_match.get('seat_type'),
+            'Balflex_Gender': best_match.get('gender'),
+            'Balflex_Thread_Size': best_match.get('thread_size'),
+
+            # Match info
+            'Match_Score': best_score,
+            'Match_Reasons': ', '.join(best_reasons)
+        }
+        if rank is not None:
+            match['Rank'] = rank
+        return match
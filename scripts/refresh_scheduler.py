@@ -0,0 +1,206 @@
+"""
+Refresh Scheduler
+Plans recurring Heizmann crawls so stale and frequently-changing pages go first
+"""
+
+import json
+import math
+import time
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional
+
+
+class RefreshScheduler:
+    """Keep per-URL fetch history and turn it into a crawl plan within a request budget
+
+    Each product URL gets a record with its last fetch time, last change time,
+    a content hash and fetch/change counters. The change rate is estimated with
+    the Cho & Garcia-Molina estimator, and each URL's priority is the estimated
+    probability that it changed since it was last fetched. URLs that were never
+    fetched always come first.
+
+    The scheduler does not know about any particular scraper. A scraper asks for
+    `plan()` with the links it found and calls `record()` with the data it
+    extracted from each page.
+    """
+
+    def __init__(self, state_file: str, default_interval_days: float = 7.0):
+        self.state_file = Path(state_file)
+        # Assumed change interval for pages that never changed so far
+        self.default_interval = default_interval_days * 86400
+        self.pages = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        """Load crawl history from JSON file"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save(self):
+        """Save crawl history to JSON file"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.pages, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def content_hash(data) -> str:
+        """Stable hash of the data extracted from a page (variants, specs...)"""
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def record(self, url: str, data, fetched_at: Optional[float] = None) -> bool:
+        """Record a fetch of `url` and return True if its content changed"""
+        now = fetched_at if fetched_at is not None else time.time()
+        new_hash = self.content_hash(data)
+
+        entry = self.pages.get(url)
+        if entry is None:
+            self.pages[url] = {
+                'first_fetched': now,
+                'last_fetched': now,
+                'last_changed': now,
+                'content_hash': new_hash,
+                'fetch_count': 1,
+                'change_count': 0,
+            }
+            return True
+
+        changed = entry['content_hash'] != new_hash
+        entry['fetch_count'] += 1
+        entry['last_fetched'] = now
+        if changed:
+            entry['change_count'] += 1
+            entry['last_changed'] = now
+            entry['content_hash'] = new_hash
+
+        return changed
+
+    def change_rate(self, url: str) -> float:
+        """Estimated changes per second for a URL"""
+        entry = self.pages.get(url)
+        if not entry or entry['fetch_count'] < 2:
+            return 1.0 / self.default_interval
+
+        # Cho & Garcia-Molina: r = -log((n - X + 0.5) / (n + 0.5)) / I
+        # n = observed intervals, X = intervals with a detected change,
+        # I = mean interval between fetches
+        n = entry['fetch_count'] - 1
+        changes = min(entry['change_count'], n)
+        span = entry['last_fetched'] - entry['first_fetched']
+        if span <= 0:
+            return 1.0 / self.default_interval
+
+        mean_interval = span / n
+        rate = -math.log((n - changes + 0.5) / (n + 0.5)) / mean_interval
+
+        # Pages that never changed are still revisited now and then
+        return max(rate, 1.0 / (self.default_interval * 4))
+
+    def priority(self, url: str, now: Optional[float] = None) -> float:
+        """Probability that the page changed since its last fetch (1.0 = never fetched)"""
+        entry = self.pages.get(url)
+        if not entry:
+            return 1.0
+
+        now = now if now is not None else time.time()
+        age = max(0.0, now - entry['last_fetched'])
+        return 1.0 - math.exp(-self.change_rate(url) * age)
+
+    def plan(self, urls: Iterable, budget: Optional[int] = None, now: Optional[float] = None) -> List:
+        """Order candidate URLs by staleness and keep at most `budget` of them
+
+        `urls` may hold plain URLs or (name, url, ...) tuples as returned by the
+        scrapers' `_get_product_links()`; the URL is taken from position 1.
+        """
+        now = now if now is not None else time.time()
+
+        items = list(urls)
+        keyed = []
+        for idx, item in enumerate(items):
+            url = item if isinstance(item, str) else item[1]
+            # Ties keep the scraper's original link order
+            keyed.append((-self.priority(url, now), idx, item))
+
+        keyed.sort(key=lambda k: (k[0], k[1]))
+        planned = [item for _, _, item in keyed]
+
+        if budget is not None:
+            planned = planned[:budget]
+
+        return planned
+
+    def summary(self, now: Optional[float] = None) -> Dict:
+        """Small overview of the crawl history"""
+        now = now if now is not None else time.time()
+        total = len(self.pages)
+        stale = sum(1 for url in self.pages if self.priority(url, now) >= 0.5)
+        return {
+            'tracked_pages': total,
+            'likely_changed': stale,
+            'total_changes': sum(e['change_count'] for e in self.pages.values()),
+        }
+
+
+def merge_refreshed(previous: List[Dict], fresh: List[Dict], refreshed_urls: Iterable[str],
+                    url_key: str = 'source_url') -> List[Dict]:
+    """Combine a partial refresh with the previous full product list
+
+    Products from pages fetched in this run replace the previous ones; products
+    from pages that were not in the plan are kept as they were.
+    """
+    refreshed = set(refreshed_urls)
+    kept = [p for p in previous if p.get(url_key) not in refreshed]
+    return kept + list(fresh)
+
+
+def merge_with_output(output_file: str, fresh: List[Dict], refreshed_urls: Iterable[str],
+                      url_key: str = 'source_url') -> List[Dict]:
+    """merge_refreshed against the product list currently in `output_file`
+
+    A refresh run fetches only part of the catalogue, so its products must not
+    replace the whole file; a missing file counts as an empty catalogue.
+    """
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        previous = []
+    return merge_refreshed(previous, fresh, refreshed_urls, url_key=url_key)
+
+
+def add_refresh_arguments(arg_parser, default_state: str):
+    """--refresh-budget / --refresh-state options shared by the scraper scripts"""
+    arg_parser.add_argument('--refresh-budget', type=int, default=None,
+                            help="refresh run: fetch only the N stalest product pages")
+    arg_parser.add_argument('--refresh-state', default=default_state,
+                            help="crawl history used to plan refresh runs")
+
+
+def scheduler_from_args(args) -> Optional[RefreshScheduler]:
+    """RefreshScheduler for a refresh run, None for a full crawl"""
+    if args.refresh_budget is None:
+        return None
+    return RefreshScheduler(args.refresh_state)
+
+
+def main():
+    """Show the current crawl plan stored in a state file"""
+    import sys
+
+    state_file = sys.argv[1] if len(sys.argv) > 1 else 'data/heizmann_refresh_state.json'
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    scheduler = RefreshScheduler(state_file)
+    plan = scheduler.plan(scheduler.pages.keys(), budget=budget)
+
+    print(f"Tracked pages: {len(scheduler.pages)}")
+    print(f"Next {len(plan)} pages to refresh:")
+    for url in plan:
+        print(f"  {scheduler.priority(url):.2f}  {url}")
+
+
+if __name__ == '__main__':
+    main()
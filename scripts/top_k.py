@@ -0,0 +1,45 @@
+"""
+Top-k Selection - the k best scored candidates of one product, kept while scoring
+A bounded min-heap holds the current k best, so alternatives to the best match
+come out of the same scoring loop instead of another full pass
+"""
+
+import heapq
+from typing import Any, List, Tuple
+
+
+class TopK:
+    """k best (score, index, item) pushes, ranked by score; earlier index wins ties
+
+    With k=1 the single entry is exactly what a `score > best_score` loop
+    keeps: the first candidate with the highest score.
+    """
+
+    def __init__(self, k: int = 1):
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.k = k
+        # Min-heap keyed by (score, -index): the root is the entry to drop next
+        self.heap = []
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, score: float, index: int, item: Any = None):
+        entry = (score, -index, item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def full(self) -> bool:
+        return len(self.heap) == self.k
+
+    def min_score(self) -> float:
+        """Lowest kept score (the k-th best once full)"""
+        return self.heap[0][0]
+
+    def ranked(self) -> List[Tuple[float, int, Any]]:
+        """(score, index, item), best first"""
+        entries = sorted(self.heap, key=lambda entry: (-entry[0], -entry[1]))
+        return [(score, -neg_index, item) for score, neg_index, item in entries]
@@ -0,0 +1,73 @@
+"""Check: every MatchCache invalidation rule against a full rematch
+
+Run from the repo root:  python scripts/verify_match_cache.py [balflex] [heizmann]
+Each step changes the synthetic fittings the way a re-scrape would, runs
+FittingsMatcher with and without the cache and requires identical matches
+plus the expected reuse / rescoring counts.
+"""
+import io
+import sys
+import copy
+import tempfile
+import contextlib
+from pathlib import Path
+
+from match_fittings import FittingsMatcher
+from benchmark_parallel_match import synthetic_fittings, THREADS
+
+
+def run(balflex, heizmann, **options):
+    matcher = FittingsMatcher.__new__(FittingsMatcher)
+    matcher.balflex_fittings, matcher.heizmann_fittings, matcher.matches = balflex, heizmann, []
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        matches = matcher.match(**options)
+    summary = [line for line in output.getvalue().splitlines() if 'match cache' in line]
+    return matches, summary[0].strip('✓ ') if summary else ''
+
+
+def main():
+    balflex_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    heizmann_count = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    balflex = synthetic_fittings(balflex_count, 'balflex', 1)
+    heizmann = synthetic_fittings(heizmann_count, 'heizmann', 2)
+
+    changed = copy.deepcopy(heizmann)
+    for fitting in changed[::50]:
+        fitting['thread_type'] = THREADS[(THREADS.index(fitting['thread_type']) + 1) % len(THREADS)]
+    added_removed = changed[:10] + synthetic_fittings(5, 'heizmann', 3) + changed[15:]
+    duplicated = added_removed + [dict(added_removed[20])]
+    reordered = duplicated[1:] + duplicated[:1]
+    new_balflex = balflex[:-1] + synthetic_fittings(2, 'balflex', 4)
+
+    # (rule, balflex, heizmann, options, expected summary start)
+    steps = [
+        ("cold cache: everything scored", balflex, heizmann, {}, "match cache: 0 reused, 0 updated"),
+        ("nothing changed: reused as is", balflex, heizmann, {}, f"match cache: {balflex_count} reused"),
+        ("rule 4/5: changed Heizmann records", balflex, changed, {}, "match cache: 0 reused"),
+        ("rule 4/5: added and removed Heizmann records", balflex, added_removed, {}, "match cache: 0 reused"),
+        ("rule 4/5: duplicated Heizmann record", balflex, duplicated, {}, "match cache: 0 reused"),
+        ("rule 3: changed and added Balflex records", new_balflex, duplicated, {}, f"match cache: {balflex_count - 1} reused"),
+        ("rule 2: reordered Heizmann records", new_balflex, reordered, {}, "match cache: 0 reused, 0 updated"),
+        ("rule 1: other k", new_balflex, reordered, {'top_k': 3}, "match cache: 0 reused, 0 updated"),
+        ("rule 1: back to k=1", new_balflex, reordered, {}, "match cache: 0 reused, 0 updated"),
+    ]
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = str(Path(tmp) / 'fittings.cache.json')
+        for rule, left, right, options, expected in steps:
+            full, _ = run(left, right, **options)
+            cached, summary = run(left, right, cache_file=cache_file, **options)
+            ok = cached == full and summary.startswith(expected)
+            failed += not ok
+            print(f"  {'✓' if ok else '✗'} {rule:45s} {summary}")
+
+    if failed:
+        print(f"✗ {failed} step(s) failed")
+        sys.exit(1)
+    print("✓ Cached matches identical to full rematches")
+
+
+if __name__ == "__main__":
+    main()